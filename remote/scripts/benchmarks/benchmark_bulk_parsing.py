@@ -0,0 +1,90 @@
+"""
+benchmark_bulk_parsing
+----------------------
+
+Compares reading a bulk file's triples from Turtle, with rdflib's N-Triples parser and with our N-Triples line parser.
+
+Run with `poetry run python -m benchmarks.benchmark_bulk_parsing`.
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Tuple, List
+
+import click
+import rdflib
+from tabulate import tabulate
+
+from mbocsvwscripts.ntriples import iter_n_triples_file
+from .utils import generate_synthetic_bulk_graph, timed
+
+
+@click.command()
+@click.option(
+    "-n",
+    "--num-entities",
+    type=int,
+    multiple=True,
+    default=(1_000, 10_000),
+    show_default=True,
+)
+@click.option("-r", "--repeats", type=int, default=3, show_default=True)
+def main(num_entities: Tuple[int, ...], repeats: int) -> None:
+    """
+    Times reading every triple in synthetic bulk files.
+    """
+    rows = []
+    for n in num_entities:
+        with TemporaryDirectory() as tmp_dir:
+            graph = generate_synthetic_bulk_graph(n)
+            bulk_ttl_file = Path(tmp_dir) / "bulk.ttl"
+            bulk_nt_file = Path(tmp_dir) / "bulk.nt"
+            graph.serialize(bulk_ttl_file, format="ttl")
+            graph.serialize(bulk_nt_file, format="nt")
+
+            turtle_timings: List[float] = []
+            rdflib_n_triples_timings: List[float] = []
+            line_parser_timings: List[float] = []
+            for _ in range(repeats):
+                with timed(turtle_timings):
+                    rdflib.Graph().parse(bulk_ttl_file, format="ttl")
+
+                with timed(rdflib_n_triples_timings):
+                    rdflib.Graph().parse(bulk_nt_file, format="nt")
+
+                with timed(line_parser_timings):
+                    num_triples = sum(1 for _ in iter_n_triples_file(bulk_nt_file))
+
+            assert num_triples == len(graph)
+
+            turtle_time = min(turtle_timings)
+            line_parser_time = min(line_parser_timings)
+            rows.append(
+                [
+                    n,
+                    num_triples,
+                    f"{turtle_time:.3f}",
+                    f"{min(rdflib_n_triples_timings):.3f}",
+                    f"{line_parser_time:.3f}",
+                    f"{turtle_time / line_parser_time:.1f}x",
+                ]
+            )
+
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "Entities",
+                "Triples",
+                "Turtle seconds",
+                "rdflib N-Triples seconds",
+                "Line parser seconds",
+                "Speed-up vs Turtle",
+            ],
+            tablefmt="pipe",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
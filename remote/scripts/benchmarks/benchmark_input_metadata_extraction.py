@@ -0,0 +1,160 @@
+"""
+benchmark_input_metadata_extraction
+-----------------------------------
+
+Compares extracting (and removing) the input metadata from each raw JSON-LD file with direct triple-pattern lookups,
+as `processparametadata` now does, against the previous SPARQL CONSTRUCT + DELETE implementation.
+
+Run with `poetry run python -m benchmarks.benchmark_input_metadata_extraction`.
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, Tuple
+
+import click
+import rdflib
+from rdflib.compare import isomorphic
+from rdflib.term import Node
+from tabulate import tabulate
+
+from mbocsvwscripts.processparametadata import (
+    _extract_input_metadata_triples_and_remove,
+    INPUT_METADATA_DATA_TYPE_URI,
+)
+from .utils import timed
+
+METADATA_TEMPLATE_FILE = (
+    Path(__file__).parent.parent
+    / "test"
+    / "testcases"
+    / "parametadata"
+    / "mbo_TODO_LICENSE_1.json"
+)
+
+
+@click.command()
+@click.option(
+    "-n",
+    "--num-files",
+    type=int,
+    multiple=True,
+    default=(1_400,),
+    show_default=True,
+)
+@click.option("-r", "--repeats", type=int, default=3, show_default=True)
+def main(num_files: Tuple[int, ...], repeats: int) -> None:
+    """
+    Times extracting the input metadata from a set of raw JSON-LD files like those output by the build.
+    """
+    rows = []
+    for n in num_files:
+        with TemporaryDirectory() as tmp_dir:
+            metadata_files = _write_metadata_files(Path(tmp_dir), n)
+
+            parse_timings: List[float] = []
+            sparql_timings: List[float] = []
+            index_timings: List[float] = []
+            for _ in range(repeats):
+                with timed(parse_timings):
+                    for metadata_file in metadata_files:
+                        rdflib.Graph().parse(metadata_file)
+
+                with timed(sparql_timings):
+                    sparql_results = [
+                        _extract_input_metadata_triples_and_remove_with_sparql(f)
+                        for f in metadata_files
+                    ]
+
+                with timed(index_timings):
+                    index_results = [
+                        _extract_input_metadata_triples_and_remove(f)
+                        for f in metadata_files
+                    ]
+
+            for (sparql_graph, sparql_triples), (index_graph, index_triples) in zip(
+                sparql_results, index_results
+            ):
+                assert set(sparql_triples) == set(index_triples)
+                assert isomorphic(sparql_graph, index_graph)
+
+            parse_time = min(parse_timings)
+            sparql_time = min(sparql_timings)
+            index_time = min(index_timings)
+            rows.append(
+                [
+                    n,
+                    f"{parse_time:.3f}",
+                    f"{sparql_time:.3f}",
+                    f"{index_time:.3f}",
+                    f"{sparql_time / index_time:.1f}x",
+                    f"{(sparql_time - parse_time) / max(index_time - parse_time, 1e-9):.1f}x",
+                ]
+            )
+
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "Files",
+                "Parse only seconds",
+                "SPARQL seconds",
+                "Index seconds",
+                "Speed-up",
+                "Speed-up excluding parsing",
+            ],
+            tablefmt="pipe",
+        )
+    )
+
+
+def _write_metadata_files(tmp_dir: Path, num_files: int) -> List[Path]:
+    template = METADATA_TEMPLATE_FILE.read_text()
+    metadata_files = []
+    for i in range(num_files):
+        metadata_file = tmp_dir / f"mbo_benchmark_{i}.json"
+        metadata_file.write_text(
+            template.replace("mbo_TODO_LICENSE_1", f"mbo_benchmark_{i}")
+        )
+        metadata_files.append(metadata_file)
+
+    return metadata_files
+
+
+def _extract_input_metadata_triples_and_remove_with_sparql(
+    metadata_file: Path,
+) -> Tuple[rdflib.Graph, List[Tuple[Node, Node, Node]]]:
+    """
+    The previous implementation of `_extract_input_metadata_triples_and_remove`, kept here as the benchmark's baseline.
+    """
+    input_graph = rdflib.Graph()
+    input_graph.parse(metadata_file)
+    input_metadata_triples = list(
+        input_graph.query(
+            f"""
+        CONSTRUCT {{
+            ?inputMetadata ?p ?o.
+        }}
+        WHERE {{
+            ?inputMetadata a <{INPUT_METADATA_DATA_TYPE_URI}>;
+                           ?p ?o.
+        }}
+    """
+        )
+    )
+
+    input_graph.update(
+        f"""
+        DELETE
+        WHERE {{
+            ?inputMetadata a <{INPUT_METADATA_DATA_TYPE_URI}>;
+                           ?p ?o.
+        }}
+    """
+    )
+
+    return input_graph, input_metadata_triples  # type: ignore
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+benchmark_json_ld_emitter
+-------------------------
+
+Compares writing partitions with the direct expanded JSON-LD emitter against going via rdflib's JSON-LD serializer.
+
+Run with `poetry run python -m benchmarks.benchmark_json_ld_emitter`.
+"""
+
+import json
+from typing import Tuple, List
+
+import click
+import rdflib
+from tabulate import tabulate
+
+from mbocsvwscripts.expandedjsonld import get_expanded_json_ld
+from mbocsvwscripts.partition import index_triples_by_partition
+from .utils import generate_synthetic_bulk_graph, timed
+
+
+@click.command()
+@click.option(
+    "-n",
+    "--num-entities",
+    type=int,
+    multiple=True,
+    default=(1_000, 10_000),
+    show_default=True,
+)
+@click.option("-r", "--repeats", type=int, default=3, show_default=True)
+def main(num_entities: Tuple[int, ...], repeats: int) -> None:
+    """
+    Times converting every partition of synthetic bulk graphs to JSON-LD text.
+    """
+    rows = []
+    for n in num_entities:
+        partitions = list(
+            index_triples_by_partition(generate_synthetic_bulk_graph(n)).values()
+        )
+
+        serializer_timings: List[float] = []
+        emitter_timings: List[float] = []
+        for _ in range(repeats):
+            with timed(serializer_timings):
+                for partitioned_triples in partitions:
+                    graph = rdflib.Graph()
+                    for triple in partitioned_triples:
+                        graph.add(triple)
+                    graph.serialize(format="json-ld")
+
+            with timed(emitter_timings):
+                for partitioned_triples in partitions:
+                    json.dumps(
+                        get_expanded_json_ld(partitioned_triples),
+                        indent=2,
+                        ensure_ascii=False,
+                    )
+
+        serializer_time = min(serializer_timings)
+        emitter_time = min(emitter_timings)
+        rows.append(
+            [
+                n,
+                f"{serializer_time:.4f}",
+                f"{emitter_time:.4f}",
+                f"{serializer_time / emitter_time:.1f}x",
+            ]
+        )
+
+    print(
+        tabulate(
+            rows,
+            headers=["Entities", "Serializer seconds", "Emitter seconds", "Speed-up"],
+            tablefmt="pipe",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
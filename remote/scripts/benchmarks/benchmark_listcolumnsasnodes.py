@@ -0,0 +1,187 @@
+"""
+benchmark_listcolumnsasnodes
+----------------------------
+
+Compares the streaming literal-to-node rewriter in `listcolumnsasnodes` against the previous implementation, which
+loaded the whole graph and converted the literals with SPARQL queries and updates.
+
+Run with `poetry run python -m benchmarks.benchmark_listcolumnsasnodes`.
+"""
+
+import logging
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Tuple, List
+
+import click
+import rdflib
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF
+from tabulate import tabulate
+
+from mbocsvwscripts.listcolumnsasnodes import (
+    _convert_literals_to_nodes_in_file,
+    CONVERT_MBO_ID_TO_NODE_DATA_TYPE_URI,
+    CONVERT_IRI_TO_NODE_DATA_TYPE_URI,
+)
+from mbocsvwscripts.processparametadata import MBO, SCHEMA
+from .utils import timed
+
+
+@click.command()
+@click.option(
+    "-n",
+    "--num-entities",
+    type=int,
+    multiple=True,
+    default=(1_000, 5_000, 20_000),
+    show_default=True,
+)
+@click.option("-r", "--repeats", type=int, default=3, show_default=True)
+def main(num_entities: Tuple[int, ...], repeats: int) -> None:
+    """
+    Times converting the literals in synthetic bulk TTL files with each implementation.
+    """
+    # The SPARQL baseline binds `URI(...)` before filtering on the datatype, so rdflib warns about every other literal.
+    logging.getLogger("rdflib.term").setLevel(logging.ERROR)
+
+    rows = []
+    for n in num_entities:
+        with TemporaryDirectory() as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+            bulk_ttl_file = tmp_dir / "bulk.ttl"
+            _generate_bulk_graph_with_literals_to_convert(n).serialize(
+                bulk_ttl_file, format="ttl"
+            )
+            sparql_ttl_file = tmp_dir / "sparql.ttl"
+            streaming_ttl_file = tmp_dir / "streaming.ttl"
+
+            sparql_timings: List[float] = []
+            streaming_timings: List[float] = []
+            for _ in range(repeats):
+                shutil.copy(bulk_ttl_file, sparql_ttl_file)
+                with timed(sparql_timings):
+                    _convert_literals_to_nodes_in_file_with_sparql(sparql_ttl_file)
+
+                shutil.copy(bulk_ttl_file, streaming_ttl_file)
+                with timed(streaming_timings):
+                    _convert_literals_to_nodes_in_file(streaming_ttl_file)
+
+            assert isomorphic(
+                rdflib.Graph().parse(sparql_ttl_file, format="ttl"),
+                rdflib.Graph().parse(streaming_ttl_file, format="ttl"),
+            )
+
+            sparql_time = min(sparql_timings)
+            streaming_time = min(streaming_timings)
+            rows.append(
+                [
+                    n,
+                    f"{bulk_ttl_file.stat().st_size / (1024 * 1024):.1f}",
+                    f"{sparql_time:.3f}",
+                    f"{streaming_time:.3f}",
+                    f"{sparql_time / streaming_time:.1f}x",
+                ]
+            )
+
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "Entities",
+                "TTL MiB",
+                "SPARQL seconds",
+                "Streaming seconds",
+                "Speed-up",
+            ],
+            tablefmt="pipe",
+        )
+    )
+
+
+def _generate_bulk_graph_with_literals_to_convert(num_entities: int) -> rdflib.Graph:
+    graph = rdflib.Graph()
+    for i in range(num_entities):
+        entity_uri = MBO[f"mbo_benchmark_dataset_{i}"]
+        graph.add((entity_uri, RDF.type, SCHEMA.Dataset))
+        graph.add((entity_uri, SCHEMA.name, rdflib.Literal(f"Dataset {i}")))
+        graph.add(
+            (
+                entity_uri,
+                SCHEMA.variableMeasured,
+                rdflib.Literal(
+                    f"mbo_benchmark_variable_{i % 100}",
+                    datatype=CONVERT_MBO_ID_TO_NODE_DATA_TYPE_URI,
+                ),
+            )
+        )
+        graph.add(
+            (
+                entity_uri,
+                SCHEMA.url,
+                rdflib.Literal(
+                    f"https://example.com/dataset/{i}",
+                    datatype=CONVERT_IRI_TO_NODE_DATA_TYPE_URI,
+                ),
+            )
+        )
+
+    return graph
+
+
+def _convert_literals_to_nodes_in_file_with_sparql(ttl_file: Path) -> None:
+    """
+    The previous implementation of `listcolumnsasnodes`, kept here as the benchmark's baseline.
+    """
+    graph = rdflib.Graph()
+    graph = graph.parse(ttl_file, format="ttl")
+
+    if _get_number_to_be_converted_in_graph(graph) > 0:
+        graph.update(
+            """
+            DELETE {
+                ?s ?p ?nodePID.
+            }
+            INSERT {
+                ?s ?p ?uriNode.
+            }
+            WHERE {
+                {
+                    ?s ?p ?nodePID.
+                    FILTER(datatype(?nodePID) = <https://w3id.org/marco-bolo/ConvertMboIdToNode>).
+                    BIND (URI( CONCAT("https://w3id.org/marco-bolo/", STR(?nodePID))) as ?uriNode).
+                } UNION {
+                    ?s ?p ?nodePID.
+                    FILTER(datatype(?nodePID) = <https://w3id.org/marco-bolo/ConvertIriToNode>).
+                    BIND(URI(STR(?nodePID)) as ?uriNode).
+                }
+            }
+        """
+        )
+
+        num_remaining = _get_number_to_be_converted_in_graph(graph)
+        if num_remaining != 0:
+            raise Exception(f"Failed to convert {num_remaining}literals.")
+
+        graph.serialize(ttl_file, format="ttl")
+
+
+def _get_number_to_be_converted_in_graph(graph: rdflib.Graph) -> int:
+    results = list(
+        graph.query(
+            """
+        SELECT *
+        WHERE {
+            ?s ?p ?mboNodePID.
+            FILTER(datatype(?mboNodePID) IN (<https://w3id.org/marco-bolo/ConvertMboIdToNode>, <https://w3id.org/marco-bolo/ConvertIriToNode>)).
+        }
+        """
+        )
+    )
+
+    return len(results)
+
+
+if __name__ == "__main__":
+    main()
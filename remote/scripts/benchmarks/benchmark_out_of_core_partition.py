@@ -0,0 +1,86 @@
+"""
+benchmark_out_of_core_partition
+-------------------------------
+
+Compares the peak memory use of partitioning in memory against partitioning out-of-core.
+
+Run with `poetry run python -m benchmarks.benchmark_out_of_core_partition`.
+"""
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+
+import click
+from tabulate import tabulate
+
+from .utils import write_synthetic_bulk_ttl
+
+_PEAK_RSS_REGEX = re.compile(r"Peak RSS: ([0-9.]+) MiB")
+
+
+@click.command()
+@click.option("-n", "--num-entities", type=int, default=20_000, show_default=True)
+@click.option("--max-triples-in-memory", type=int, default=10_000, show_default=True)
+def main(num_entities: int, max_triples_in_memory: int) -> None:
+    """
+    Each mode runs in a fresh process so that their peak RSS figures are independent of each other.
+    """
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        bulk_ttl_file = tmp_dir / "bulk.ttl"
+        write_synthetic_bulk_ttl(bulk_ttl_file, num_entities)
+        bulk_ttl_file_size_mib = bulk_ttl_file.stat().st_size / (1024 * 1024)
+
+        rows = []
+        for mode, extra_args in [
+            ("In memory", []),
+            (
+                "Out-of-core",
+                [
+                    "--out-of-core",
+                    "--max-triples-in-memory",
+                    str(max_triples_in_memory),
+                ],
+            ),
+        ]:
+            out_dir = tmp_dir / mode
+            out_dir.mkdir()
+            rows.append(
+                [mode, _get_peak_rss_partitioning(bulk_ttl_file, out_dir, extra_args)]
+            )
+
+    print(
+        f"Partitioned {num_entities} entities ({bulk_ttl_file_size_mib:.1f} MiB of Turtle)."
+    )
+    print(tabulate(rows, headers=["Mode", "Peak RSS (MiB)"], tablefmt="pipe"))
+
+
+def _get_peak_rss_partitioning(
+    bulk_ttl_file: Path, out_dir: Path, extra_args: List[str]
+) -> float:
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "mbocsvwscripts.partition",
+            "execute",
+            "--out",
+            str(out_dir),
+            *extra_args,
+            str(bulk_ttl_file),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    peak_rss_match = _PEAK_RSS_REGEX.search(output)
+    assert peak_rss_match is not None, output
+    return float(peak_rss_match.group(1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+benchmark_parallel_partition
+----------------------------
+
+Compares serializing partitions serially against serializing them in a process pool.
+
+Run with `poetry run python -m benchmarks.benchmark_parallel_partition`.
+"""
+
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+
+import click
+from tabulate import tabulate
+
+from mbocsvwscripts.partition import _partition_to_individual_files
+from .utils import write_synthetic_bulk_ttl, timed
+
+
+@click.command()
+@click.option("-n", "--num-entities", type=int, default=50_000, show_default=True)
+@click.option(
+    "-w", "--workers", type=int, default=max(2, os.cpu_count() or 1), show_default=True
+)
+def main(num_entities: int, workers: int) -> None:
+    """
+    Partitions a synthetic bulk TTL file serially and then with WORKERS processes and checks the outputs are
+    byte-identical.
+    """
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        bulk_ttl_file = tmp_dir / "bulk.ttl"
+        write_synthetic_bulk_ttl(bulk_ttl_file, num_entities)
+
+        rows = []
+        serial_time = None
+        for num_workers in [1, workers]:
+            out_dir = tmp_dir / f"workers-{num_workers}"
+            out_dir.mkdir()
+            timings: List[float] = []
+            with timed(timings):
+                _partition_to_individual_files(
+                    bulk_ttl_file, out_dir, workers=num_workers
+                )
+
+            serial_time = serial_time or timings[0]
+            rows.append(
+                [num_workers, f"{timings[0]:.2f}", f"{serial_time / timings[0]:.2f}x"]
+            )
+
+        _assert_directories_identical(tmp_dir / "workers-1", out_dir)
+
+    print(f"Partitioned {num_entities} entities.")
+    print(tabulate(rows, headers=["Workers", "Seconds", "Speedup"], tablefmt="pipe"))
+
+
+def _assert_directories_identical(expected_dir: Path, actual_dir: Path) -> None:
+    expected_files = sorted(f.name for f in expected_dir.iterdir())
+    assert expected_files == sorted(f.name for f in actual_dir.iterdir())
+    for file_name in expected_files:
+        assert (expected_dir / file_name).read_bytes() == (
+            actual_dir / file_name
+        ).read_bytes(), file_name
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+benchmark_partition
+-------------------
+
+Demonstrates how partitioning scales with the number of entities in a bulk TTL file.
+
+Run with `poetry run python -m benchmarks.benchmark_partition`.
+"""
+
+from typing import Tuple, List
+
+import click
+from tabulate import tabulate
+
+from mbocsvwscripts.partition import index_triples_by_partition
+from .utils import generate_synthetic_bulk_graph, timed
+
+
+@click.command()
+@click.option(
+    "-n",
+    "--num-entities",
+    type=int,
+    multiple=True,
+    default=(100, 1_000, 10_000, 100_000),
+    show_default=True,
+)
+@click.option("-r", "--repeats", type=int, default=3, show_default=True)
+def main(num_entities: Tuple[int, ...], repeats: int) -> None:
+    """
+    Times indexing synthetic bulk graphs into partitions. Linear scaling shows up as a constant time per entity.
+    """
+    rows = []
+    for n in num_entities:
+        graph = generate_synthetic_bulk_graph(n)
+        timings: List[float] = []
+        for _ in range(repeats):
+            with timed(timings):
+                partitioned_triples = index_triples_by_partition(graph)
+
+        assert len(partitioned_triples) == n
+        best_time = min(timings)
+        rows.append([n, len(graph), f"{best_time:.4f}", f"{best_time / n * 1e6:.2f}"])
+
+    print(
+        tabulate(
+            rows,
+            headers=["Entities", "Triples", "Seconds", "µs per entity"],
+            tablefmt="pipe",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
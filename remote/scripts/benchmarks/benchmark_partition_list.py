@@ -0,0 +1,81 @@
+"""
+benchmark_partition_list
+------------------------
+
+Compares the ways `partition list` can find the partitions in a bulk file: parsing the Turtle, scanning the subjects
+of an N-Triples rendering and reading a subject index.
+
+Run with `poetry run python -m benchmarks.benchmark_partition_list`.
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Tuple, List
+
+import click
+from tabulate import tabulate
+
+from mbocsvwscripts.partition import (
+    _list_partition_uris,
+    _get_subject_index_file_path,
+    _write_subject_index,
+)
+from .utils import generate_synthetic_bulk_graph, timed
+
+
+@click.command()
+@click.option(
+    "-n",
+    "--num-entities",
+    type=int,
+    multiple=True,
+    default=(1_000, 10_000),
+    show_default=True,
+)
+@click.option("-r", "--repeats", type=int, default=3, show_default=True)
+def main(num_entities: Tuple[int, ...], repeats: int) -> None:
+    """
+    Times listing the partitions of synthetic bulk files.
+    """
+    rows = []
+    for n in num_entities:
+        with TemporaryDirectory() as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+            graph = generate_synthetic_bulk_graph(n)
+            ttl_file = tmp_dir / "bulk.ttl"
+            graph.serialize(ttl_file, format="ttl")
+            nt_file = tmp_dir / "bulk.nt"
+            graph.serialize(nt_file, format="nt")
+            indexed_file = tmp_dir / "indexed.ttl"
+            graph.serialize(indexed_file, format="ttl")
+
+            expected_partition_uris = _list_partition_uris(ttl_file)
+            _write_subject_index(indexed_file, expected_partition_uris)
+            assert _get_subject_index_file_path(indexed_file).exists()
+
+            row = [n]
+            for bulk_file in [ttl_file, nt_file, indexed_file]:
+                timings: List[float] = []
+                for _ in range(repeats):
+                    with timed(timings):
+                        partition_uris = _list_partition_uris(bulk_file)
+                assert partition_uris == expected_partition_uris
+                row.append(f"{min(timings) * 1000:.1f}")
+            rows.append(row)
+
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "Entities",
+                "Turtle parse (ms)",
+                "N-Triples scan (ms)",
+                "Subject index (ms)",
+            ],
+            tablefmt="pipe",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+
+import rdflib
+from rdflib.namespace import RDF
+
+from mbocsvwscripts.processparametadata import MBO, SCHEMA
+
+
+def generate_synthetic_bulk_graph(num_entities: int) -> rdflib.Graph:
+    """
+    Generates a graph shaped like a bulk TTL file output by csv2rdf, i.e. with a number of entities each of which has
+    a hash-URI hanging off of it.
+    """
+    graph = rdflib.Graph()
+    for i in range(num_entities):
+        entity_uri = MBO[f"mbo_benchmark_{i}"]
+        amount_uri = MBO[f"mbo_benchmark_{i}#amount"]
+
+        graph.add((entity_uri, RDF.type, SCHEMA.MonetaryGrant))
+        graph.add((entity_uri, SCHEMA.name, rdflib.Literal(f"Grant {i}")))
+        graph.add((entity_uri, SCHEMA.sdPublisher, MBO.mbo_todo_person_roblinksdata))
+        graph.add((entity_uri, SCHEMA.amount, amount_uri))
+        graph.add((amount_uri, RDF.type, SCHEMA.MonetaryAmount))
+        graph.add((amount_uri, SCHEMA.value, rdflib.Literal(str(i))))
+
+    return graph
+
+
+@contextmanager
+def timed(timings: List[float]) -> Iterator[None]:
+    """
+    Appends the wall-clock time (in seconds) spent inside the block to `timings`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.append(time.perf_counter() - start)
+
+
+def write_synthetic_bulk_ttl(bulk_ttl_file: Path, num_entities: int) -> None:
+    generate_synthetic_bulk_graph(num_entities).serialize(bulk_ttl_file, format="ttl")
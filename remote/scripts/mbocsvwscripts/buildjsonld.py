@@ -0,0 +1,446 @@
+"""
+buildjsonld
+-----------
+
+Builds the tidy schema.org JSON-LD documents (and their para-metadata) straight from a bulk N-Triples (or TTL)
+file in one process.
+
+This does the work of `partition execute`, `processparametadata`, `jsonld frame` and `jsonld compact` without
+starting a new process (or container) for every entity.
+"""
+
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import click
+import rdflib
+from rdflib.compare import to_canonical_graph
+from rdflib.namespace import RDF
+from rdflib.plugins.serializers.jsonld import PLAIN_LITERAL_TYPES, Converter
+from rdflib.plugins.shared.jsonld.context import Context
+from rdflib.term import BNode, IdentifiedNode, Identifier, Literal, Node, URIRef
+
+from mbocsvwscripts.partition import (
+    PartitionManifest,
+    PartitionManifestEntry,
+    Triple,
+    get_partition_content_hash,
+    get_partition_file_path,
+    get_previous_partition_hashes,
+    index_triples_by_partition,
+    read_bulk_triples,
+    write_partition_manifest,
+)
+from mbocsvwscripts.processparametadata import (
+    INPUT_METADATA_DATA_TYPE_URI,
+    SCHEMA,
+    BuildContext,
+    build_para_metadata_graph,
+    frame_para_metadata,
+    write_if_changed,
+)
+
+SCHEMA_HTTP_URI_PREFIX: str = "http://schema.org/"
+"""
+The schema.org JSON-LD context exclusively uses http://schema.org/ URIs, so we compact against those.
+"""
+OUTPUT_CONTEXT: Dict[str, str] = {
+    "@import": "https://schema.org/",
+    "schema": "https://schema.org/",
+}
+"""
+The context written into each output document. It makes use of the schema.org context, but tells it to use https URIs
+instead of http.
+"""
+DOCUMENT_FORMAT_VERSION: str = "1"
+"""
+Bump this whenever the way the documents are compacted or framed changes, so that every document is rebuilt rather
+than being skipped because its partition's triples haven't changed.
+"""
+
+_worker_schema_org_context: Optional[Context] = None
+"""
+The schema.org context each worker process compacts against, loaded once per process by `_initialise_worker`.
+"""
+
+
+@click.command("build-jsonld")
+@click.option(
+    "-o", "--out", required=False, type=click.Path(), show_default=True, default="."
+)
+@click.option(
+    "-c",
+    "--context",
+    required=True,
+    type=click.Path(exists=True),
+    help="The schema.org JSON-LD context file to compact the documents against.",
+)
+@click.option(
+    "-m",
+    "--manifest",
+    required=False,
+    type=click.Path(),
+    help="Write a JSON manifest of the partition URIs, their output files and content hashes to this path. "
+    "Documents whose content and schema.org context haven't changed since the manifest was last written are left "
+    "untouched.",
+)
+@click.option("-g", "--git_repo_commit_file_url", type=str, required=False)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The number of processes to build the JSON-LD documents with.",
+)
+@click.argument("bulk_ttl_file", type=click.Path(exists=True))
+def main(
+    out: click.Path,
+    context: click.Path,
+    manifest: Optional[click.Path],
+    git_repo_commit_file_url: Optional[str],
+    workers: int,
+    bulk_ttl_file: click.Path,
+) -> None:
+    """
+    Takes a BULK_TTL_FILE and writes one compacted schema.org JSON-LD document per unique URI, along with a framed
+    `-input-metadata.json` para-metadata document describing it.
+
+    Hash-URIs end up in the same document.
+    """
+    num_documents_written = _build_json_ld_documents(
+        Path(str(bulk_ttl_file)),
+        Path(str(out)),
+        Path(str(context)),
+        date.today(),
+        git_repo_commit_file_url,
+        None if manifest is None else Path(str(manifest)),
+        workers,
+    )
+    print(f"Wrote {num_documents_written} changed JSON-LD document(s).")
+
+
+def _build_json_ld_documents(
+    bulk_ttl_file: Path,
+    out_folder: Path,
+    schema_org_context_file: Path,
+    dt_stamp: date,
+    git_repo_commit_file_url: Optional[str] = None,
+    manifest_file: Optional[Path] = None,
+    workers: int = 1,
+) -> int:
+    """
+    Returns the number of partitions whose documents were (re)written.
+
+    Where a `manifest_file` from a previous run exists, partitions whose content hash hasn't changed aren't rewritten.
+    Each hash in the manifest also covers the schema.org context and the `DOCUMENT_FORMAT_VERSION`, so changing
+    either of them rebuilds every document.
+    """
+    previous_partition_hashes = get_previous_partition_hashes(manifest_file)
+    schema_org_context_data = _read_schema_org_context(schema_org_context_file)
+    build_settings_hash = _get_build_settings_hash(schema_org_context_data)
+
+    partitions_to_build: List[Tuple[Path, List[Triple]]] = []
+    manifest_entries: List[PartitionManifestEntry] = []
+    for part, partitioned_triples in sorted(
+        index_triples_by_partition(read_bulk_triples(bulk_ttl_file)).items()
+    ):
+        document_file_path = get_partition_file_path(out_folder, part)
+        content_hash = _get_sha256_hash(
+            f"{build_settings_hash}\0{get_partition_content_hash(partitioned_triples)}"
+        )
+        if (
+            previous_partition_hashes.get(str(document_file_path)) != content_hash
+            or not document_file_path.exists()
+            or not _get_para_metadata_file_path(document_file_path).exists()
+        ):
+            partitions_to_build.append((document_file_path, partitioned_triples))
+
+        manifest_entries.append(
+            PartitionManifestEntry(
+                uri=str(part), file=str(document_file_path), hash=content_hash
+            )
+        )
+
+    # Every partition in the batch is stamped with the same build context.
+    build_context = BuildContext(dt_stamp, git_repo_commit_file_url)
+    if workers > 1 and len(partitions_to_build) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_initialise_worker,
+            initargs=(schema_org_context_data,),
+        ) as executor:
+            # Consuming the results makes sure any exception raised in a worker is re-raised here.
+            list(
+                executor.map(
+                    _build_partition_documents,
+                    *zip(*partitions_to_build),
+                    [build_context] * len(partitions_to_build),
+                    chunksize=max(1, len(partitions_to_build) // (workers * 4)),
+                )
+            )
+    else:
+        _initialise_worker(schema_org_context_data)
+        for document_file_path, partitioned_triples in partitions_to_build:
+            _build_partition_documents(
+                document_file_path,
+                partitioned_triples,
+                build_context,
+            )
+
+    if manifest_file is not None:
+        write_partition_manifest(
+            manifest_file, PartitionManifest(str(bulk_ttl_file), manifest_entries)
+        )
+
+    return len(partitions_to_build)
+
+
+def _get_build_settings_hash(schema_org_context_data: Dict[str, Any]) -> str:
+    """
+    A hash of everything besides the partition's triples which determines what its documents contain.
+    """
+    return _get_sha256_hash(
+        json.dumps(
+            [DOCUMENT_FORMAT_VERSION, OUTPUT_CONTEXT, schema_org_context_data],
+            sort_keys=True,
+        )
+    )
+
+
+def _get_sha256_hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _initialise_worker(schema_org_context_data: Dict[str, Any]) -> None:
+    global _worker_schema_org_context
+    _worker_schema_org_context = Context(schema_org_context_data)
+
+
+def _build_partition_documents(
+    document_file_path: Path,
+    partitioned_triples: List[Triple],
+    build_context: BuildContext,
+) -> None:
+    """
+    N.B. This needs to remain a module-level function so that it can be pickled and sent to worker processes.
+    """
+    assert _worker_schema_org_context is not None
+    context = _worker_schema_org_context
+
+    data_triples, input_metadata_triples = _split_input_metadata_triples(
+        partitioned_triples
+    )
+    para_metadata_graph = build_para_metadata_graph(
+        input_metadata_triples, build_context
+    )
+
+    # Build both documents before writing either, so a failure doesn't leave a half-built partition behind.
+    document = _compact_triples(data_triples, context)
+    para_metadata_document = _frame_para_metadata(para_metadata_graph, context)
+
+    _write_json_ld_document(document_file_path, document)
+    _write_json_ld_document(
+        _get_para_metadata_file_path(document_file_path), para_metadata_document
+    )
+
+
+def _split_input_metadata_triples(
+    partitioned_triples: List[Triple],
+) -> Tuple[List[Triple], List[Triple]]:
+    """
+    Separates the input metadata triples from the rest of the partition's triples.
+    """
+    input_metadata_subjects = {
+        s
+        for (s, p, o) in partitioned_triples
+        if p == RDF.type and o == INPUT_METADATA_DATA_TYPE_URI
+    }
+    data_triples = []
+    input_metadata_triples = []
+    for triple in partitioned_triples:
+        if triple[0] in input_metadata_subjects:
+            input_metadata_triples.append(triple)
+        else:
+            data_triples.append(triple)
+
+    return data_triples, input_metadata_triples
+
+
+def _compact_triples(triples: List[Triple], context: Context) -> Dict[str, Any]:
+    """
+    Compacts the triples against the schema.org context.
+
+    There is only one top-level node when the partition has no hash-URIs or blank nodes, otherwise the nodes are
+    listed under `@graph`, in the same way as `jsonld compact` does it.
+    """
+    graph = _get_schema_http_graph(triples)
+    converter = _get_converter(context)
+
+    nodes = [
+        _compact_node(converter, graph, s)
+        for s in sorted(
+            set(graph.subjects()), key=lambda s: (isinstance(s, BNode), str(s))
+        )
+    ]
+    if len(nodes) == 1:
+        return {"@context": OUTPUT_CONTEXT, **nodes[0]}
+
+    return {"@context": OUTPUT_CONTEXT, "@graph": nodes}
+
+
+def _frame_para_metadata(
+    para_metadata_graph: rdflib.Graph, context: Context
+) -> Dict[str, Any]:
+    """
+    Gives the para-metadata the shape described by `remote/para-metadata.frame.json` with `processparametadata`'s
+    framing, compacting each node against the schema.org context.
+    """
+    graph = _get_schema_http_graph(para_metadata_graph)
+    converter = _get_converter(context)
+
+    framed_dataset = frame_para_metadata(
+        para_metadata_graph,
+        write_node=lambda subject: _compact_node(converter, graph, subject),
+        get_key=lambda uri: context.to_symbol(_to_schema_http(uri)),
+    )
+
+    return {"@context": OUTPUT_CONTEXT, **framed_dataset}
+
+
+def _compact_node(
+    converter: Converter, graph: rdflib.Graph, subject: IdentifiedNode
+) -> Dict[str, Any]:
+    context = converter.context
+    node: Dict[str, Any] = converter.process_subject(graph, subject, {})
+
+    # rdflib falls back to the absolute IRI when a value doesn't suit the type coercion of the property's term, e.g.
+    # a literal given for a property expecting `@id`s. `jsonld compact` uses a compact IRI (`schema:url`) instead,
+    # which matters since the output context maps the `schema:` prefix onto https://schema.org/.
+    return {
+        (context.shrink_iri(key) if "://" in key else key): value
+        for key, value in node.items()
+    }
+
+
+class _Converter(Converter):
+    """
+    Writes literals in the same way as `jsonld compact` did for the raw JSON-LD documents which `partition` wrote.
+
+    rdflib's JSON-LD serializer writes xsd:boolean, xsd:integer and xsd:double values as native JSON values, and
+    `jsonld compact` keeps them as typed value objects, e.g. `{"@type": "xsd:integer", "@value": 5}`. The plain
+    `Converter` would either write the value as a string or, with an active context, drop the type altogether.
+
+    N.B. `Converter` is the class rdflib's JSON-LD serializer does its work with, rather than part of rdflib's
+    documented API. `test_documents_compacted_like_jsonld_compact` checks we still match `jsonld compact` whenever
+    rdflib is upgraded.
+    """
+
+    def to_raw_value(
+        self,
+        graph: rdflib.Graph,
+        s: IdentifiedNode,
+        o: Identifier,
+        nodemap: Dict[str, Any],
+    ) -> Any:
+        if isinstance(o, Literal) and o.datatype in PLAIN_LITERAL_TYPES:
+            return {
+                self.context.type_key: self.context.to_symbol(o.datatype),
+                self.context.value_key: o.toPython(),
+            }
+
+        return super().to_raw_value(graph, s, o, nodemap)
+
+
+def _get_converter(context: Context) -> Converter:
+    return _Converter(context, use_native_types=False, use_rdf_type=False)
+
+
+def _get_schema_http_graph(triples) -> rdflib.Graph:
+    """
+    Swaps all https://schema.org/ URIs for http://schema.org/ ones in preparation for compaction against the
+    schema.org JSON-LD context.
+
+    Blank nodes are relabelled deterministically and the triples are added in sorted order so that the documents are
+    written out the same way every time.
+    """
+    graph = rdflib.Graph()
+    for s, p, o in sorted(
+        _relabel_blank_nodes(
+            [
+                (_to_schema_http(s), _to_schema_http(p), _to_schema_http(o))
+                for (s, p, o) in triples
+            ]
+        )
+    ):
+        graph.add((s, p, o))
+
+    return graph
+
+
+def _relabel_blank_nodes(triples: List[Triple]) -> List[Triple]:
+    """
+    Replaces the parser's random blank node labels with `b0`, `b1`, etc.
+
+    The numbering follows rdflib's canonical labelling of the blank nodes, which only depends on the triples' content.
+    """
+    if not any(isinstance(term, BNode) for triple in triples for term in triple):
+        return triples
+
+    graph = rdflib.Graph()
+    for triple in triples:
+        graph.add(triple)
+    canonical_triples = list(to_canonical_graph(graph))
+
+    labels: Dict[Node, Node] = {
+        canonical_label: BNode(f"b{i}")
+        for i, canonical_label in enumerate(
+            sorted(
+                {
+                    term
+                    for triple in canonical_triples
+                    for term in triple
+                    if isinstance(term, BNode)
+                }
+            )
+        )
+    }
+    return [
+        (labels.get(s, s), labels.get(p, p), labels.get(o, o))
+        for (s, p, o) in canonical_triples
+    ]
+
+
+def _to_schema_http(node: Node) -> Node:
+    if isinstance(node, URIRef) and node.startswith(str(SCHEMA)):
+        return URIRef(SCHEMA_HTTP_URI_PREFIX + node[len(str(SCHEMA)) :])
+    elif isinstance(node, Literal) and node.datatype is not None:
+        datatype = _to_schema_http(node.datatype)
+        if datatype != node.datatype:
+            return Literal(str(node), datatype=datatype)
+
+    return node
+
+
+def _read_schema_org_context(schema_org_context_file: Path) -> Dict[str, Any]:
+    return json.loads(schema_org_context_file.read_text())["@context"]
+
+
+def _get_para_metadata_file_path(document_file_path: Path) -> Path:
+    return document_file_path.with_name(
+        f"{document_file_path.stem}-input-metadata.json"
+    )
+
+
+def _write_json_ld_document(file_path: Path, document: Dict[str, Any]) -> None:
+    write_if_changed(
+        file_path, json.dumps(document, indent=2, ensure_ascii=False, sort_keys=True)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+csvcolumns
+----------
+
+Streams through the values in a single column of a CSV file with the `csv` module, without building a data frame
+(or importing pandas at all). Every value is read as a string, just as `csvdataframes` reads them.
+"""
+
+import csv
+from pathlib import Path
+from typing import Iterator, List
+
+
+def read_csv_header(csv_file: Path) -> List[str]:
+    with open(csv_file, "r", encoding="utf-8-sig", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def iter_column_values(csv_file: Path, column_title: str) -> Iterator[str]:
+    """
+    Yields the non-empty values in the CSV file's column, in file order.
+    """
+    with open(csv_file, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if column_title not in header:
+            raise Exception(f"Unable to find column '{column_title}' in {csv_file}.")
+
+        column_index = header.index(column_title)
+        for row in reader:
+            if column_index < len(row) and row[column_index] != "":
+                yield row[column_index]
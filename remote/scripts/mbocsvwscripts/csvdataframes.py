@@ -0,0 +1,51 @@
+"""
+csvdataframes
+-------------
+
+Loads only the columns of a CSV file which a tool actually uses into a pandas data frame.
+
+Every value is read as a string. Letting pandas infer the types can corrupt identifiers, e.g. a numeric-looking `0012`
+would become the integer `12`, or `12.0` once the column has an empty cell in it. Only empty cells are treated as
+missing. Strings like `NA` or `null` are kept as they are. Blank lines are kept as empty rows, so that a data frame's
+row index still points at the right line of the file.
+
+Tools which only need to stream through a single column should use `csvcolumns` instead, which doesn't need pandas.
+"""
+
+from pathlib import Path
+from typing import Iterable, Set
+
+import pandas as pd
+
+
+def read_csv_columns(csv_file: Path, column_titles: Iterable[str]) -> pd.DataFrame:
+    """
+    Reads just the `column_titles` columns of the CSV file, with every value as a string.
+    """
+    return pd.read_csv(
+        csv_file,
+        usecols=list(dict.fromkeys(column_titles)),
+        dtype=str,
+        keep_default_na=False,
+        na_values=[""],
+        skip_blank_lines=False,
+        engine="c",
+    )
+
+
+def get_unique_values(column: pd.Series) -> Set[str]:
+    return set(column.dropna().unique())
+
+
+def split_list_column(list_column: pd.Series, separator: str) -> pd.Series:
+    """
+    Returns each value held in a column of `separator`-separated lists, indexed by the row it came from.
+    """
+    return list_column.dropna().str.split(separator, regex=False).explode()
+
+
+def get_unique_list_values(list_column: pd.Series, separator: str) -> Set[str]:
+    """
+    Returns each distinct value held in a column of `separator`-separated lists.
+    """
+    return set(split_list_column(list_column, separator).unique())
@@ -0,0 +1,51 @@
+"""
+expandedjsonld
+--------------
+
+Writes triples straight out as (flattened) expanded JSON-LD, as `partition` does for its partition files and
+`processparametadata` does for the metadata files it strips the input metadata out of.
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+from rdflib.namespace import RDF
+from rdflib.term import BNode, Literal, Node, URIRef
+
+Triple = Tuple[Node, Node, Node]
+
+
+def get_expanded_json_ld(triples: Iterable[Triple]) -> List[Dict[str, Any]]:
+    """
+    Builds the expanded JSON-LD for the triples without going via an `rdflib.Graph` and its serializer.
+
+    Each subject becomes one flat node object, which is all a partition (a subject plus its hash-URIs) needs. The
+    triples are sorted first so that they're always written out in the same way.
+    """
+    nodes: Dict[Node, Dict[str, Any]] = {}
+    for s, p, o in sorted(set(triples)):
+        node = nodes.get(s)
+        if node is None:
+            node = nodes[s] = {"@id": _get_json_ld_id(s)}
+
+        if p == RDF.type and isinstance(o, URIRef):
+            node.setdefault("@type", []).append(str(o))
+        else:
+            node.setdefault(str(p), []).append(_get_json_ld_value(o))
+
+    return list(nodes.values())
+
+
+def _get_json_ld_id(node: Node) -> str:
+    return node.n3() if isinstance(node, BNode) else str(node)
+
+
+def _get_json_ld_value(o: Node) -> Dict[str, str]:
+    if isinstance(o, Literal):
+        if o.datatype is not None:
+            return {"@type": str(o.datatype), "@value": str(o)}
+        elif o.language is not None:
+            return {"@language": o.language, "@value": str(o)}
+        else:
+            return {"@value": str(o)}
+
+    return {"@id": _get_json_ld_id(o)}
@@ -0,0 +1,25 @@
+"""
+foreignkeychecks
+----------------
+
+The declarations of the list column foreign key checks which `listcolumnforeignkeycheck --spec` runs.
+
+`generatecsvwdefinitions` writes them out to a foreign key checks JSON file, so they live here rather than in
+`listcolumnforeignkeycheck` to save the generator from importing the checking tool itself.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ListColumnForeignKeyCheck:
+    """
+    Declares that each value in the `child_table_column` list column must appear in the `parent_table_column`.
+    """
+
+    child_table_path: str
+    child_table_column: str
+    parent_table_path: str
+    parent_table_column: str
+    separator: Optional[str] = None
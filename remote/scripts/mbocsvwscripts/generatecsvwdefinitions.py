@@ -4,7 +4,8 @@ generatecsvwdefinitions
 
 Generate csv-w defintions from the linkml.
 
-N.B. There are no unit tests for this since it is designed to save development time and hence be run by a developer.
+N.B. There are only a few unit tests for this since it is designed to save development time and hence be run by a
+developer.
 """
 
 import csv
@@ -14,7 +15,7 @@ import re
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Set
 from textwrap import dedent, indent
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from urllib.parse import urljoin
 from os import linesep
 
@@ -34,6 +35,9 @@ from rdflib import URIRef
 from rdflib.namespace import XSD
 from tabulate import tabulate
 
+from mbocsvwscripts.foreignkeychecks import ListColumnForeignKeyCheck
+from mbocsvwscripts.literalconverters import LiteralConverterDefinition
+
 _PARA_METADATA_SLOT_NAMES = {"metadataPublisherId", "metadataDescribedForActionId"}
 """
 The set of slot names which identify the slot as contributing to the para-metadata document (which ends up stored separately)
@@ -53,6 +57,14 @@ _UNIONED_IDENTIFIERS_SCHEMA_FILE_NAME = "unioned-identifiers.schema.json"
 """
 The schema file for the unioned identifiers table structure.
 """
+_LITERAL_CONVERTERS_FILE_NAME = "literal-converters.json"
+"""
+Declares the literal converters `listcolumnsasnodes` needs on top of its built-in ones.
+"""
+_FOREIGN_KEY_CHECKS_FILE_NAME = "foreign-key-checks.json"
+"""
+Declares every list column foreign key check, so that `listcolumnforeignkeycheck --spec` can run them all in one go.
+"""
 
 _SEPARATOR_CHAR: str = "|"
 _SCHEMA_ORG_PREFIX = "https://schema.org/"
@@ -148,6 +160,7 @@ def main(classes_yaml: click.Path, output_dir: click.Path):
     class_schema_map: Dict[str, Path] = {}
     map_class_name_to_csv_dependencies: Dict[str, Set[Path]] = {}
     class_manual_foreign_key_checks: Dict[str, List[ManualForeignKeyCheckConfig]] = {}
+    literal_converter_definitions: Dict[str, LiteralConverterDefinition] = {}
     for _, clazz in all_classes.items():
         slots_for_class = _get_slots_for_class(clazz, all_classes, all_slots)
         if any(slots_for_class) and not clazz.abstract:
@@ -163,10 +176,13 @@ def main(classes_yaml: click.Path, output_dir: click.Path):
                 class_schema_map,
                 class_manual_foreign_key_checks,
                 map_class_name_to_csv_dependencies,
+                literal_converter_definitions,
             )
 
     _generate_unioned_identifiers_schema(out_dir)
 
+    _generate_literal_converters_file(literal_converter_definitions, out_dir)
+
     _perform_transitive_dependency_closure(
         map_class_name_to_csv_dependencies, class_csv_map
     )
@@ -175,6 +191,8 @@ def main(classes_yaml: click.Path, output_dir: click.Path):
         class_csv_map, class_schema_map, out_dir, map_class_name_to_csv_dependencies
     )
 
+    _generate_foreign_key_checks_file(class_manual_foreign_key_checks, out_dir)
+
     with open(out_dir / "remote" / "foreign-keys.mk", "w+") as f:
         f.writelines(
             _generate_makefile_manual_foreign_key_checks(
@@ -279,96 +297,115 @@ def _generate_unioned_identifiers_schema(out_dir: Path):
         }
         f.writelines(json.dumps(unioned_identifiers_schema, indent=4))
 
-def _generate_makefile_manual_foreign_key_checks(
-    class_manual_foreign_key_checks: Dict[str, List[ManualForeignKeyCheckConfig]],
-    out_dir: Path,
-) -> str:
-    makefile_config = dedent(
-        f"""
-        MANUAL_FOREIGN_KEY_VALIDATION_LOGS_SHORT	:= {" ".join(sorted([_get_csv_name_for_class(class_name) for class_name in class_manual_foreign_key_checks]))}
-        MANUAL_FOREIGN_KEY_VALIDATION_LOGS			:= $(MANUAL_FOREIGN_KEY_VALIDATION_LOGS_SHORT:%.csv=out/validation/%-csv-list-column-foreign-key.success.log)
-        MANUAL_FOREIGN_KEY_VALIDATION_LOGS_ERRORS	:= $(MANUAL_FOREIGN_KEY_VALIDATION_LOGS_SHORT:%.csv=out/validation/%-csv-list-column-foreign-key.err.log)
-
-    """
-    )
 
-    for (
-        class_name,
-        manual_foreign_key_checks,
-    ) in sorted(class_manual_foreign_key_checks.items()):
-        csv_file_name = _get_csv_name_for_class(class_name)
-        success_log_file_name = (
-            csv_file_name.removesuffix(".csv") + "-csv-list-column-foreign-key.success.log"
-        )
-        error_log_file_name = (
-            csv_file_name.removesuffix(".csv") + "-csv-list-column-foreign-key.err.log"
+def _generate_literal_converters_file(
+    literal_converter_definitions: Dict[str, LiteralConverterDefinition],
+    out_dir: Path,
+):
+    with open(out_dir / _REMOTE_DIR_NAME / _LITERAL_CONVERTERS_FILE_NAME, "w+") as f:
+        f.write(
+            json.dumps(
+                [
+                    asdict(definition)
+                    for _, definition in sorted(literal_converter_definitions.items())
+                ],
+                indent=4,
+            )
+            + "\n"
         )
 
-        success_log_file_path = f"out/validation/{success_log_file_name}"
-        error_log_file_path = f"out/validation/{error_log_file_name}"
 
-        dependent_files = {
-            str(manual_fk_check.parent_table_path.relative_to(out_dir))
-            for manual_fk_check in manual_foreign_key_checks
-        }
-
-        makefile_config += f"{success_log_file_path}: {" ".join(dependent_files)} out/validation\n"
-        makefile_config += indent(f'@rm -f "{error_log_file_path}" "{success_log_file_path}"', "	")
-        makefile_config += indent(
-            "\n".join(
+def _generate_foreign_key_checks_file(
+    class_manual_foreign_key_checks: Dict[str, List[ManualForeignKeyCheckConfig]],
+    out_dir: Path,
+):
+    with open(out_dir / _REMOTE_DIR_NAME / _FOREIGN_KEY_CHECKS_FILE_NAME, "w+") as f:
+        f.write(
+            json.dumps(
                 [
-                    _get_makefile_config_for_foreign_key_check(manual_fk_check, out_dir, error_log_file_path)
+                    asdict(_get_list_column_foreign_key_check(manual_fk_check, out_dir))
+                    for _, manual_foreign_key_checks in sorted(
+                        class_manual_foreign_key_checks.items()
+                    )
                     for manual_fk_check in manual_foreign_key_checks
-                ]
-            ),
-            "	",
-        )
-        makefile_config += indent(
-            dedent(
-                f"""
-                @if [ -f "{error_log_file_path}" ]; then \\
-                   echo ""; \\
-                   printf '\033[0;31m'; # Red \\
-                   echo "Foreign Key errors detected:"; \\
-                   cat "{error_log_file_path}"; \\
-                   printf '\033[0m'; # Reset colour \\
-                 else \\
-                   touch "{success_log_file_path}"; \\
-                 fi
-                @echo ""
-            """
-            ),
-            "	",
+                ],
+                indent=4,
+            )
+            + "\n"
         )
 
-    return makefile_config
+
+def _get_list_column_foreign_key_check(
+    manual_foreign_key_check: ManualForeignKeyCheckConfig, out_dir: Path
+) -> ListColumnForeignKeyCheck:
+    return ListColumnForeignKeyCheck(
+        child_table_path=str(
+            manual_foreign_key_check.child_table_path.relative_to(out_dir)
+        ),
+        child_table_column=manual_foreign_key_check.child_table_column,
+        parent_table_path=str(
+            manual_foreign_key_check.parent_table_path.relative_to(out_dir)
+        ),
+        parent_table_column=manual_foreign_key_check.parent_table_column,
+        separator=manual_foreign_key_check.separator,
+    )
 
 
-def _get_makefile_config_for_foreign_key_check(
-    manual_foreign_key_check: ManualForeignKeyCheckConfig, out_dir: Path, err_log_file_path: str
+def _generate_makefile_manual_foreign_key_checks(
+    class_manual_foreign_key_checks: Dict[str, List[ManualForeignKeyCheckConfig]],
+    out_dir: Path,
 ) -> str:
-    child_table_path = manual_foreign_key_check.child_table_path.relative_to(out_dir)
-    parent_table_path = manual_foreign_key_check.parent_table_path.relative_to(out_dir)
+    """
+    All of the checks run in a single `listcolumnforeignkeycheck` process, which loads each CSV file only once. It
+    reports the cells holding any unexpected values in `out/validation/list-column-foreign-keys.report.json`.
+    """
+    foreign_key_checks_file_path = f"{_REMOTE_DIR_NAME}/{_FOREIGN_KEY_CHECKS_FILE_NAME}"
+    success_log_file_path = "out/validation/list-column-foreign-keys.success.log"
+    error_log_file_path = "out/validation/list-column-foreign-keys.err.log"
+    report_file_path = "out/validation/list-column-foreign-keys.report.json"
 
-    foreign_key_check_command = (
-        f'$(LIST_COLUMN_FOREIGN_KEY_CHECK) "{child_table_path}" "{manual_foreign_key_check.child_table_column}" '
-        f'"{parent_table_path}" "{manual_foreign_key_check.parent_table_column}"'
+    dependent_files = sorted(
+        {
+            str(table_path.relative_to(out_dir))
+            for manual_foreign_key_checks in class_manual_foreign_key_checks.values()
+            for manual_fk_check in manual_foreign_key_checks
+            for table_path in [manual_fk_check.child_table_path, manual_fk_check.parent_table_path]
+        }
     )
 
-    if manual_foreign_key_check.separator is not None:
-        foreign_key_check_command += (
-            f' --separator "{manual_foreign_key_check.separator}"'
-        )
+    makefile_config = dedent(
+        f"""
+        MANUAL_FOREIGN_KEY_CHECKS_SPEC				:= {foreign_key_checks_file_path}
+        MANUAL_FOREIGN_KEY_VALIDATION_LOGS			:= {success_log_file_path}
+        MANUAL_FOREIGN_KEY_VALIDATION_LOGS_ERRORS	:= {error_log_file_path}
 
-    foreign_key_check_command = f'@RES=$$({foreign_key_check_command}) && echo "$$RES" || echo "$$RES" >> "{err_log_file_path}"'
+    """
+    )
 
-    return dedent(
-        f"""
-            @echo "=============================== Validating values in {child_table_path}['{manual_foreign_key_check.child_table_column}'] ==============================="
-            {foreign_key_check_command}
+    makefile_config += f"{success_log_file_path}: $(MANUAL_FOREIGN_KEY_CHECKS_SPEC) {" ".join(dependent_files)} out/validation\n"
+    makefile_config += indent(
+        dedent(
+            f"""
+            @rm -f "{error_log_file_path}" "{success_log_file_path}" "{report_file_path}"
+            @echo "=============================== Validating values in list columns ==============================="
+            @RES=$$($(LIST_COLUMN_FOREIGN_KEY_CHECK) --spec "$(MANUAL_FOREIGN_KEY_CHECKS_SPEC)" --report "{report_file_path}") && echo "$$RES" || echo "$$RES" >> "{error_log_file_path}"
+            @if [ -f "{error_log_file_path}" ]; then \\
+               echo ""; \\
+               printf '\033[0;31m'; # Red \\
+               echo "Foreign Key errors detected:"; \\
+               cat "{error_log_file_path}"; \\
+               printf '\033[0m'; # Reset colour \\
+             else \\
+               touch "{success_log_file_path}"; \\
+             fi
+            @echo ""
         """
+        ).lstrip("\n"),
+        "	",
     )
 
+    return makefile_config
+
 
 def _generate_csv_metadata_documents(
     class_csv_map: Dict[str, Path],
@@ -449,6 +486,7 @@ def _generate_csv_and_schema_for_class(
     class_schema_map: Dict[str, Path],
     class_manual_foreign_key_checks: Dict[str, List[ManualForeignKeyCheckConfig]],
     map_class_name_to_csv_dependencies: Dict[str, Set[Path]],
+    literal_converter_definitions: Dict[str, LiteralConverterDefinition],
 ) -> None:
     # Create Basic CSV in the data directory
     namespaces = schema_view.namespaces()
@@ -486,6 +524,7 @@ def _generate_csv_and_schema_for_class(
             manual_build_foreign_key_checks,
             output_dir,
             csv_dependencies_for_class,
+            literal_converter_definitions,
         )
         for slot in slots_for_class
     ]
@@ -649,6 +688,7 @@ def _get_column_definition_for_slot(
     manual_build_foreign_key_checks: List[ManualForeignKeyCheckConfig],
     output_dir: Path,
     csv_dependencies_for_class: Set[Path],
+    literal_converter_definitions: Dict[str, LiteralConverterDefinition],
 ) -> Dict[str, Any]:
     slot_column_title = _get_csv_col_title_for_slot(slot)
 
@@ -733,24 +773,50 @@ def _get_column_definition_for_slot(
 
         if slot.multivalued:
             column_definition["separator"] = _SEPARATOR_CHAR
-            if slot.range == "uri":
-                data_type = {"@id": f"{_MBO_PREFIX}ConvertIriToNode", "base": "string"}
-
-        if slot.implicit_prefix:
-            if slot.multivalued:
-                raise Exception(
-                    f"Unable to currently support implicit_prefix on multivalued slot."
-                )
-            else:
-                raise Exception(
-                    f"Unexpected/unhandled implicit_prefix value '{slot.implicit_prefix}'."
+            if slot.implicit_prefix:
+                # CSV-W can't apply a `valueUrl` to each value in a list, so `listcolumnsasnodes` does it for us.
+                # Any format, minimum or maximum facets still apply to each value.
+                data_type["@id"] = _declare_implicit_prefix_literal_converter(
+                    slot, namespaces, literal_converter_definitions
                 )
+                data_type["base"] = "string"
+            elif slot.range == "uri":
+                data_type = {"@id": f"{_MBO_PREFIX}ConvertIriToNode", "base": "string"}
+        elif slot.implicit_prefix:
+            raise Exception(
+                f"Unexpected/unhandled implicit_prefix value '{slot.implicit_prefix}'."
+            )
 
         column_definition["datatype"] = data_type
 
     return column_definition
 
 
+def _declare_implicit_prefix_literal_converter(
+    slot: SlotDefinition,
+    namespaces: Namespaces,
+    literal_converter_definitions: Dict[str, LiteralConverterDefinition],
+) -> str:
+    """
+    Declares a literal converter which expands each of the slot's values into an IRI using its `implicit_prefix`.
+
+    Returns the converter's datatype URI.
+    """
+    if not slot.implicit_prefix in namespaces:
+        raise Exception(
+            f"Unable to find prefix definition for implicit_prefix '{slot.implicit_prefix}'."
+        )
+
+    # e.g. `ConvertMboIdToNode` for the `mbo` prefix. linkml's prefixes are case-insensitive, so the name is too;
+    # prefixes which only differ in case share a namespace and hence a converter.
+    data_type_uri = f"{_MBO_PREFIX}Convert{slot.implicit_prefix.capitalize()}IdToNode"
+    literal_converter_definitions[data_type_uri] = LiteralConverterDefinition(
+        data_type_uri=data_type_uri, prefix=str(namespaces.get(slot.implicit_prefix))
+    )
+
+    return data_type_uri
+
+
 def _map_linkml_built_in_data_type_to_csvw(linkml_built_in_data_type: str) -> str:
 
     raise Exception(
@@ -0,0 +1,169 @@
+"""
+keyindexcache
+-------------
+
+An optional on-disk cache of the values (keys) held in a column of a CSV file, e.g. the MBO identifiers in a parent
+table. The foreign key checks and `unionuniqueidentifiers` can load a column's keys from the cache instead of parsing
+the whole CSV file again when it hasn't changed since the previous build.
+
+Each (CSV file, column) pair has its own directory in the cache, keyed on the index format version too, holding a
+single index stored under the SHA-256 hash of the bytes of the CSV file it was built from. An index is every non-empty
+value in the column in sorted order, UTF-8 encoded and separated by NUL characters. Values which appear more than once
+are kept, so that `unionuniqueidentifiers` can still spot identifiers repeated within a file, and the index can be
+streamed back a value at a time. Each directory also records the format version and the CSV file it
+indexes, so that directories for CSV files which have since been renamed or deleted, or built by another version of
+this module, can be evicted. Writing a new index for a (CSV file, column) evicts the stale index for the file's
+previous content along with any such directories, so the cache doesn't grow as the data changes.
+"""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Callable, Iterable, Iterator, Optional, Set
+
+_KEY_SEPARATOR: bytes = b"\0"
+_INDEX_FILE_SUFFIX: str = ".keys"
+_INDEX_FORMAT_VERSION: str = "2"
+"""
+Bump this whenever the layout or encoding of the cache changes, so that indexes written in an old format aren't read.
+"""
+_SOURCE_FILE_NAME: str = "source"
+_READ_BLOCK_SIZE: int = 1024 * 1024
+
+
+def get_column_keys(
+    cache_dir: Optional[Path],
+    csv_file: Path,
+    column_title: str,
+    read_column_values: Callable[[], Iterable[str]],
+) -> Set[str]:
+    """
+    Returns the distinct keys in the CSV file's column, from the cache if they're there. Otherwise the column's
+    (non-empty) values are read with `read_column_values` and cached for next time.
+
+    Without a `cache_dir`, this just calls `read_column_values`.
+    """
+    if cache_dir is None:
+        return set(read_column_values())
+
+    return set(
+        iter_sorted_column_values(
+            cache_dir, csv_file, column_title, lambda: sorted(read_column_values())
+        )
+    )
+
+
+def iter_sorted_column_values(
+    cache_dir: Optional[Path],
+    csv_file: Path,
+    column_title: str,
+    iter_sorted_values: Callable[[], Iterable[str]],
+) -> Iterator[str]:
+    """
+    Yields every (non-empty) value in the CSV file's column in sorted order, repeats included, streaming them from the
+    cache if they're there. Otherwise they're read from `iter_sorted_values`, which must yield them in sorted order, and
+    cached for next time.
+
+    The values are streamed in and out of the cache, so they're never all held in memory at once. Without a
+    `cache_dir`, this just yields from `iter_sorted_values`.
+    """
+    if cache_dir is None:
+        yield from iter_sorted_values()
+        return
+
+    index_dir = _get_index_dir(cache_dir, csv_file, column_title)
+    index_file = index_dir / f"{_get_file_hash(csv_file)}{_INDEX_FILE_SUFFIX}"
+    if not index_file.exists():
+        _write_key_index(index_file, iter_sorted_values())
+        _write_index_source(index_dir, csv_file)
+        _evict_orphaned_index_dirs(cache_dir)
+
+    yield from _iter_key_index(index_file)
+
+
+def _get_content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _get_file_hash(file_path: Path) -> str:
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _get_index_dir(cache_dir: Path, csv_file: Path, column_title: str) -> Path:
+    return cache_dir / _get_content_hash(
+        f"{_INDEX_FORMAT_VERSION}\0{csv_file.resolve()}\0{column_title}".encode("utf-8")
+    )
+
+
+def _iter_key_index(index_file: Path) -> Iterator[str]:
+    """
+    Reads the index a block at a time. UTF-8 never encodes a character other than NUL with a zero byte, so it's safe to
+    split the raw bytes on the separator.
+    """
+    with open(index_file, "rb") as f:
+        remainder = b""
+        for block in iter(lambda: f.read(_READ_BLOCK_SIZE), b""):
+            *keys, remainder = (remainder + block).split(_KEY_SEPARATOR)
+            for key in keys:
+                yield key.decode("utf-8")
+
+        # An empty index holds no keys, rather than a single empty one.
+        if remainder:
+            yield remainder.decode("utf-8")
+
+
+def _write_key_index(index_file: Path, sorted_keys: Iterable[str]) -> None:
+    index_dir = index_file.parent
+    index_dir.mkdir(parents=True, exist_ok=True)
+    # Several processes may write to the cache at once, so indexes only appear once they're complete.
+    with NamedTemporaryFile(
+        "wb", dir=index_dir, prefix=".", suffix=".tmp", delete=False
+    ) as tmp_file:
+        try:
+            for i, key in enumerate(sorted_keys):
+                if i > 0:
+                    tmp_file.write(_KEY_SEPARATOR)
+                tmp_file.write(key.encode("utf-8"))
+        except BaseException:
+            os.unlink(tmp_file.name)
+            raise
+    os.replace(tmp_file.name, index_file)
+
+    for stale_index_file in index_dir.glob(f"*{_INDEX_FILE_SUFFIX}"):
+        if stale_index_file != index_file:
+            stale_index_file.unlink(missing_ok=True)
+
+
+def _write_index_source(index_dir: Path, csv_file: Path) -> None:
+    """
+    Records which format version and CSV file the index directory belongs to.
+    """
+    source_file = index_dir / _SOURCE_FILE_NAME
+    source = f"{_INDEX_FORMAT_VERSION}\n{csv_file.resolve()}"
+    if source_file.exists() and source_file.read_text("utf-8") == source:
+        return
+
+    with NamedTemporaryFile(
+        "w", encoding="utf-8", dir=index_dir, prefix=".", suffix=".tmp", delete=False
+    ) as tmp_file:
+        tmp_file.write(source)
+    os.replace(tmp_file.name, source_file)
+
+
+def _evict_orphaned_index_dirs(cache_dir: Path) -> None:
+    """
+    Removes the index directories of CSV files which no longer exist, or which were written in another format.
+
+    Directories without a source file yet may still be being written by another process, so they're left alone.
+    """
+    for source_file in cache_dir.glob(f"*/{_SOURCE_FILE_NAME}"):
+        try:
+            version, csv_file_path = source_file.read_text("utf-8").split("\n", 1)
+        except (OSError, ValueError):
+            version, csv_file_path = None, None
+
+        if version != _INDEX_FORMAT_VERSION or not Path(csv_file_path).exists():
+            shutil.rmtree(source_file.parent, ignore_errors=True)
@@ -3,112 +3,267 @@ listcolumnforeignkeycheck
 -------------------------
 
 Enforces foreign key constraints on the literal values inside list columns.
+
+Optionally writes a JSON report locating every cell holding an unexpected value, so that each one can be highlighted
+in the spreadsheet it came from.
 """
 
+import json
 import sys
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Set, Any
+from typing import Dict, List, Optional, Set, Any, Tuple
 
 import click
 import pandas as pd
 
+from mbocsvwscripts.csvdataframes import read_csv_columns, split_list_column
+from mbocsvwscripts.foreignkeychecks import ListColumnForeignKeyCheck
+from mbocsvwscripts.keyindexcache import get_column_keys
+
+_DEFAULT_SEPARATOR: str = "|"
+
+
+@dataclass
+class CellLocation:
+    """
+    A cell in a CSV file. Rows are numbered as in a spreadsheet, so the header is row 1 and the first data row is row 2.
+    """
+
+    row: int
+    column: str
+
 
 @click.command()
 @click.argument(
     "csv_child_table",
     type=click.Path(exists=True),
+    required=False,
 )
 @click.argument(
     "list_column_title_in_child_table",
     type=str,
+    required=False,
 )
 @click.argument(
     "csv_parent_table",
     type=click.Path(exists=True),
+    required=False,
 )
 @click.argument(
     "column_title_in_parent_table",
     type=str,
+    required=False,
 )
 @click.option(
     "--separator",
     "-s",
     type=str,
-    default="|",
+    default=_DEFAULT_SEPARATOR,
     show_default=True,
     help="The character separating values in LIST_COLUMN_TITLE_IN_CHILD_TABLE",
 )
+@click.option(
+    "--spec",
+    type=click.Path(exists=True, dir_okay=False),
+    required=False,
+    help="Run every check in this JSON spec, as generated by `generatecsvwdefinitions`, instead of a single check. "
+    "Each CSV file is only loaded once.",
+)
+@click.option(
+    "--key-index-cache-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Cache the values in each parent table column in this directory, so unchanged parent tables aren't parsed "
+    "again.",
+)
+@click.option(
+    "--report",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write a JSON report of the cells each unexpected value was found in to this file.",
+)
 def main(
-    csv_child_table: click.Path,
-    list_column_title_in_child_table: str,
-    csv_parent_table: click.Path,
-    column_title_in_parent_table: str,
+    csv_child_table: Optional[click.Path],
+    list_column_title_in_child_table: Optional[str],
+    csv_parent_table: Optional[click.Path],
+    column_title_in_parent_table: Optional[str],
     separator: str,
+    spec: Optional[click.Path],
+    key_index_cache_dir: Optional[click.Path],
+    report: Optional[click.Path],
 ) -> None:
     """
     Validates the values of the `LIST_COLUMN_TITLE_IN_CHILD_TABLE` inside `CSV_CHILD_TABLE` against the authoritative
     values defined in `COLUMN_TITLE_IN_PARENT_TABLE` in `CSV_PARENT_TABLE`.
     """
-    invalid_values = _get_invalid_list_column_values(
-        Path(str(csv_child_table)),
+    arguments = [
+        csv_child_table,
         list_column_title_in_child_table,
-        Path(str(csv_parent_table)),
+        csv_parent_table,
         column_title_in_parent_table,
-        separator,
-    )
+    ]
+    if spec is not None:
+        if any(a is not None for a in arguments):
+            raise click.UsageError("--spec cannot be used with CSV_CHILD_TABLE etc.")
 
-    if any(invalid_values):
-        print(
-            f"Unexpected values found in {csv_child_table}['{list_column_title_in_child_table}'] but not in "
-            f"{csv_parent_table}['{column_title_in_parent_table}']:\n{"\n".join([f"'{v}'" for v in invalid_values])}"
-        )
-        sys.exit(1)
+        checks = _read_list_column_foreign_key_checks(Path(str(spec)))
+    elif all(a is not None for a in arguments):
+        checks = [
+            ListColumnForeignKeyCheck(
+                str(csv_child_table),
+                str(list_column_title_in_child_table),
+                str(csv_parent_table),
+                str(column_title_in_parent_table),
+                separator,
+            )
+        ]
     else:
+        raise click.UsageError(
+            "Either pass CSV_CHILD_TABLE, LIST_COLUMN_TITLE_IN_CHILD_TABLE, CSV_PARENT_TABLE and "
+            "COLUMN_TITLE_IN_PARENT_TABLE, or --spec."
+        )
+
+    results = _check_list_column_foreign_keys(
+        checks,
+        None if key_index_cache_dir is None else Path(str(key_index_cache_dir)),
+    )
+
+    num_checks_failed = 0
+    for check, invalid_values in results:
+        if any(invalid_values):
+            num_checks_failed += 1
+            print(
+                f"Unexpected values found in {check.child_table_path}['{check.child_table_column}'] but not in "
+                f"{check.parent_table_path}['{check.parent_table_column}']:\n{"\n".join([f"'{v}'" for v in sorted(invalid_values)])}"
+            )
+        else:
+            print(
+                f"All values found in {check.child_table_path}['{check.child_table_column}'] appear to be valid."
+            )
+
+    if spec is not None:
         print(
-            f"All values found in {csv_child_table}['{list_column_title_in_child_table}'] appear to be valid."
+            f"Checked {len(checks)} list column(s): {num_checks_failed} with unexpected values."
         )
-        sys.exit(0)
 
+    if report is not None:
+        _write_report(Path(str(report)), results)
 
-def _get_invalid_list_column_values(
-    csv_child_table: Path,
-    list_column_title_in_child_table: str,
-    csv_parent_table: Path,
-    column_title_in_parent_table: str,
-    separator: str,
-) -> Set[Any]:
+    sys.exit(1 if num_checks_failed > 0 else 0)
+
+
+def _check_list_column_foreign_keys(
+    checks: List[ListColumnForeignKeyCheck],
+    key_index_cache_dir: Optional[Path] = None,
+) -> List[Tuple[ListColumnForeignKeyCheck, Dict[str, List[CellLocation]]]]:
     """
-    Returns missing values.
+    Returns the missing values for each check, along with the cells each one was found in.
+
+    Each CSV file is read once, loading only the columns which the checks use, and each parent column's set of values
+    is built once, however many checks use them. With a `key_index_cache_dir`, a parent column's values are loaded
+    from the cache, and the parent table is only read when it has changed.
     """
-    unique_child_values = _get_unique_child_table_values(
-        csv_child_table, list_column_title_in_child_table, separator
-    )
-    unique_parent_values = _get_unique_parent_values(
-        column_title_in_parent_table, csv_parent_table
-    )
+    table_column_titles: Dict[str, List[str]] = {}
+    for check in checks:
+        table_column_titles.setdefault(check.child_table_path, []).append(
+            check.child_table_column
+        )
+        table_column_titles.setdefault(check.parent_table_path, []).append(
+            check.parent_table_column
+        )
+
+    tables: Dict[str, pd.DataFrame] = {}
+    parent_values: Dict[Tuple[str, str], Set[Any]] = {}
 
-    return unique_child_values - unique_parent_values
+    def _get_table(csv_table_path: str) -> pd.DataFrame:
+        table = tables.get(csv_table_path)
+        if table is None:
+            table = tables[csv_table_path] = read_csv_columns(
+                Path(csv_table_path), table_column_titles[csv_table_path]
+            )
+        return table
 
+    results = []
+    for check in checks:
+        parent_key = (check.parent_table_path, check.parent_table_column)
+        unique_parent_values = parent_values.get(parent_key)
+        if unique_parent_values is None:
+            unique_parent_values = parent_values[parent_key] = get_column_keys(
+                key_index_cache_dir,
+                Path(check.parent_table_path),
+                check.parent_table_column,
+                lambda: _get_table(check.parent_table_path)[
+                    check.parent_table_column
+                ].dropna(),
+            )
+
+        child_values = split_list_column(
+            _get_table(check.child_table_path)[check.child_table_column],
+            check.separator or _DEFAULT_SEPARATOR,
+        )
+        invalid_values = set(child_values.unique()) - unique_parent_values
+        results.append(
+            (
+                check,
+                _get_invalid_value_locations(
+                    child_values, invalid_values, check.child_table_column
+                ),
+            )
+        )
 
-def _get_unique_parent_values(column_title_in_parent_table, csv_parent_table):
-    parent_table = pd.read_csv(csv_parent_table)
-    parent_table_column = parent_table[column_title_in_parent_table]
-    non_null_parent_values: pd.Series = parent_table_column[~parent_table_column.isnull()]  # type: ignore
-    unique_parent_values = {str(value) for (_, value) in non_null_parent_values.items()}
-    return unique_parent_values
+    return results
 
 
-def _get_unique_child_table_values(
-    csv_child_table: Path, list_column_title_in_child_table: str, separator: str
-) -> Set[Any]:
-    child_table = pd.read_csv(csv_child_table)
-    child_table_column = child_table[list_column_title_in_child_table]
-    non_null_child_values: pd.Series = child_table_column[~child_table_column.isnull()]  # type: ignore
-    return {
-        individual_value
-        for (_, cell_value) in non_null_child_values.items()
-        for individual_value in str.split(str(cell_value), separator)
+def _get_invalid_value_locations(
+    child_values: pd.Series, invalid_values: Set[str], column_title: str
+) -> Dict[str, List[CellLocation]]:
+    """
+    Builds an index of the cells each invalid value appears in, from the split list column's row index.
+    """
+    invalid_value_locations: Dict[str, List[CellLocation]] = {
+        value: [] for value in sorted(invalid_values)
     }
+    if any(invalid_values):
+        for row_index, value in child_values[
+            child_values.isin(list(invalid_values))
+        ].items():
+            invalid_value_locations[value].append(
+                # The header is row 1 and data frames count from 0.
+                CellLocation(int(row_index) + 2, column_title)  # type: ignore
+            )
+
+    return invalid_value_locations
+
+
+def _write_report(
+    report_file: Path,
+    results: List[Tuple[ListColumnForeignKeyCheck, Dict[str, List[CellLocation]]]],
+) -> None:
+    """
+    Lists each check which found unexpected values, mapping each value to the cells it appears in.
+    """
+    report = [
+        {
+            **asdict(check),
+            "invalid_values": {
+                value: [asdict(location) for location in locations]
+                for value, locations in invalid_value_locations.items()
+            },
+        }
+        for check, invalid_value_locations in results
+        if any(invalid_value_locations)
+    ]
+    report_file.write_text(json.dumps(report, indent=4))
+
+
+def _read_list_column_foreign_key_checks(
+    spec_file: Path,
+) -> List[ListColumnForeignKeyCheck]:
+    return [
+        ListColumnForeignKeyCheck(**check)
+        for check in json.loads(spec_file.read_text())
+    ]
 
 
 if __name__ == "__main__":
@@ -4,86 +4,261 @@ listcolumnsasnodes
 
 Converts literals of type <https://w3id.org/marco-bolo/ConvertMboIdToNode> and <https://w3id.org/marco-bolo/ConvertIriToNode> into references to nodes in the graph.
 
+Further conversions (e.g. for multivalued slots with an `implicit_prefix`) are declared by `generatecsvwdefinitions` in a
+literal converters JSON file. Every conversion is applied in the same single pass over the triples.
+
 This makes up for a limitation in the CSV on the web standard, see <https://lists.w3.org/Archives/Public/public-csvw/2016Aug/0001.html>.
 """
 
+import json
+import mmap
+import os
+import re
+import shutil
 from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Callable, Dict, Iterable, List, Optional, TextIO
 
 import click
-import rdflib
+from rdflib.term import Literal, URIRef
+from rdflib.util import guess_format
+
+from mbocsvwscripts.literalconverters import LiteralConverterDefinition
+from mbocsvwscripts.ntriples import Triple, get_n_triples_line, stream_triples_into
+from mbocsvwscripts.processparametadata import MBO
+
+CONVERT_MBO_ID_TO_NODE_DATA_TYPE_URI: URIRef = MBO.ConvertMboIdToNode
+"""
+Literals of this type hold an MBO identifier which should become a reference to the full MBO PID.
+"""
+CONVERT_IRI_TO_NODE_DATA_TYPE_URI: URIRef = MBO.ConvertIriToNode
+"""
+Literals of this type hold an IRI which should become a reference to that IRI.
+"""
+
+LiteralConverter = Callable[[Literal], URIRef]
+"""
+Converts a literal into a reference to a node.
+"""
 
 
 @click.command()
+@click.option(
+    "-o",
+    "--out",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write the converted triples to this N-Triples file instead of back over TTL_FILE.",
+)
+@click.option(
+    "-c",
+    "--converters",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="A JSON file declaring further literal converters, as generated by `generatecsvwdefinitions`.",
+)
 @click.argument("ttl_file", type=click.Path(exists=True))
-def main(ttl_file: click.Path):
+def main(
+    out: Optional[click.Path], converters: Optional[click.Path], ttl_file: click.Path
+):
+    """
+    Loads the TTL_FILE (or N-Triples file) and transforms all literals of type
+        <https://w3id.org/marco-bolo/ConvertMboIdToNode> and <https://w3id.org/marco-bolo/ConvertIriToNode> (and any
+        further declared types) into references to nodes in the graph.
     """
-    Loads the TTL_FILE and transforms all literals of type <https://w3id.org/marco-bolo/ConvertMboIdToNode> and
-        <https://w3id.org/marco-bolo/ConvertIriToNode> into references to nodes in the graph.
+    _convert_literals_to_nodes_in_file(
+        Path(str(ttl_file)),
+        None if out is None else Path(str(out)),
+        _get_literal_converters(
+            []
+            if converters is None
+            else _read_literal_converter_definitions(Path(str(converters)))
+        ),
+    )
+
+
+def _convert_literals_to_nodes_in_file(
+    ttl_file: Path,
+    out_file: Optional[Path] = None,
+    converters: Optional[Dict[URIRef, LiteralConverter]] = None,
+) -> int:
     """
-    _convert_literals_to_nodes_in_file(Path(str(ttl_file)))
+    Streams the triples straight from the parser through the conversion and back out to disk, one statement at a
+    time, without building a graph. Each literal whose datatype is in `converters` (by default the built-in
+    `LITERAL_CONVERTERS`) is converted by the matching function.
+
+    The triples are written in N-Triples form (which is also valid Turtle) to `out_file`. Without an `out_file`, the
+    `ttl_file` is only replaced if something was converted, and it isn't parsed at all if a quick scan shows it can't
+    contain anything to convert. An N-Triples file with nothing to convert is copied to the `out_file` as it is. A
+    Turtle file has to be parsed to write it to the `out_file` as N-Triples, so it isn't scanned first.
 
+    Triples are passed through one at a time, so any repeated in the `ttl_file` are repeated in the output too.
+    Everything which reads the bulk files loads them into a graph (or de-duplicates them as they're partitioned), so
+    there's no need to hold every triple in memory here to weed them out.
 
-def _convert_literals_to_nodes_in_file(ttl_file: Path) -> None:
+    The output is written to a temporary file which is renamed over `out_file` once it's safely on disk, so a crash
+    can never leave a half-written bulk file behind. A file which is left alone keeps its modification time, and one
+    which is replaced gets a new one, which keeps make's view of what's up to date correct.
+
+    Returns the number of literals converted.
+    """
     ttl_file = ttl_file.resolve()
+    out_file = ttl_file if out_file is None else out_file.resolve()
+    if converters is None:
+        converters = LITERAL_CONVERTERS
+
+    if out_file == ttl_file or guess_format(str(ttl_file)) == "nt":
+        needs_converting = _may_contain_literals_to_convert(ttl_file, converters.keys())
+        if not needs_converting and out_file == ttl_file:
+            return 0
+    else:
+        # Scanning would save nothing, the Turtle has to be parsed to write it out as N-Triples.
+        needs_converting = True
 
-    graph = rdflib.Graph()
-    graph = graph.parse(ttl_file, format="ttl")
-
-    num_to_be_converted = _get_number_to_be_converted_in_graph(graph)
-
-    if num_to_be_converted > 0:
-        graph = _update_literals_to_nodes_in_graph_assert_success(graph)
-        graph.serialize(ttl_file, format="ttl")
-
-
-def _update_literals_to_nodes_in_graph_assert_success(
-    graph: rdflib.Graph,
-) -> rdflib.Graph:
-    graph.update(
-        """
-        DELETE {
-            ?s ?p ?nodePID.
-        }
-        INSERT {
-            ?s ?p ?uriNode.
-        }
-        WHERE {
-            {
-                # Map literals of type <https://w3id.org/marco-bolo/ConvertMboIdToNode> into full MBO PIDs pointing at resources.
-                ?s ?p ?nodePID.
-                FILTER(datatype(?nodePID) = <https://w3id.org/marco-bolo/ConvertMboIdToNode>).
-                BIND (URI( CONCAT("https://w3id.org/marco-bolo/", STR(?nodePID))) as ?uriNode).
-            } UNION {
-                # Map literals of type <https://w3id.org/marco-bolo/ConvertIriToNode> into IRIs pointing at resources.
-                ?s ?p ?nodePID.
-                FILTER(datatype(?nodePID) = <https://w3id.org/marco-bolo/ConvertIriToNode>).
-                BIND(URI(STR(?nodePID)) as ?uriNode).
-            }
-        }
+    num_converted = 0
+    with NamedTemporaryFile(
+        "w",
+        encoding="utf-8",
+        dir=out_file.parent,
+        prefix=f".{out_file.name}.",
+        suffix=".tmp",
+        delete=False,
+    ) as tmp_file:
+        try:
+            if needs_converting:
+                converter = _LiteralToNodeConverter(tmp_file, converters)
+                stream_triples_into(ttl_file, converter)
+                num_converted = converter.num_converted
+            else:
+                # It's already N-Triples and there's nothing to convert.
+                with open(ttl_file, "r", encoding="utf-8") as f:
+                    shutil.copyfileobj(f, tmp_file)
+
+            # The content must be on disk before the rename, or a crash could leave an empty file in its place.
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        except BaseException:
+            os.unlink(tmp_file.name)
+            raise
+
+    if num_converted > 0 or out_file != ttl_file:
+        shutil.copymode(ttl_file, tmp_file.name)
+        os.replace(tmp_file.name, out_file)
+    else:
+        os.unlink(tmp_file.name)
+
+    return num_converted
+
+
+def _may_contain_literals_to_convert(
+    rdf_file: Path, data_type_uris: Iterable[URIRef]
+) -> bool:
     """
-    )
+    Scans the file's bytes for the local names of the datatypes, which appear whether they're written as full IRIs
+    or as prefixed names. This is much cheaper than parsing the RDF. A false positive (e.g. a literal which happens
+    to mention one of the names) only means that the file gets parsed unnecessarily.
+    """
+    if rdf_file.stat().st_size == 0:
+        return False
+
+    local_names = [
+        _LOCAL_NAME.search(data_type_uri).group().encode("utf-8")  # type: ignore
+        for data_type_uri in data_type_uris
+    ]
+    if not all(local_names):
+        # We've got nothing to look for.
+        return True
+
+    with open(rdf_file, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as contents:
+        return any(contents.find(local_name) != -1 for local_name in local_names)
+
+
+class _LiteralToNodeConverter:
+    """
+    A parser sink which writes each triple back out as N-Triples, converting the objects which are literals with one
+    of the `converters`' datatypes into node references on the way.
+    """
+
+    def __init__(self, out: TextIO, converters: Dict[URIRef, LiteralConverter]):
+        self.num_converted = 0
+        self._out = out
+        self._converters = converters
+
+    def add(self, triple: Triple) -> None:
+        (s, p, o) = triple
+        if isinstance(o, Literal) and o.datatype is not None:
+            convert = self._converters.get(o.datatype)
+            if convert is not None:
+                o = convert(o)
+                self.num_converted += 1
+
+        self._out.write(get_n_triples_line((s, p, o)))
+
+
+def _get_prefix_converter(prefix: str) -> LiteralConverter:
+    def _convert_literal_to_node(literal: Literal) -> URIRef:
+        iri = f"{prefix}{literal}"
+        if _INVALID_IRI_CHARACTER.search(iri) is not None:
+            raise Exception(f"Unable to convert '{literal}' into a valid IRI.")
 
-    num_remaining = _get_number_to_be_converted_in_graph(graph)
-    if num_remaining != 0:
-        raise Exception(f"Failed to convert {num_remaining}literals.")
+        return URIRef(iri)
 
-    return graph
+    return _convert_literal_to_node
 
 
-def _get_number_to_be_converted_in_graph(graph: rdflib.Graph) -> int:
-    results = list(
-        graph.query(
-            """
-        SELECT *
-        WHERE {
-            ?s ?p ?mboNodePID.
-            FILTER(datatype(?mboNodePID) IN (<https://w3id.org/marco-bolo/ConvertMboIdToNode>, <https://w3id.org/marco-bolo/ConvertIriToNode>)).
-        }
-        """
+_BUILT_IN_LITERAL_CONVERTER_DEFINITIONS: List[LiteralConverterDefinition] = [
+    # Map the MBO identifier into a full MBO PID pointing at the resource.
+    LiteralConverterDefinition(str(CONVERT_MBO_ID_TO_NODE_DATA_TYPE_URI), str(MBO)),
+    LiteralConverterDefinition(str(CONVERT_IRI_TO_NODE_DATA_TYPE_URI), ""),
+]
+LITERAL_CONVERTERS: Dict[URIRef, LiteralConverter] = {
+    URIRef(definition.data_type_uri): _get_prefix_converter(definition.prefix)
+    for definition in _BUILT_IN_LITERAL_CONVERTER_DEFINITIONS
+}
+"""
+The built-in converter for each datatype.
+"""
+_LOCAL_NAME = re.compile(r"[^/#:]*$")
+_INVALID_IRI_CHARACTER = re.compile(r'[<>" {}|\\^`]')
+"""
+The characters which can't appear in an IRI written in N-Triples (or Turtle).
+"""
+
+
+def _get_literal_converters(
+    definitions: Iterable[LiteralConverterDefinition],
+) -> Dict[URIRef, LiteralConverter]:
+    """
+    Adds a converter for each of the declared `definitions` to the built-in `LITERAL_CONVERTERS`.
+    """
+    built_in_prefixes = {
+        definition.data_type_uri: definition.prefix
+        for definition in _BUILT_IN_LITERAL_CONVERTER_DEFINITIONS
+    }
+    converters = dict(LITERAL_CONVERTERS)
+    for definition in definitions:
+        built_in_prefix = built_in_prefixes.get(definition.data_type_uri)
+        if built_in_prefix is not None and built_in_prefix != definition.prefix:
+            raise Exception(
+                f"Unable to redefine the built-in literal converter for <{definition.data_type_uri}>."
+            )
+
+        converters[URIRef(definition.data_type_uri)] = _get_prefix_converter(
+            definition.prefix
         )
-    )
 
-    return len(results)
+    return converters
+
+
+def _read_literal_converter_definitions(
+    converters_file: Path,
+) -> List[LiteralConverterDefinition]:
+    return [
+        LiteralConverterDefinition(**definition)
+        for definition in json.loads(converters_file.read_text())
+    ]
 
 
 if __name__ == "__main__":
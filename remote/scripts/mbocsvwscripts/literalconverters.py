@@ -0,0 +1,21 @@
+"""
+literalconverters
+-----------------
+
+The declarations of the literal converters which `listcolumnsasnodes` applies on top of its built-in ones.
+
+`generatecsvwdefinitions` writes them out to a literal converters JSON file, so they live here rather than in
+`listcolumnsasnodes` to save the generator from importing the conversion tool itself.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class LiteralConverterDefinition:
+    """
+    Declares that literals of type `data_type_uri` should become references to the node `<prefix><literal value>`.
+    """
+
+    data_type_uri: str
+    prefix: str
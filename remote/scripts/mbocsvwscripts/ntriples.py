@@ -0,0 +1,203 @@
+"""
+ntriples
+--------
+
+A fast, line-oriented N-Triples parser shared by the tools which read the bulk RDF files, along with the means to
+stream the triples in a bulk N-Triples (or Turtle) file one at a time and to write them back out as N-Triples.
+
+rdflib's N-Triples parser consumes each line one token at a time. Since csv2rdf's output only contains a handful of
+line shapes, we match each whole line with a single regular expression instead and only fall back to rdflib's parser
+for lines it doesn't recognise (which then raises a helpful error if the line really is invalid).
+"""
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Protocol, Tuple
+
+from rdflib.plugins.parsers.notation3 import SinkParser, RDFSink
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser, unquote
+from rdflib.term import BNode, Literal, Node, URIRef
+from rdflib.util import guess_format
+
+Triple = Tuple[Node, Node, Node]
+
+
+class TripleSink(Protocol):
+    """
+    Receives triples one at a time as they are parsed from a bulk RDF file.
+    """
+
+    def add(self, triple: Triple) -> None: ...
+
+
+_IRI = r"<([^\s\"<>]*)>"
+_BLANK_NODE = r"_:([A-Za-z0-9_:](?:[-A-Za-z0-9_:.]*[-A-Za-z0-9_:])?)"
+_LITERAL = (
+    r'"([^"\\]*(?:\\.[^"\\]*)*)"(?:@([a-zA-Z]+(?:-[a-zA-Z0-9]+)*)|\^\^' + _IRI + ")?"
+)
+_N_TRIPLES_LINE = re.compile(
+    rf"[ \t]*(?:{_IRI}|{_BLANK_NODE})"
+    rf"[ \t]+{_IRI}"
+    rf"[ \t]+(?:{_IRI}|{_BLANK_NODE}|{_LITERAL})"
+    r"[ \t]*\.[ \t]*(?:#.*)?\s*"
+)
+"""
+Matches a whole N-Triples statement. The groups are:
+
+1. subject IRI, 2. subject blank node label, 3. predicate IRI, 4. object IRI, 5. object blank node label,
+6. object literal's lexical form, 7. object literal's language and 8. object literal's datatype IRI.
+"""
+_MAX_CACHED_OBJECTS: int = 1_024
+_LITERAL_ESCAPES: Dict[int, str] = str.maketrans(
+    {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"}
+)
+
+
+def stream_triples_into(bulk_rdf_file: Path, sink: TripleSink) -> None:
+    """
+    Hands each triple in the N-Triples or Turtle file to the `sink` as soon as it has been parsed, without building
+    a graph. Any triples repeated in the file are passed on each time they appear.
+    """
+    rdf_format = guess_format(str(bulk_rdf_file))
+    if rdf_format == "nt":
+        for triple in iter_n_triples_file(bulk_rdf_file):
+            sink.add(triple)
+    elif rdf_format == "turtle":
+        with open(bulk_rdf_file, "rb") as f:
+            # N.B. rdflib's turtle parser reads the file's text into memory, but it hands each triple to the sink as
+            # soon as it has been parsed so we never build up a graph.
+            SinkParser(
+                RDFSink(sink),  # type: ignore
+                baseURI=bulk_rdf_file.absolute().as_uri(),
+                turtle=True,
+            ).loadStream(f)
+    else:
+        raise Exception(
+            f"Unable to stream '{bulk_rdf_file}'. Expected an N-Triples or Turtle file but found '{rdf_format}'."
+        )
+
+
+def get_n_triples_line(triple: Triple) -> str:
+    """
+    Writes the triple as a line of N-Triples, in the same form as rdflib's N-Triples serializer.
+    """
+    (s, p, o) = triple
+    return f"{s.n3()} {p.n3()} {_get_n_triples_object(o)} .\n"
+
+
+def _get_n_triples_object(o: Node) -> str:
+    if not isinstance(o, Literal):
+        return o.n3()
+
+    lexical_form = f'"{str(o).translate(_LITERAL_ESCAPES)}"'
+    if o.language is not None:
+        return f"{lexical_form}@{o.language}"
+    if o.datatype is not None:
+        return f"{lexical_form}^^<{o.datatype}>"
+    return lexical_form
+
+
+def iter_n_triples_file(n_triples_file: Path) -> Iterator[Triple]:
+    """
+    Yields each triple in the N-Triples file as it is read.
+    """
+    with open(n_triples_file, "r", encoding="utf-8") as f:
+        yield from iter_n_triples(f)
+
+
+def iter_n_triples(
+    lines: Iterable[str], blank_nodes: Optional[Dict[str, BNode]] = None
+) -> Iterator[Triple]:
+    """
+    Yields the triple on each N-Triples line, skipping blank lines and comments.
+
+    Each blank node label is mapped to a fresh blank node, as rdflib's parsers do. Pass the same `blank_nodes`
+    dictionary to several calls to share blank nodes between them.
+    """
+    if blank_nodes is None:
+        blank_nodes = {}
+    # Building rdflib terms is the slowest part of parsing, so we reuse them where bulk files repeat themselves.
+    # Each subject's triples are written together, predicates and datatypes come from a small vocabulary and plenty
+    # of objects are shared between entities. The object cache is cleared once it's full to keep memory bounded.
+    last_s_iri: Optional[str] = None
+    last_s: Node = URIRef("")
+    vocabulary: Dict[str, URIRef] = {}
+    objects: Dict[Any, Node] = {}
+    match_line = _N_TRIPLES_LINE.fullmatch
+
+    for line in lines:
+        match = match_line(line)
+        if match is None:
+            if line.strip() and not line.lstrip().startswith("#"):
+                yield _parse_line_with_rdflib(line, blank_nodes)
+            continue
+
+        (
+            s_iri,
+            s_label,
+            p_iri,
+            o_iri,
+            o_label,
+            o_lexical_form,
+            o_language,
+            o_datatype,
+        ) = match.groups()
+
+        if s_iri is None:
+            s = _get_blank_node(s_label, blank_nodes)
+        elif s_iri == last_s_iri:
+            s = last_s
+        else:
+            s = last_s = URIRef(unquote(s_iri))
+            last_s_iri = s_iri
+
+        p = vocabulary.get(p_iri)
+        if p is None:
+            p = vocabulary[p_iri] = URIRef(unquote(p_iri))
+
+        if o_label is not None:
+            o = _get_blank_node(o_label, blank_nodes)
+        else:
+            object_key = o_iri if o_iri is not None else match.group(6, 7, 8)
+            o = objects.get(object_key)
+            if o is None:
+                if len(objects) >= _MAX_CACHED_OBJECTS:
+                    objects.clear()
+
+                if o_iri is not None:
+                    o = URIRef(unquote(o_iri))
+                else:
+                    datatype = None
+                    if o_datatype is not None:
+                        datatype = vocabulary.get(o_datatype)
+                        if datatype is None:
+                            datatype = vocabulary[o_datatype] = URIRef(
+                                unquote(o_datatype)
+                            )
+                    o = Literal(unquote(o_lexical_form), o_language, datatype)
+                objects[object_key] = o
+
+        yield s, p, o
+
+
+def _get_blank_node(label: str, blank_nodes: Dict[str, BNode]) -> BNode:
+    blank_node = blank_nodes.get(label)
+    if blank_node is None:
+        blank_node = blank_nodes[label] = BNode()
+    return blank_node
+
+
+def _parse_line_with_rdflib(line: str, blank_nodes: Dict[str, BNode]) -> Triple:
+    sink = _SingleTripleSink()
+    W3CNTriplesParser(sink=sink).parsestring(line, bnode_context=blank_nodes)  # type: ignore
+    if sink.triple_parsed is None:
+        raise Exception(f"Unable to parse N-Triples line '{line.rstrip()}'.")
+    return sink.triple_parsed
+
+
+class _SingleTripleSink:
+    def __init__(self):
+        self.triple_parsed: Optional[Triple] = None
+
+    def triple(self, s: Node, p: Node, o: Node) -> None:
+        self.triple_parsed = (s, p, o)
@@ -2,15 +2,59 @@
 partition
 ---------
 
-Partitions ttl files into multiple JSON-LD files with one subject per file.
+Partitions bulk N-Triples (or ttl) files into multiple JSON-LD files with one subject per file.
 """
 
+import glob
+import hashlib
+import heapq
+import json
+import resource
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, asdict
+from itertools import groupby
 from pathlib import Path
-from typing import Set
+from tempfile import TemporaryDirectory
+from typing import Set, Dict, List, Iterable, Tuple, Optional, Iterator
 from urllib.parse import urlparse
 
 import click
 import rdflib
+from rdflib.plugins.parsers.ntriples import unquote
+from rdflib.compare import to_canonical_graph
+from rdflib.term import BNode, Node, URIRef
+from rdflib.util import guess_format
+
+from mbocsvwscripts.expandedjsonld import get_expanded_json_ld
+from mbocsvwscripts.ntriples import (
+    get_n_triples_line,
+    iter_n_triples,
+    iter_n_triples_file,
+    stream_triples_into,
+)
+
+Triple = Tuple[Node, Node, Node]
+
+
+@dataclass
+class PartitionManifestEntry:
+    uri: str
+    file: str
+    hash: str
+
+
+@dataclass
+class PartitionManifest:
+    """
+    Records which files `partition execute` split a bulk TTL file into, so nobody needs to re-parse it to find out.
+    """
+
+    bulk_ttl_file: str
+    partitions: List[PartitionManifestEntry]
 
 
 @click.group()
@@ -27,14 +71,127 @@ def main():
 @click.option(
     "-o", "--out", required=False, type=click.Path(), show_default=True, default="."
 )
-@click.argument("bulk_ttl_file", type=click.Path(exists=True))
-def partition(out: click.Path, bulk_ttl_file: click.Path):
+@click.option(
+    "-m",
+    "--manifest",
+    required=False,
+    type=click.Path(),
+    help="Write a JSON manifest of the partition URIs, their output files and content hashes to this path. "
+    "Files whose content hasn't changed since the manifest was last written are left untouched. "
+    "Only valid with a single BULK_TTL_FILE.",
+)
+@click.option(
+    "--manifests-dir",
+    required=False,
+    type=click.Path(file_okay=False),
+    help="Write a manifest for each BULK_TTL_FILE to `<manifests-dir>/<bulk file name>.json`.",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The number of processes to use. Bulk files are partitioned concurrently when there are several of them, "
+    "otherwise the partitions are serialized concurrently.",
+)
+@click.option(
+    "--write-subject-index",
+    is_flag=True,
+    default=False,
+    help="Write a `<bulk file>.subjects` index of the partition URIs next to each bulk file so that `partition list` "
+    "doesn't have to parse it.",
+)
+@click.option(
+    "--out-of-core",
+    is_flag=True,
+    default=False,
+    help="Stream the triples through sorted temporary files instead of loading the whole graph into memory. "
+    "Use this for bulk files which are too large to fit in memory. Triples about blank nodes are still held in memory "
+    "until the whole file has been read.",
+)
+@click.option(
+    "--max-triples-in-memory",
+    type=click.IntRange(min=1),
+    default=100_000,
+    show_default=True,
+    help="The number of triples held in memory before they're spilled to a temporary file. Used with --out-of-core.",
+)
+@click.argument("bulk_ttl_files", type=str, nargs=-1, required=True)
+def partition(
+    out: click.Path,
+    bulk_ttl_files: Tuple[str, ...],
+    manifest: Optional[click.Path],
+    manifests_dir: Optional[click.Path],
+    workers: int,
+    write_subject_index: bool,
+    out_of_core: bool,
+    max_triples_in_memory: int,
+):
     """
-    Takes a BULK_TTL_FILE and splits it into one JSON-LD file per unique URI.
+    Takes one or more BULK_TTL_FILES (or glob patterns matching them) and splits each into one JSON-LD file per
+    unique URI.
 
     Hash-URIs end up in the same file.
     """
-    _partition_to_individual_files(Path(str(bulk_ttl_file)), Path(str(out)))
+    if out_of_core and workers > 1:
+        raise click.UsageError("--workers cannot be used with --out-of-core.")
+
+    if manifest is not None and manifests_dir is not None:
+        raise click.UsageError("--manifest cannot be used with --manifests-dir.")
+
+    bulk_rdf_files = _expand_bulk_file_patterns(bulk_ttl_files)
+    if manifest is not None and len(bulk_rdf_files) > 1:
+        raise click.UsageError(
+            "--manifest can only be used with a single BULK_TTL_FILE, use --manifests-dir instead."
+        )
+
+    if manifests_dir is not None:
+        duplicate_stems = sorted(
+            stem
+            for stem, count in Counter(f.stem for f in bulk_rdf_files).items()
+            if count > 1
+        )
+        if duplicate_stems:
+            raise click.UsageError(
+                f"--manifests-dir names each manifest after its BULK_TTL_FILE, but more than one is named "
+                f"{', '.join(repr(stem) for stem in duplicate_stems)}."
+            )
+        Path(str(manifests_dir)).mkdir(parents=True, exist_ok=True)
+
+    partition_jobs = [
+        _PartitionJob(
+            bulk_rdf_file,
+            Path(str(out)),
+            _get_manifest_file_path(
+                bulk_rdf_file,
+                None if manifest is None else Path(str(manifest)),
+                None if manifests_dir is None else Path(str(manifests_dir)),
+            ),
+            write_subject_index,
+            out_of_core,
+            max_triples_in_memory,
+        )
+        for bulk_rdf_file in bulk_rdf_files
+    ]
+
+    total_files_written = 0
+    for partition_job, (num_files_written, seconds_taken) in zip(
+        partition_jobs, _run_partition_jobs(partition_jobs, workers)
+    ):
+        total_files_written += num_files_written
+        print(
+            f"{partition_job.bulk_rdf_file}: wrote {num_files_written} changed partition file(s) in "
+            f"{seconds_taken:.2f}s."
+        )
+
+    if len(partition_jobs) > 1:
+        print(
+            f"Wrote {total_files_written} changed partition file(s) from {len(partition_jobs)} bulk files."
+        )
+    else:
+        print(f"Wrote {total_files_written} changed partition file(s).")
+    print(f"Peak RSS: {_get_peak_rss_mib():.1f} MiB")
 
 
 @main.command("list")
@@ -48,6 +205,9 @@ def list_partition_files_out(out: click.Path, bulk_ttl_file: click.Path):
     were split into one file per URI.
 
     Hash-URIs end up in the same file.
+
+    The bulk file isn't parsed when there's an up-to-date subject index (see `execute --write-subject-index`)
+    alongside it, or when it's an N-Triples file.
     """
     cwd = Path(".").absolute()
     for output_file in _list_partition_files_out(
@@ -56,80 +216,576 @@ def list_partition_files_out(out: click.Path, bulk_ttl_file: click.Path):
         print(output_file.absolute().relative_to(cwd))
 
 
+@main.command("makefile")
+@click.option("-o", "--out", required=True, type=click.Path())
+@click.argument("manifest_files", type=click.Path(exists=True), nargs=-1)
+def generate_partitions_makefile(
+    out: click.Path, manifest_files: Tuple[click.Path, ...]
+):
+    """
+    Takes the MANIFEST_FILES written by `partition execute --manifest` and generates a makefile which defines a
+    `PARTITIONED_FILES_<BULK_TTL_FILE>` variable listing the JSON-LD files each bulk TTL file was split into.
+    """
+    partitions_makefile = _generate_partitions_makefile(
+        [_read_partition_manifest(Path(str(f))) for f in manifest_files]
+    )
+    Path(str(out)).write_text(partitions_makefile)
+
+
 def _list_partition_files_out(bulk_ttl_file: Path, out_folder: Path) -> Set[Path]:
+    return {
+        get_partition_file_path(out_folder, part)
+        for part in _list_partition_uris(bulk_ttl_file)
+    }
+
+
+def _list_partition_uris(bulk_rdf_file: Path) -> Set[URIRef]:
+    """
+    Lists the partitions a bulk file is split into, avoiding parsing the RDF wherever possible.
+    """
+    subject_index_file = _get_subject_index_file_path(bulk_rdf_file)
+    if (
+        subject_index_file.exists()
+        and subject_index_file.stat().st_mtime >= bulk_rdf_file.stat().st_mtime
+    ):
+        return _read_subject_index(subject_index_file)
+
+    if guess_format(str(bulk_rdf_file)) == "nt":
+        return _scan_n_triples_partition_uris(bulk_rdf_file)
+
     bulk_ttl_graph = rdflib.Graph()
-    bulk_ttl_graph.parse(bulk_ttl_file, format="ttl")
+    bulk_ttl_graph.parse(bulk_rdf_file, format="ttl")
+    return _get_partition_uri_prefixes(bulk_ttl_graph)
+
+
+def _scan_n_triples_partition_uris(n_triples_file: Path) -> Set[URIRef]:
+    """
+    N-Triples has one triple per line, each starting with its subject, so the subject IRIs can be read straight
+    off the start of each line without parsing the RDF. Lines starting with anything else are comments, blank lines
+    or have blank node subjects.
+    """
+    subject_iris: Set[bytes] = set()
+    with open(n_triples_file, "rb") as f:
+        for line in f:
+            if not line.startswith(b"<"):
+                line = line.lstrip()
+                if not line.startswith(b"<"):
+                    continue
+            subject_iris.add(line[1 : line.index(b">")])
+
+    partition_iris = {iri.decode("utf-8").split("#", 1)[0] for iri in subject_iris}
+    return {URIRef(unquote(iri) if "\\" in iri else iri) for iri in partition_iris}
+
+
+def _get_subject_index_file_path(bulk_rdf_file: Path) -> Path:
+    return bulk_rdf_file.with_name(f"{bulk_rdf_file.name}.subjects")
+
+
+def _write_subject_index(bulk_rdf_file: Path, partition_uris: Iterable[str]) -> None:
+    """
+    Writes a sidecar file next to the bulk file listing the partition URIs, one per line.
+    """
+    _get_subject_index_file_path(bulk_rdf_file).write_text(
+        "".join(f"{uri}\n" for uri in sorted(partition_uris)), encoding="utf-8"
+    )
 
+
+def _read_subject_index(subject_index_file: Path) -> Set[URIRef]:
     return {
-        _get_partition_file_path(out_folder, part)
-        for part in _get_partition_uri_prefixes(bulk_ttl_graph)
+        URIRef(line)
+        for line in subject_index_file.read_text(encoding="utf-8").split("\n")
+        if line
     }
 
 
-def _partition_to_individual_files(bulk_ttl_file: Path, out_folder: Path) -> None:
+@dataclass
+class _PartitionJob:
+    bulk_rdf_file: Path
+    out_folder: Path
+    manifest_file: Optional[Path]
+    write_subject_index: bool
+    out_of_core: bool
+    max_triples_in_memory: int
+
+
+def _expand_bulk_file_patterns(bulk_file_patterns: Iterable[str]) -> List[Path]:
+    """
+    Each argument is either the path to a bulk file, or a glob pattern matching some.
+    """
+    bulk_files: List[Path] = []
+    for pattern in bulk_file_patterns:
+        if Path(pattern).exists():
+            matching_files = [pattern]
+        else:
+            matching_files = sorted(glob.glob(pattern))
+            if not matching_files:
+                raise click.BadParameter(
+                    f"'{pattern}' does not exist and doesn't match any files.",
+                    param_hint="BULK_TTL_FILES",
+                )
+        bulk_files += [Path(f) for f in matching_files]
+
+    # Don't partition the same file twice if it's matched by more than one pattern.
+    return list(dict.fromkeys(bulk_files))
+
+
+def _get_manifest_file_path(
+    bulk_rdf_file: Path, manifest_file: Optional[Path], manifests_dir: Optional[Path]
+) -> Optional[Path]:
+    if manifests_dir is not None:
+        return manifests_dir / f"{bulk_rdf_file.stem}.json"
+
+    return manifest_file
+
+
+def _run_partition_jobs(
+    partition_jobs: List[_PartitionJob], workers: int
+) -> List[Tuple[int, float]]:
+    """
+    Returns the number of partition files written and the seconds taken for each job.
+
+    Where there are several bulk files, each worker process loads and partitions a whole file at a time. With a
+    single bulk file, the workers serialize its partitions instead.
+    """
+    if workers > 1 and len(partition_jobs) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(partition_jobs))
+        ) as executor:
+            return list(
+                executor.map(
+                    _run_partition_job, partition_jobs, [1] * len(partition_jobs)
+                )
+            )
+
+    return [_run_partition_job(job, workers) for job in partition_jobs]
+
+
+def _run_partition_job(partition_job: _PartitionJob, workers: int) -> Tuple[int, float]:
+    """
+    N.B. This needs to remain a module-level function so that it can be pickled and sent to worker processes.
+    """
+    start = time.perf_counter()
+    if partition_job.out_of_core:
+        num_files_written = _partition_to_individual_files_out_of_core(
+            partition_job.bulk_rdf_file,
+            partition_job.out_folder,
+            partition_job.manifest_file,
+            partition_job.max_triples_in_memory,
+            partition_job.write_subject_index,
+        )
+    else:
+        num_files_written = _partition_to_individual_files(
+            partition_job.bulk_rdf_file,
+            partition_job.out_folder,
+            partition_job.manifest_file,
+            workers,
+            partition_job.write_subject_index,
+        )
+
+    return num_files_written, time.perf_counter() - start
+
+
+def _partition_to_individual_files(
+    bulk_ttl_file: Path,
+    out_folder: Path,
+    manifest_file: Optional[Path] = None,
+    workers: int = 1,
+    write_subject_index: bool = False,
+) -> int:
+    """
+    Returns the number of partition files written.
+
+    Where a `manifest_file` from a previous run exists, partitions whose content hash hasn't changed aren't rewritten.
+    This avoids bumping their modification times and triggering make to rebuild everything downstream of them.
+
+    Serializing the partitions to JSON-LD is CPU-bound so it's spread over `workers` processes when `workers > 1`.
+    """
+    previous_partition_hashes = get_previous_partition_hashes(manifest_file)
+
+    partition_files_to_write: List[Tuple[Path, List[Triple]]] = []
+    manifest_entries: List[PartitionManifestEntry] = []
+    for part, partitioned_triples in sorted(
+        index_triples_by_partition(read_bulk_triples(bulk_ttl_file)).items()
+    ):
+        partition_file_path = get_partition_file_path(out_folder, part)
+        content_hash = get_partition_content_hash(partitioned_triples)
+        if _partition_file_needs_writing(
+            partition_file_path, content_hash, previous_partition_hashes
+        ):
+            partition_files_to_write.append((partition_file_path, partitioned_triples))
+
+        manifest_entries.append(
+            PartitionManifestEntry(
+                uri=str(part), file=str(partition_file_path), hash=content_hash
+            )
+        )
+
+    _write_partition_files(partition_files_to_write, workers)
+
+    if manifest_file is not None:
+        write_partition_manifest(
+            manifest_file, PartitionManifest(str(bulk_ttl_file), manifest_entries)
+        )
+
+    if write_subject_index:
+        _write_subject_index(bulk_ttl_file, (e.uri for e in manifest_entries))
+
+    return len(partition_files_to_write)
+
+
+def _partition_to_individual_files_out_of_core(
+    bulk_rdf_file: Path,
+    out_folder: Path,
+    manifest_file: Optional[Path] = None,
+    max_triples_in_memory: int = 100_000,
+    write_subject_index: bool = False,
+) -> int:
+    """
+    Does the same job as `_partition_to_individual_files` but never holds more than `max_triples_in_memory` triples
+    (plus those in the partition currently being written) in memory.
+
+    N.B. The triples whose subject is a blank node are the exception. They're all held in memory until the whole
+    bulk file has been read, since which partitions they belong to isn't known until then. So memory is only bounded
+    for bulk files which don't describe many blank nodes, as csv2rdf's output doesn't.
+
+    Returns the number of partition files written.
+    """
+    previous_partition_hashes = get_previous_partition_hashes(manifest_file)
+
+    num_files_written = 0
+    manifest_entries: List[PartitionManifestEntry] = []
+    with TemporaryDirectory() as tmp_dir:
+        for part, partitioned_triples in _iter_partitions_out_of_core(
+            bulk_rdf_file, Path(tmp_dir), max_triples_in_memory
+        ):
+            partition_file_path = get_partition_file_path(out_folder, part)
+            content_hash = get_partition_content_hash(partitioned_triples)
+            if _partition_file_needs_writing(
+                partition_file_path, content_hash, previous_partition_hashes
+            ):
+                _write_partition_file(partition_file_path, partitioned_triples)
+                num_files_written += 1
+
+            manifest_entries.append(
+                PartitionManifestEntry(
+                    uri=str(part), file=str(partition_file_path), hash=content_hash
+                )
+            )
+
+    if manifest_file is not None:
+        write_partition_manifest(
+            manifest_file, PartitionManifest(str(bulk_rdf_file), manifest_entries)
+        )
+
+    if write_subject_index:
+        _write_subject_index(bulk_rdf_file, (e.uri for e in manifest_entries))
+
+    return num_files_written
+
+
+class _SortedRunSpiller:
+    """
+    A parser sink which receives triples one at a time and spills them to temporary files in runs sorted by
+    partition URI.
+
+    Each line in a run file is the partition URI, a tab and then the triple in N-Triples form. N-Triples IRIs can't
+    contain tabs, so sorting the lines groups each partition's triples together.
+    """
+
+    def __init__(self, tmp_dir: Path, max_triples_in_memory: int):
+        self.run_files: List[Path] = []
+        self._tmp_dir = tmp_dir
+        self._max_triples_in_memory = max_triples_in_memory
+        self._buffer: List[str] = []
+        self._blank_node_closure = _BlankNodeClosure()
+
+    def add(self, triple: Triple) -> None:
+        subject = triple[0]
+        if isinstance(subject, URIRef):
+            partition = _get_partition_uri(subject)
+            self._add_to_partition(partition, triple)
+            if isinstance(triple[2], BNode):
+                self._blank_node_closure.add(triple, partition)
+        elif isinstance(subject, BNode):
+            self._blank_node_closure.add(triple)
+
+    def add_blank_node_triples(self) -> None:
+        """
+        Called once all the triples have been parsed. The blank node triples are only held in memory until then
+        because which partitions they belong to isn't known until every link between blank nodes has been seen.
+        """
+        for partition, triple in self._blank_node_closure.iter_partitioned_triples():
+            self._add_to_partition(partition, triple)
+
+    def _add_to_partition(self, partition: URIRef, triple: Triple) -> None:
+        self._buffer.append(f"{partition}\t{get_n_triples_line(triple)}")
+        if len(self._buffer) >= self._max_triples_in_memory:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+
+        self._buffer.sort()
+        run_file = self._tmp_dir / f"run-{len(self.run_files)}.txt"
+        run_file.write_text("".join(self._buffer), encoding="utf-8", newline="\n")
+        self.run_files.append(run_file)
+        self._buffer = []
+
+
+def _iter_partitions_out_of_core(
+    bulk_rdf_file: Path, tmp_dir: Path, max_triples_in_memory: int
+) -> Iterator[Tuple[URIRef, List[Triple]]]:
+    """
+    An external sort: spills sorted runs of triples to `tmp_dir` and then merges them, yielding one partition at a
+    time in partition URI order.
+    """
+    spiller = _SortedRunSpiller(tmp_dir, max_triples_in_memory)
+    stream_triples_into(bulk_rdf_file, spiller)
+    spiller.add_blank_node_triples()
+    spiller.flush()
+
+    with ExitStack() as stack:
+        run_files = [
+            stack.enter_context(open(run_file, "r", encoding="utf-8", newline="\n"))
+            for run_file in spiller.run_files
+        ]
+        for part, lines in groupby(
+            heapq.merge(*run_files), key=lambda line: line.split("\t", 1)[0]
+        ):
+            yield URIRef(part), _parse_n_triples(
+                "".join(line.split("\t", 1)[1] for line in lines)
+            )
+
+
+def _parse_n_triples(n_triples: str) -> List[Triple]:
+    """
+    N.B. N-Triples lines only end in "\n". Literals may hold other characters which `str.splitlines` would treat as
+    line breaks, e.g. "\u2028" or "\x0c", so we mustn't split on those.
+    """
+    # Any triples repeated in the bulk file are de-duplicated, as they would be in a graph.
+    return list(dict.fromkeys(iter_n_triples(n_triples.split("\n"))))
+
+
+def read_bulk_triples(bulk_rdf_file: Path) -> Iterable[Triple]:
+    """
+    Reads all of the (distinct) triples in an N-Triples or Turtle bulk file.
+
+    N-Triples files are read with our line parser which is much faster than parsing Turtle.
+    """
+    if guess_format(str(bulk_rdf_file)) == "nt":
+        return dict.fromkeys(iter_n_triples_file(bulk_rdf_file)).keys()
+
     bulk_ttl_graph = rdflib.Graph()
-    bulk_ttl_graph.parse(bulk_ttl_file, format="ttl")
+    bulk_ttl_graph.parse(bulk_rdf_file, format="ttl")
+    return bulk_ttl_graph
+
+
+def _get_peak_rss_mib() -> float:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports this in bytes, linux in kibibytes.
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+def _partition_file_needs_writing(
+    partition_file_path: Path,
+    content_hash: str,
+    previous_partition_hashes: Dict[str, str],
+) -> bool:
+    return (
+        previous_partition_hashes.get(str(partition_file_path)) != content_hash
+        or not partition_file_path.exists()
+    )
 
-    for part in _get_partition_uri_prefixes(bulk_ttl_graph):
-        partitioned_triples = _partition_triples(bulk_ttl_graph, part)
 
-        partition_file_path = _get_partition_file_path(out_folder, part)
-        partitioned_triples.serialize(partition_file_path, format="json-ld")
+def _write_partition_files(
+    partition_files_to_write: List[Tuple[Path, List[Triple]]],
+    workers: int,
+) -> None:
+    if workers > 1 and len(partition_files_to_write) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Consuming the results makes sure any exception raised in a worker is re-raised here.
+            list(
+                executor.map(
+                    _write_partition_file,
+                    *zip(*partition_files_to_write),
+                    chunksize=max(1, len(partition_files_to_write) // (workers * 4)),
+                )
+            )
+    else:
+        for partition_file_path, partitioned_triples in partition_files_to_write:
+            _write_partition_file(partition_file_path, partitioned_triples)
 
 
-def _get_partition_file_path(out_folder: Path, part: rdflib.term.Identifier) -> Path:
+def _write_partition_file(
+    partition_file_path: Path,
+    partitioned_triples: List[Triple],
+) -> None:
+    """
+    N.B. This needs to remain a module-level function so that it can be pickled and sent to worker processes.
+    """
+    partition_file_path.write_text(
+        json.dumps(
+            get_expanded_json_ld(partitioned_triples), indent=2, ensure_ascii=False
+        )
+    )
+
+
+def get_previous_partition_hashes(manifest_file: Optional[Path]) -> Dict[str, str]:
+    """
+    Maps each file listed in the manifest from the previous run to the content hash it was written with.
+    """
+    if manifest_file is None or not manifest_file.exists():
+        return {}
+
+    return {p.file: p.hash for p in _read_partition_manifest(manifest_file).partitions}
+
+
+def write_partition_manifest(manifest_file: Path, manifest: PartitionManifest) -> None:
+    manifest_file.write_text(json.dumps(asdict(manifest), indent=4))
+
+
+def _read_partition_manifest(manifest_file: Path) -> PartitionManifest:
+    manifest = json.loads(manifest_file.read_text())
+    return PartitionManifest(
+        bulk_ttl_file=manifest["bulk_ttl_file"],
+        partitions=[PartitionManifestEntry(**p) for p in manifest["partitions"]],
+    )
+
+
+def _generate_partitions_makefile(manifests: List[PartitionManifest]) -> str:
+    makefile = (
+        "# Generated by `partition makefile` from partition manifests. Do not edit.\n"
+    )
+    for manifest in sorted(manifests, key=lambda m: m.bulk_ttl_file):
+        partitioned_files = " ".join(p.file for p in manifest.partitions)
+        makefile += (
+            f"PARTITIONED_FILES_{manifest.bulk_ttl_file} := {partitioned_files}\n"
+        )
+
+    return makefile
+
+
+def get_partition_content_hash(triples: Iterable[Triple]) -> str:
+    """
+    A SHA-256 hash of the partition's triples in a canonical (sorted N-Triples) form.
+
+    Blank node labels change every time the bulk file is parsed, so partitions containing blank nodes are relabelled
+    canonically before they're hashed.
+    """
+    triples = list(triples)
+    if any(isinstance(term, BNode) for triple in triples for term in triple):
+        graph = rdflib.Graph()
+        for triple in triples:
+            graph.add(triple)
+        triples = list(to_canonical_graph(graph))
+
+    canonical_n_triples = "\n".join(
+        sorted(f"{s.n3()} {p.n3()} {o.n3()} ." for (s, p, o) in triples)
+    )
+    return hashlib.sha256(canonical_n_triples.encode("utf-8")).hexdigest()
+
+
+def get_partition_file_path(out_folder: Path, part: rdflib.term.Identifier) -> Path:
     url_slug = Path(urlparse(str(part)).path).parts[-1]
     return out_folder / f"{url_slug}.json"
 
 
-def _partition_triples(bulk_ttl_graph: rdflib.Graph, part: rdflib.term.Identifier):
-    partitioned_triples_graph = rdflib.Graph()
-    partitioned_triple_results = bulk_ttl_graph.query(
+def index_triples_by_partition(
+    triples: Iterable[Triple],
+) -> Dict[URIRef, List[Triple]]:
+    """
+    Groups the triples by the partition their subject belongs to in a single pass over the graph.
+
+    Hash-URIs belong to the same partition as the URI they hang off. Blank nodes belong to every partition which
+    (directly, or via other blank nodes) refers to them, so that each partition holds the Concise Bounded Description
+    of its entity. Blank nodes which no partition refers to are dropped.
+    """
+    partitioned_triples: Dict[URIRef, List[Triple]] = defaultdict(list)
+    blank_node_closure = _BlankNodeClosure()
+    for triple in triples:
+        subject = triple[0]
+        if isinstance(subject, URIRef):
+            partition = _get_partition_uri(subject)
+            partitioned_triples[partition].append(triple)
+            if isinstance(triple[2], BNode):
+                blank_node_closure.add(triple, partition)
+        elif isinstance(subject, BNode):
+            blank_node_closure.add(triple)
+
+    for partition, triple in blank_node_closure.iter_partitioned_triples():
+        partitioned_triples[partition].append(triple)
+
+    return partitioned_triples
+
+
+class _BlankNodeClosure:
+    """
+    Works out which partitions each blank node's triples belong to, so it only needs to see each triple once.
+
+    A blank node belongs to every partition which refers to it, either directly or via a chain of other blank nodes.
+    Links are only followed from subject to object, so two blank nodes which share a child don't drag each other
+    into their partitions.
+    """
+
+    def __init__(self):
+        self._objects_by_blank_node: Dict[BNode, List[BNode]] = defaultdict(list)
+        self._triples_by_blank_node: Dict[BNode, List[Triple]] = defaultdict(list)
+        self._partitions_by_blank_node: Dict[BNode, Set[URIRef]] = defaultdict(set)
+
+    def add(self, triple: Triple, partition: Optional[URIRef] = None) -> None:
         """
-            prefix schema: <https://schema.org/>
-            prefix goos: <https://goosocean.org/document/>
-            prefix mbo: <https://w3id.org/marco-bolo/>
-            
-            CONSTRUCT {
-                ?s ?p ?o.
-            }
-            WHERE { 
-                ?s ?p ?o.
-                FILTER(str(?s) = ?v || strbefore(str(?s), '#') = ?v)
-            }
-        """,
-        initBindings={"v": part},
-    )
+        Records a triple whose subject is a blank node, or a triple in `partition` whose object is a blank node.
+        """
+        (s, _, o) = triple
+        if isinstance(s, BNode):
+            self._triples_by_blank_node[s].append(triple)
+            if isinstance(o, BNode):
+                self._objects_by_blank_node[s].append(o)
+        elif partition is not None and isinstance(o, BNode):
+            self._partitions_by_blank_node[o].add(partition)
+
+    def iter_partitioned_triples(self) -> Iterator[Tuple[URIRef, Triple]]:
+        partitions_by_blank_node: Dict[BNode, Set[URIRef]] = defaultdict(set)
+        for blank_node, partitions in self._partitions_by_blank_node.items():
+            for reachable_blank_node in self._iter_reachable_blank_nodes(blank_node):
+                partitions_by_blank_node[reachable_blank_node] |= partitions
+
+        for blank_node, triples in self._triples_by_blank_node.items():
+            for partition in sorted(partitions_by_blank_node.get(blank_node, set())):
+                for triple in triples:
+                    yield partition, triple
+
+    def _iter_reachable_blank_nodes(self, blank_node: BNode) -> Iterator[BNode]:
+        """
+        Yields the blank node and every blank node it links to, directly or via other blank nodes.
+        """
+        visited = {blank_node}
+        to_visit = [blank_node]
+        while to_visit:
+            blank_node = to_visit.pop()
+            yield blank_node
+            for o in self._objects_by_blank_node.get(blank_node, []):
+                if o not in visited:
+                    visited.add(o)
+                    to_visit.append(o)
 
-    for partitioned_triple in partitioned_triple_results:
-        partitioned_triples_graph.add(partitioned_triple)
 
-    return partitioned_triples_graph
+def _get_partition_uri(subject: URIRef) -> URIRef:
+    """
+    Strips the hash part off the subject URI where it exists.
+    """
+    return URIRef(subject.split("#", 1)[0])
 
 
 def _get_partition_uri_prefixes(
     bulk_ttl_graph: rdflib.Graph,
-) -> Set[rdflib.term.Identifier]:
-    partition_results = list(
-        bulk_ttl_graph.query(
-            """
-                SELECT DISTINCT ?partition WHERE {
-                     { 
-                        # Strip the hash parts off URLs where they exist
-                        ?s ?p ?o. 
-                        FILTER (contains(str(?s), '#')). 
-                        BIND (strbefore(str(?s), '#') as ?partition). 
-                    } UNION 
-                    { 
-                        ?s ?p ?o. 
-                        FILTER (! contains(str(?s), '#')). 
-                        BIND(str(?s) as ?partition). 
-                    } 
-                }
-            """
-        )
-    )
-    return {r.asdict()["partition"] for r in partition_results}
+) -> Set[URIRef]:
+    return {
+        _get_partition_uri(subject)
+        for subject in bulk_ttl_graph.subjects(unique=True)
+        if isinstance(subject, URIRef)
+    }
 
 
 if __name__ == "__main__":
@@ -5,16 +5,25 @@ processparametadata
 Generate metadata describing the JSON-LD output. Augment (and improve the structure of input metadata that already exists.)
 """
 
+import json
+import sys
+import traceback
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from datetime import date
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, List
 
 import click
 import rdflib
-from rdflib.namespace import Namespace, RDF
-from rdflib.term import Node, URIRef, Literal
+from rdflib.namespace import Namespace, RDF, XSD
+from rdflib.term import BNode, Node, URIRef, Literal
 from rdflib.util import guess_format
 
+from mbocsvwscripts.expandedjsonld import get_expanded_json_ld
+
 MBO: Namespace = Namespace("https://w3id.org/marco-bolo/")
 SCHEMA: Namespace = Namespace("https://schema.org/")
 
@@ -33,64 +42,354 @@ MBO_ORGANIZATION_URI: URIRef = MBO.mbo_todo_organization_mbo
 """
 The URI Persistent Identifier for the MARCO-BOLO Organization.
 """
+PARA_METADATA_FILE_SUFFIX: str = "-input-metadata"
+"""
+Appended to the name of each metadata file to give the name of the para-metadata file split out of it.
+"""
+
+
+@dataclass(frozen=True)
+class BuildContext:
+    """
+    The details of the build which are stamped into every para-metadata graph. Create it once and share it between
+    all of the files (and worker processes) in a batch.
+    """
+
+    build_date: date
+    git_repo_commit_file_url: Optional[str] = None
+    organization_uri: URIRef = MBO_ORGANIZATION_URI
+
+
+@dataclass
+class ParaMetadataResult:
+    metadata_file: Path
+    para_metadata_file: Path
+    num_files_written: int
+    error: Optional[str] = None
+
+
+@dataclass
+class _ParaMetadataJob:
+    metadata_file: Path
+    para_metadata_file_out: Path
+    build_context: BuildContext
 
 
 @click.command("augment")
-@click.argument("metadata_file", type=click.Path(exists=True))
-@click.argument("para_metadata_file_out", type=click.Path())
+@click.argument("metadata_files", type=click.Path(), nargs=-1, required=True)
+@click.option(
+    "-o",
+    "--out",
+    type=click.Path(dir_okay=False),
+    required=False,
+    help="Write the para-metadata to this file. Only valid with a single METADATA_FILES file.",
+)
+@click.option(
+    "--out-dir",
+    type=click.Path(file_okay=False),
+    required=False,
+    help="Write each file's para-metadata to `<out-dir>/<metadata file name>-input-metadata.json`. "
+    "By default it is written alongside the metadata file.",
+)
 @click.option("-g", "--git_repo_commit_file_url", type=str, required=False)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The number of processes to use.",
+)
 def main(
-    metadata_file: click.Path,
-    para_metadata_file_out: click.Path,
-    git_repo_commit_file_url: Optional[str] = None,
+    metadata_files: Tuple[str, ...],
+    out: Optional[click.Path],
+    out_dir: Optional[click.Path],
+    git_repo_commit_file_url: Optional[str],
+    workers: int,
 ) -> None:
     """
+    For each of the METADATA_FILES (or each JSON-LD file in a METADATA_FILES directory):
+
     1. Generates metadata describing the JSON-LD output generated in this build process.
     2. Augments (and improve the structure of) input metadata that already exists.
-    3. Splits the input-metadata/para-metadata into a separate file `PARA_METADATA_FILE_OUT`.
+    3. Splits the input-metadata/para-metadata into a separate `-input-metadata` file.
+
+    A file which fails doesn't stop the others from being processed. Files whose content hasn't changed are left
+    untouched, and metadata files whose para-metadata has already been split out are skipped.
+
+    The older `METADATA_FILE PARA_METADATA_FILE_OUT` form is still accepted, and is the same as passing
+    `--out PARA_METADATA_FILE_OUT`.
+    """
+    if out is not None and out_dir is not None:
+        raise click.UsageError("--out cannot be used with --out-dir.")
+
+    if out is None and out_dir is None and _is_positional_out_form(metadata_files):
+        metadata_files, out = metadata_files[:1], metadata_files[1]  # type: ignore
+
+    missing_paths = [p for p in metadata_files if not Path(p).exists()]
+    if missing_paths:
+        raise click.UsageError(
+            f"Path '{missing_paths[0]}' does not exist. Use --out to name the para-metadata file to write."
+        )
+
+    metadata_file_paths = _expand_metadata_paths(Path(p) for p in metadata_files)
+    if out is not None and len(metadata_file_paths) != 1:
+        raise click.UsageError(
+            "--out can only be used with a single metadata file, use --out-dir instead."
+        )
+
+    if out_dir is not None:
+        Path(str(out_dir)).mkdir(parents=True, exist_ok=True)
+
+    build_context = BuildContext(date.today(), git_repo_commit_file_url)
+    jobs = [
+        _ParaMetadataJob(
+            metadata_file,
+            (
+                Path(str(out))
+                if out is not None
+                else _get_para_metadata_file_path(
+                    metadata_file, None if out_dir is None else Path(str(out_dir))
+                )
+            ),
+            build_context,
+        )
+        for metadata_file in metadata_file_paths
+    ]
+
+    results = _run_para_metadata_jobs(jobs, workers)
+    failures = [r for r in results if r.error is not None]
+    for failure in failures:
+        print(f"{failure.metadata_file}: {failure.error}", file=sys.stderr)
+
+    print(
+        f"Processed {len(results)} metadata file(s): {len(results) - len(failures)} succeeded, {len(failures)} failed."
+    )
+    print(f"Wrote {sum(r.num_files_written for r in results)} changed file(s).")
+    if failures:
+        sys.exit(1)
+
+
+def process_para_metadata_files(
+    metadata_files: Iterable[Path],
+    build_context: BuildContext,
+    out_dir: Optional[Path] = None,
+    workers: int = 1,
+) -> List[ParaMetadataResult]:
     """
-    _process_para_metadata(
-        Path(str(metadata_file)),
-        Path(str(para_metadata_file_out)),
-        date.today(),
-        git_repo_commit_file_url,
+    Splits the para-metadata out of each of the `metadata_files` (or the JSON-LD files in any directories given),
+    stamping them all with the same `build_context`. This is what the `processparametadata` command does, for use
+    from Python.
+
+    A file which fails doesn't stop the others from being processed; its result holds the error instead.
+    """
+    if out_dir is not None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    return _run_para_metadata_jobs(
+        [
+            _ParaMetadataJob(
+                metadata_file,
+                _get_para_metadata_file_path(metadata_file, out_dir),
+                build_context,
+            )
+            for metadata_file in _expand_metadata_paths(metadata_files)
+        ],
+        workers,
     )
 
 
+def _is_positional_out_form(metadata_files: Tuple[str, ...]) -> bool:
+    """
+    Whether the arguments are `METADATA_FILE PARA_METADATA_FILE_OUT`, as they were before `--out` was added. The
+    para-metadata file won't exist yet the first time round, and is named like one after that.
+    """
+    if len(metadata_files) != 2:
+        return False
+
+    metadata_file, para_metadata_file_out = (Path(p) for p in metadata_files)
+    return metadata_file.is_file() and (
+        not para_metadata_file_out.exists()
+        or para_metadata_file_out.stem.endswith(PARA_METADATA_FILE_SUFFIX)
+    )
+
+
+def _expand_metadata_paths(paths: Iterable[Path]) -> List[Path]:
+    """
+    Directories are expanded into the JSON-LD files directly inside them, skipping any para-metadata files which
+    have already been split out.
+    """
+    metadata_files: List[Path] = []
+    for path in paths:
+        if path.is_dir():
+            metadata_files += sorted(
+                f
+                for f in path.glob("*.json")
+                if not f.stem.endswith(PARA_METADATA_FILE_SUFFIX)
+            )
+        else:
+            metadata_files.append(path)
+
+    return list(dict.fromkeys(metadata_files))
+
+
+def _get_para_metadata_file_path(
+    metadata_file: Path, out_dir: Optional[Path] = None
+) -> Path:
+    return (out_dir or metadata_file.parent) / (
+        f"{metadata_file.stem}{PARA_METADATA_FILE_SUFFIX}{metadata_file.suffix}"
+    )
+
+
+def _run_para_metadata_jobs(
+    jobs: List[_ParaMetadataJob], workers: int
+) -> List[ParaMetadataResult]:
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            return list(
+                executor.map(
+                    _run_para_metadata_job,
+                    jobs,
+                    chunksize=max(1, len(jobs) // (workers * 4)),
+                )
+            )
+
+    return [_run_para_metadata_job(job) for job in jobs]
+
+
+def _run_para_metadata_job(job: _ParaMetadataJob) -> ParaMetadataResult:
+    """
+    N.B. This needs to remain a module-level function so that it can be pickled and sent to worker processes.
+    """
+    try:
+        num_files_written = _process_para_metadata(
+            job.metadata_file,
+            job.para_metadata_file_out,
+            job.build_context,
+        )
+        return ParaMetadataResult(
+            job.metadata_file, job.para_metadata_file_out, num_files_written
+        )
+    except Exception as e:
+        # Keep going with the other files, the failures are all reported at the end.
+        return ParaMetadataResult(
+            job.metadata_file,
+            job.para_metadata_file_out,
+            0,
+            "".join(traceback.format_exception_only(e)).strip(),
+        )
+
+
 def _process_para_metadata(
     metadata_file: Path,
     para_metadata_file_out: Path,
-    dt_stamp: date,
-    git_repo_commit_file_url: Optional[str] = None,
-) -> None:
+    build_context: BuildContext,
+) -> int:
+    """
+    Returns the number of files written. Files which already have the content we would write are left untouched, so
+    their modification times don't make everything downstream of them look out of date.
+    """
     input_graph, input_metadata_triples = _extract_input_metadata_triples_and_remove(
         metadata_file
     )
 
-    uri_described_in_original_metadata = _get_uri_described_in_original_metadata(
-        input_metadata_triples
-    )
+    input_format = guess_format(str(metadata_file))
+    if input_format == "json-ld":
+        # Written in the same (sorted) way as `partition` writes it, so it comes out the same every time.
+        input_metadata = json.dumps(
+            get_expanded_json_ld(input_graph), indent=2, ensure_ascii=False
+        )
+    else:
+        input_metadata = input_graph.serialize(format=input_format)
 
-    para_metadata_graph = _build_para_metadata_graph(
-        uri_described_in_original_metadata,
-        input_metadata_triples,
-        dt_stamp,
-        git_repo_commit_file_url,
+    if not input_metadata_triples and _input_metadata_already_split_out(
+        metadata_file, input_metadata, input_graph, para_metadata_file_out
+    ):
+        return 0
+
+    para_metadata_graph = build_para_metadata_graph(
+        input_metadata_triples, build_context
     )
 
+    para_metadata_format = guess_format(str(para_metadata_file_out))
+    if para_metadata_format == "json-ld":
+        para_metadata = json.dumps(
+            frame_para_metadata(para_metadata_graph),
+            indent=2,
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+    else:
+        para_metadata = para_metadata_graph.serialize(format=para_metadata_format)
+
     # Write everything out to disk now that we're confident it'll work.
-    para_metadata_graph.serialize(
-        para_metadata_file_out, format=guess_format(str(para_metadata_file_out))
-    )
+    num_files_written = int(write_if_changed(para_metadata_file_out, para_metadata))
     # Do this last, incase something fails earlier and the user needs to retry.
-    input_graph.serialize(metadata_file, format=guess_format(str(metadata_file)))
+    num_files_written += int(write_if_changed(metadata_file, input_metadata))
+
+    return num_files_written
+
+
+def _input_metadata_already_split_out(
+    metadata_file: Path,
+    metadata: str,
+    metadata_graph: rdflib.Graph,
+    para_metadata_file_out: Path,
+) -> bool:
+    """
+    Whether we have already split the input metadata out of this file; it holds exactly what we would have written
+    and the para-metadata written alongside it describes one of its entities.
+
+    A file which is missing its input metadata for any other reason goes on to fail loudly.
+    """
+    if (
+        not para_metadata_file_out.exists()
+        or metadata_file.read_text(encoding="utf-8") != metadata
+    ):
+        return False
+
+    para_metadata_graph = rdflib.Graph().parse(para_metadata_file_out)
+    return any(
+        (described_uri, None, None) in metadata_graph
+        for described_uri in para_metadata_graph.objects(None, SCHEMA.about)
+    )
+
+
+def write_if_changed(file_path: Path, content: str) -> bool:
+    """
+    Returns whether the file was written. A file which already holds the `content` is left untouched, so its
+    modification time doesn't make everything downstream of it look out of date.
+    """
+    encoded_content = content.encode("utf-8")
+    if (
+        file_path.exists()
+        and file_path.stat().st_size == len(encoded_content)
+        and file_path.read_bytes() == encoded_content
+    ):
+        return False
+
+    file_path.write_bytes(encoded_content)
+    return True
+
+
+def build_para_metadata_graph(
+    input_metadata_triples: List[Tuple[Node, Node, Node]],
+    build_context: BuildContext,
+) -> rdflib.Graph:
+    """
+    Builds the para-metadata graph for an entity from the input metadata triples which describe it.
+    """
+    return _build_para_metadata_graph(
+        _get_uri_described_in_original_metadata(input_metadata_triples),
+        input_metadata_triples,
+        build_context,
+    )
 
 
 def _build_para_metadata_graph(
     uri_described_in_original_metadata: URIRef,
     input_metadata_triples: List[Tuple[Node, Node, Node]],
-    date_created: date,
-    git_repo_commit_file_url: str,
+    build_context: BuildContext,
 ):
     result_of_action = _get_object_from_single_triple_with_predicate(
         input_metadata_triples, IS_RESULT_OF_PREDICATE
@@ -120,9 +419,13 @@ def _build_para_metadata_graph(
         (dataset_uri, SCHEMA.distribution, jsonld_data_download_uri),
         
     ]
-    if git_repo_commit_file_url is not None:
+    if build_context.git_repo_commit_file_url is not None:
         dataset_triples.append(
-            (dataset_uri, SCHEMA.archivedAt, URIRef(git_repo_commit_file_url))
+            (
+                dataset_uri,
+                SCHEMA.archivedAt,
+                URIRef(build_context.git_repo_commit_file_url),
+            )
         )
 
     csv_data_download_triples = [
@@ -147,9 +450,9 @@ def _build_para_metadata_graph(
         (
             jsonld_data_download_uri,
             SCHEMA.dateModified,
-            Literal(date_created.isoformat(), datatype=SCHEMA.Date),
+            Literal(build_context.build_date.isoformat(), datatype=SCHEMA.Date),
         ),
-        (jsonld_data_download_uri, SCHEMA.creator, MBO_ORGANIZATION_URI),
+        (jsonld_data_download_uri, SCHEMA.creator, build_context.organization_uri),
         (jsonld_data_download_uri, SCHEMA.about, uri_described_in_original_metadata),
         (jsonld_data_download_uri, SCHEMA.encodesCreativeWork, dataset_uri),
         (
@@ -175,6 +478,128 @@ def _build_para_metadata_graph(
     return para_metadata_graph
 
 
+def frame_para_metadata(
+    para_metadata_triples: Iterable[Tuple[Node, Node, Node]],
+    write_node: Optional[Callable[[Node], Dict[str, Any]]] = None,
+    get_key: Callable[[URIRef], str] = str,
+) -> Dict[str, Any]:
+    """
+    Fills in the document shape which `jsonld frame --frame remote/para-metadata.frame.json` gives the output of
+    `build_para_metadata_graph`; the schema:Dataset with its schema:DataDownload distributions embedded, and
+    references to the schema:CreateAction which produced them.
+
+    The shape of the para-metadata is fixed, so we can write the framed document directly rather than handing
+    the graph to a general-purpose JSON-LD framing implementation.
+
+    By default, each node's properties are written as `jsonld frame` gives them without a context. `build-jsonld`
+    passes a `write_node` which compacts them against the schema.org context instead, along with a `get_key` which
+    gives the terms for schema:distribution and schema:result.
+    """
+    properties_by_subject: Dict[Node, Dict[Node, List[Node]]] = defaultdict(
+        lambda: defaultdict(list)
+    )
+    for s, p, o in sorted(set(para_metadata_triples)):
+        properties_by_subject[s][p].append(o)
+
+    if write_node is None:
+        write_node = partial(_write_framed_node, properties_by_subject)
+
+    datasets = [
+        s
+        for s, properties in properties_by_subject.items()
+        if SCHEMA.Dataset in properties.get(RDF.type, [])
+    ]
+    if len(datasets) != 1:
+        raise Exception(
+            f"Expected the para-metadata to describe 1 {SCHEMA.Dataset}, but found {len(datasets)}."
+        )
+    dataset = datasets[0]
+
+    framed_dataset = _frame_node(properties_by_subject, dataset, write_node, get_key)
+    framed_dataset[get_key(SCHEMA.distribution)] = _compact_list(
+        [
+            _frame_node(properties_by_subject, distribution, write_node, get_key)
+            for distribution in sorted(
+                properties_by_subject[dataset][SCHEMA.distribution]
+            )
+        ]
+    )
+
+    return framed_dataset
+
+
+def _frame_node(
+    properties_by_subject: Dict[Node, Dict[Node, List[Node]]],
+    subject: Node,
+    write_node: Callable[[Node], Dict[str, Any]],
+    get_key: Callable[[URIRef], str],
+) -> Dict[str, Any]:
+    """
+    Writes the node and refers back to the schema:CreateActions it is the result of (without embedding them).
+    """
+    node = write_node(subject)
+
+    result_of_actions = sorted(
+        action
+        for action, action_properties in properties_by_subject.items()
+        if SCHEMA.CreateAction in action_properties.get(RDF.type, [])
+        and subject in action_properties.get(SCHEMA.result, [])
+    )
+    if result_of_actions:
+        node["@reverse"] = {
+            get_key(SCHEMA.result): _compact_list(
+                [{"@id": _get_node_id(action)} for action in result_of_actions]
+            )
+        }
+
+    return node
+
+
+def _write_framed_node(
+    properties_by_subject: Dict[Node, Dict[Node, List[Node]]], subject: Node
+) -> Dict[str, Any]:
+    """
+    Writes the node's properties in the form `jsonld frame` gives them without a context.
+    """
+    properties = properties_by_subject[subject]
+    node: Dict[str, Any] = {"@id": _get_node_id(subject)}
+    types = properties.get(RDF.type, [])
+    if types:
+        node["@type"] = _compact_list(sorted(str(t) for t in types))
+
+    for p, objects in properties.items():
+        if p != RDF.type:
+            node[str(p)] = _compact_list(
+                [_get_framed_value(o) for o in sorted(objects)]
+            )
+
+    return node
+
+
+def _get_framed_value(value: Node) -> Any:
+    if isinstance(value, Literal):
+        if value.language is not None:
+            return {"@language": value.language, "@value": str(value)}
+        if value.datatype is not None and value.datatype != XSD.string:
+            return {"@type": str(value.datatype), "@value": str(value)}
+        return str(value)
+
+    return {"@id": _get_node_id(value)}
+
+
+def _get_node_id(node: Node) -> str:
+    if isinstance(node, BNode):
+        return node.n3()
+    return str(node)
+
+
+def _compact_list(values: List[Any]) -> Any:
+    """
+    JSON-LD compaction drops the array around a single value.
+    """
+    return values[0] if len(values) == 1 else values
+
+
 def _get_object_from_single_triple_with_predicate(
     input_metadata_triples: List[Tuple[Node, Node, Node]],
     matching_predicate: Node,
@@ -206,34 +631,21 @@ def _get_uri_described_in_original_metadata(
 def _extract_input_metadata_triples_and_remove(
     metadata_file: Path,
 ) -> Tuple[rdflib.Graph, List[Tuple[Node, Node, Node]]]:
+    """
+    Looks the input metadata up directly in the graph's indexes rather than with SPARQL, which would have to go
+    through the query algebra once to find the triples and again to delete them.
+    """
     input_graph = rdflib.Graph()
     input_graph.parse(metadata_file)
-    input_metadata_triples = list(
-        input_graph.query(
-            f"""
-        prefix mbo: <https://w3id.org/marco-bolo/>
-        prefix schema: <https://schema.org/>
-        
-        CONSTRUCT {{
-            ?inputMetadata ?p ?o.
-        }}
-        WHERE {{
-            ?inputMetadata a <{INPUT_METADATA_DATA_TYPE_URI}>;
-                           ?p ?o.
-        }}
-    """
+    input_metadata_triples = [
+        triple
+        for input_metadata in list(
+            input_graph.subjects(RDF.type, INPUT_METADATA_DATA_TYPE_URI)
         )
-    )
+        for triple in input_graph.triples((input_metadata, None, None))
+    ]
 
-    input_graph.update(
-        f"""
-        DELETE 
-        WHERE {{
-            ?inputMetadata a <{INPUT_METADATA_DATA_TYPE_URI}>;
-                           ?p ?o.
-        }}
-    """
-    )
+    input_graph -= input_metadata_triples
 
     return input_graph, input_metadata_triples
 
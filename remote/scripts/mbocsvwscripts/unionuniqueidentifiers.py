@@ -8,12 +8,27 @@ There are some schema.org predicates which support referencing multiple distinct
 This script takes the `organization.csv` and `person.csv` files and generates a CSV file containing the
 complete set of permitted MBO identifiers for both of these types. We can then point to that and enforce
 foreign key constraints.
+
+Each file's identifiers are sorted (spilling sorted runs to temporary files once there are too many of them to hold in
+memory) and the sorted files are merged. So identifiers used more than once, whether in one file or across several
+of them, are found in the same pass (see the `MboIdentifierNotUsedInMultipleGraphs` SHACL constraint).
 """
 
-from typing import Tuple, List, Set
+import csv
+import heapq
+import os
+import sys
+from contextlib import ExitStack
+from itertools import repeat
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import click
 
+from mbocsvwscripts.csvcolumns import iter_column_values, read_csv_header
+from mbocsvwscripts.keyindexcache import iter_sorted_column_values
+
 
 @click.command()
 @click.option("-o", "--out", required=True, type=click.Path(exists=False))
@@ -23,33 +38,199 @@ import click
     default="MBO PID",
     help="The identifiers column title in the output CSV file.",
 )
+@click.option(
+    "-i",
+    "--identifier-column",
+    default=None,
+    help="The identifiers column title in the input CSV files. Defaults to the first column in each file.",
+)
+@click.option(
+    "--key-index-cache-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Cache the identifiers in each CSV file in this directory, so unchanged files aren't parsed again.",
+)
+@click.option(
+    "--max-identifiers-in-memory",
+    type=click.IntRange(min=1),
+    default=100_000,
+    show_default=True,
+    help="The number of identifiers held in memory before they're spilled to a temporary file while sorting.",
+)
 @click.argument("csv_files", type=click.Path(exists=True), nargs=-1)
-def main(out: click.Path, column_name: str, csv_files: Tuple[click.Path, ...]):
+def main(
+    out: click.Path,
+    column_name: str,
+    identifier_column: Optional[str],
+    key_index_cache_dir: Optional[click.Path],
+    max_identifiers_in_memory: int,
+    csv_files: Tuple[click.Path, ...],
+):
     """
-    Do the thing please.
+    Writes the union of the identifiers in the CSV_FILES to a single column CSV file.
 
-    N.B. This script is dumb and requires that the MBO PID column is the first column in all
-    input CSV files.
+    An identifier may only be used once, in one of the CSV_FILES. Any identifiers used more than once are reported,
+    and the exit code is 1, but the output file is still written so that the rest of the validation can go ahead.
     """
-    _union_identifiers([Path(str(p)) for p in csv_files], Path(str(out)), column_name)
-
-
-from pathlib import Path
-
-
-import pandas as pd
+    duplicate_identifiers = _union_identifiers(
+        [Path(str(p)) for p in csv_files],
+        Path(str(out)),
+        column_name,
+        None if key_index_cache_dir is None else Path(str(key_index_cache_dir)),
+        identifier_column,
+        max_identifiers_in_memory,
+    )
+    if any(duplicate_identifiers):
+        for identifier, identifier_csv_files in duplicate_identifiers.items():
+            print(
+                f"MBO Identifier '{identifier}' has been used to identify multiple entities in: "
+                f"{", ".join(str(f) for f in identifier_csv_files)}"
+            )
+        sys.exit(1)
 
 
 def _union_identifiers(
-    csv_files: List[Path], out_file: Path, pid_column_name: str
-) -> None:
-    mbo_identifiers: Set[str] = set()
-    for csv_file in csv_files:
-        df = pd.read_csv(csv_file)
-        mbo_identifiers |= set(df[df.columns[0]])
-
-    df_out = pd.DataFrame({pid_column_name: sorted(mbo_identifiers)})
-    df_out.to_csv(out_file, index=False)
+    csv_files: List[Path],
+    out_file: Path,
+    pid_column_name: str,
+    key_index_cache_dir: Optional[Path] = None,
+    identifier_column_title: Optional[str] = None,
+    max_identifiers_in_memory: int = 100_000,
+) -> Dict[str, List[Path]]:
+    """
+    Sorts the identifiers in each of the `csv_files`, and merges them straight into the `out_file`, one identifier at a
+    time. No more than `max_identifiers_in_memory` identifiers from each file are held in memory at once.
+
+    Returns the identifiers which appear more than once, along with the file each use of them appears in. So an
+    identifier repeated within a single file is listed with that file twice.
+    """
+    duplicate_identifiers: Dict[str, List[Path]] = {}
+    with NamedTemporaryFile(
+        "w",
+        encoding="utf-8",
+        newline="",
+        dir=out_file.resolve().parent,
+        prefix=f".{out_file.name}.",
+        suffix=".tmp",
+        delete=False,
+    ) as tmp_file:
+        try:
+            writer = csv.writer(tmp_file, lineterminator="\n")
+            writer.writerow([pid_column_name])
+            for identifier, identifier_csv_files in _merge_sorted_identifiers(
+                csv_files,
+                key_index_cache_dir,
+                identifier_column_title,
+                max_identifiers_in_memory,
+            ):
+                writer.writerow([identifier])
+                if len(identifier_csv_files) > 1:
+                    duplicate_identifiers[identifier] = identifier_csv_files
+        except BaseException:
+            os.unlink(tmp_file.name)
+            raise
+
+    os.replace(tmp_file.name, out_file)
+
+    return duplicate_identifiers
+
+
+def _merge_sorted_identifiers(
+    csv_files: List[Path],
+    key_index_cache_dir: Optional[Path],
+    identifier_column_title: Optional[str],
+    max_identifiers_in_memory: int,
+) -> Iterator[Tuple[str, List[Path]]]:
+    """
+    Yields each distinct identifier in sorted order, along with the file each use of it appears in (in the order the
+    files were given).
+    """
+    sorted_runs = [
+        zip(
+            _iter_sorted_identifiers(
+                csv_file,
+                key_index_cache_dir,
+                identifier_column_title,
+                max_identifiers_in_memory,
+            ),
+            repeat(csv_file_index),
+        )
+        for csv_file_index, csv_file in enumerate(csv_files)
+    ]
+
+    current_identifier: Optional[str] = None
+    current_csv_files: List[Path] = []
+    for identifier, csv_file_index in heapq.merge(*sorted_runs):
+        if identifier != current_identifier:
+            if current_identifier is not None:
+                yield current_identifier, current_csv_files
+            current_identifier = identifier
+            current_csv_files = []
+        current_csv_files.append(csv_files[csv_file_index])
+
+    if current_identifier is not None:
+        yield current_identifier, current_csv_files
+
+
+def _iter_sorted_identifiers(
+    csv_file: Path,
+    key_index_cache_dir: Optional[Path],
+    identifier_column_title: Optional[str],
+    max_identifiers_in_memory: int,
+) -> Iterator[str]:
+    """
+    Yields every identifier in the CSV file in sorted order, including any which are repeated.
+    """
+    if identifier_column_title is None:
+        header = read_csv_header(csv_file)
+        if not any(header):
+            raise Exception(f"Unable to find an identifier column in {csv_file}.")
+        identifier_column_title = header[0]
+
+    column_title = identifier_column_title
+    return iter_sorted_column_values(
+        key_index_cache_dir,
+        csv_file,
+        column_title,
+        lambda: _iter_sorted_externally(
+            iter_column_values(csv_file, column_title), max_identifiers_in_memory
+        ),
+    )
+
+
+def _iter_sorted_externally(
+    values: Iterable[str], max_values_in_memory: int
+) -> Iterator[str]:
+    """
+    An external sort: yields the values in sorted order, spilling sorted runs of `max_values_in_memory` values to
+    temporary files and then merging them.
+    """
+    with TemporaryDirectory() as tmp_dir, ExitStack() as stack:
+        sorted_runs: List[Iterable[str]] = []
+        values_in_memory: List[str] = []
+        for value in values:
+            values_in_memory.append(value)
+            if len(values_in_memory) >= max_values_in_memory:
+                run_file = Path(tmp_dir) / f"run-{len(sorted_runs)}.csv"
+                _write_sorted_run(run_file, values_in_memory)
+                sorted_runs.append(
+                    row[0]
+                    for row in csv.reader(
+                        stack.enter_context(
+                            open(run_file, "r", encoding="utf-8", newline="")
+                        )
+                    )
+                )
+                values_in_memory = []
+
+        sorted_runs.append(sorted(values_in_memory))
+        yield from heapq.merge(*sorted_runs)
+
+
+def _write_sorted_run(run_file: Path, values: List[str]) -> None:
+    # Written with the csv module, since identifiers may hold line breaks.
+    with open(run_file, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f, lineterminator="\n").writerows([v] for v in sorted(values))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,353 @@
+import json
+import os
+from datetime import date
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+import rdflib
+from rdflib.compare import isomorphic
+
+from rdflib.plugins.shared.jsonld.context import Context
+
+from mbocsvwscripts.buildjsonld import _build_json_ld_documents, _compact_triples
+from mbocsvwscripts.partition import (
+    index_triples_by_partition,
+    _read_partition_manifest,
+)
+from mbocsvwscripts.processparametadata import MBO, SCHEMA
+from .utils import TEST_CASES_DIR, assert_file_contains_only_these_triples
+
+BULK_TTL_FILE = TEST_CASES_DIR / "buildjsonld" / "bulk-licenses-with-input-metadata.ttl"
+SCHEMA_ORG_CONTEXT_FILE = TEST_CASES_DIR / "buildjsonld" / "schema-context.json"
+COMPACTION_TEST_CASES_DIR = TEST_CASES_DIR / "buildjsonld" / "compaction"
+
+
+def test_documents_contain_the_partitions_data():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        _build_json_ld_documents(
+            BULK_TTL_FILE, tmp_dir, SCHEMA_ORG_CONTEXT_FILE, date(2024, 12, 13)
+        )
+
+        assert {f.name for f in tmp_dir.iterdir()} == {
+            "mbo_TODO_LICENSE_1.json",
+            "mbo_TODO_LICENSE_1-input-metadata.json",
+            "mbo_todo_monetary_grant_1.json",
+            "mbo_todo_monetary_grant_1-input-metadata.json",
+        }
+
+        expected_graph = rdflib.Graph()
+        expected_graph.parse(
+            data="""
+            @prefix schema: <https://schema.org/>.
+            @prefix mbo: <https://w3id.org/marco-bolo/>.
+            @prefix xsd: <http://www.w3.org/2001/XMLSchema#>.
+
+            mbo:mbo_todo_monetary_grant_1 a schema:MonetaryGrant;
+                schema:name "Some grant";
+                schema:amount <https://w3id.org/marco-bolo/mbo_todo_monetary_grant_1#amount>.
+
+            <https://w3id.org/marco-bolo/mbo_todo_monetary_grant_1#amount> a schema:MonetaryAmount;
+                schema:currency "Kudos";
+                schema:value "1"^^xsd:integer.
+        """,
+            format="ttl",
+        )
+        assert isomorphic(
+            _parse_document(tmp_dir / "mbo_todo_monetary_grant_1.json"),
+            expected_graph,
+        )
+
+
+def test_documents_compacted_against_schema_org_context():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        _build_json_ld_documents(
+            BULK_TTL_FILE, tmp_dir, SCHEMA_ORG_CONTEXT_FILE, date(2024, 12, 13)
+        )
+
+        document = json.loads((tmp_dir / "mbo_TODO_LICENSE_1.json").read_text())
+        assert document == {
+            "@context": {
+                "@import": "https://schema.org/",
+                "schema": "https://schema.org/",
+            },
+            "@id": "https://w3id.org/marco-bolo/mbo_TODO_LICENSE_1",
+            "@type": "CreativeWork",
+            "name": "Creative Commons Zero v1.0 Universal",
+            "url": "https://spdx.org/licenses/CC0-1.0",
+        }
+
+
+def test_blank_nodes_kept_in_compacted_documents():
+    partitioned_triples = index_triples_by_partition(
+        rdflib.Graph().parse(TEST_CASES_DIR / "bulk-blank-nodes.ttl", format="ttl")
+    )[MBO.mbo_place_1]
+
+    with TemporaryDirectory() as tmp_dir:
+        document_file = Path(tmp_dir) / "mbo_place_1.json"
+        document_file.write_text(
+            json.dumps(
+                _compact_triples(
+                    partitioned_triples,
+                    Context(
+                        json.loads(SCHEMA_ORG_CONTEXT_FILE.read_text())["@context"]
+                    ),
+                )
+            )
+        )
+
+        expected_graph = rdflib.Graph()
+        for triple in partitioned_triples:
+            expected_graph.add(triple)
+        assert isomorphic(_parse_document(document_file), expected_graph)
+
+
+@pytest.mark.parametrize(
+    "bulk_ttl_file,partition_uri",
+    [
+        (COMPACTION_TEST_CASES_DIR / "mbo_conformance_1.ttl", MBO.mbo_conformance_1),
+        (TEST_CASES_DIR / "bulk-blank-nodes.ttl", MBO.mbo_place_1),
+        (TEST_CASES_DIR / "bulk-monetary-grant.ttl", MBO.mbo_todo_monetary_grant_1),
+        (BULK_TTL_FILE, MBO.mbo_TODO_LICENSE_1),
+    ],
+)
+def test_documents_compacted_like_jsonld_compact(
+    bulk_ttl_file: Path, partition_uri: rdflib.URIRef
+):
+    """
+    The expected documents are what `jsonld compact` makes of the raw JSON-LD which rdflib writes for each partition.
+
+    The order of the nodes in `@graph` isn't significant (and was never stable), so it's ignored.
+    """
+    partitioned_triples = index_triples_by_partition(
+        rdflib.Graph().parse(bulk_ttl_file, format="ttl")
+    )[partition_uri]
+
+    document = json.loads(
+        json.dumps(
+            _compact_triples(
+                partitioned_triples,
+                Context(json.loads(SCHEMA_ORG_CONTEXT_FILE.read_text())["@context"]),
+            )
+        )
+    )
+    expected_document = json.loads(
+        (
+            COMPACTION_TEST_CASES_DIR
+            / f"{partition_uri.removeprefix(str(MBO))}-jsonld-compact.json"
+        ).read_text()
+    )
+
+    for d in [document, expected_document]:
+        if "@graph" in d:
+            d["@graph"].sort(key=lambda node: node["@id"])
+    assert document == expected_document
+
+
+def test_para_metadata_framed():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        _build_json_ld_documents(
+            BULK_TTL_FILE,
+            tmp_dir,
+            SCHEMA_ORG_CONTEXT_FILE,
+            date(2024, 12, 13),
+            "https://github.com/marco-bolo/csv-to-json-ld/tree/some-hash",
+        )
+
+        para_metadata_file = tmp_dir / "mbo_TODO_LICENSE_1-input-metadata.json"
+        document = json.loads(para_metadata_file.read_text())
+        assert document["@type"] == "Dataset"
+        assert document["@reverse"] == {"result": {"@id": str(MBO.mbo_some_action)}}
+        assert [d["@type"] for d in document["distribution"]] == [
+            "DataDownload",
+            "DataDownload",
+        ]
+        assert all(
+            d["@reverse"] == {"result": {"@id": str(MBO.mbo_some_action)}}
+            for d in document["distribution"]
+        )
+
+        assert_file_contains_only_these_triples(
+            _write_expanded_document(para_metadata_file, tmp_dir),
+            f"""
+            @prefix schema: <https://schema.org/>.
+            @prefix mbo: <https://w3id.org/marco-bolo/>.
+
+            mbo:mbo_TODO_LICENSE_1-input-metadata a schema:Dataset;
+                schema:dateCreated "2019-01-01"^^schema:Date;
+                schema:about mbo:mbo_TODO_LICENSE_1;
+                schema:creator mbo:mbo_todo_organization_mbo;
+                schema:archivedAt <https://github.com/marco-bolo/csv-to-json-ld/tree/some-hash>;
+                schema:distribution <{MBO['mbo_TODO_LICENSE_1-input-metadata#csv']}>,
+                                    <{MBO['mbo_TODO_LICENSE_1-input-metadata#jsonld']}>.
+
+            <{MBO['mbo_TODO_LICENSE_1-input-metadata#csv']}> a schema:DataDownload;
+                schema:dateCreated "2019-01-01"^^schema:Date;
+                schema:creator mbo:mbo_todo_organization_mbo;
+                schema:about mbo:mbo_TODO_LICENSE_1;
+                schema:encodesCreativeWork mbo:mbo_TODO_LICENSE_1-input-metadata;
+                schema:contentUrl "https://w3id.org/marco-bolo/mbo_TODO_license.csv#row=1"^^schema:URL;
+                schema:encodingFormat "text/csv".
+
+            <{MBO['mbo_TODO_LICENSE_1-input-metadata#jsonld']}> a schema:DataDownload;
+                schema:dateModified "2024-12-13"^^schema:Date;
+                schema:creator mbo:mbo_todo_organization_mbo;
+                schema:about mbo:mbo_TODO_LICENSE_1;
+                schema:encodesCreativeWork mbo:mbo_TODO_LICENSE_1-input-metadata;
+                schema:contentUrl "https://w3id.org/marco-bolo/mbo_TODO_LICENSE_1"^^schema:URL;
+                schema:encodingFormat "application/ld+json".
+
+            mbo:mbo_some_action schema:result mbo:mbo_TODO_LICENSE_1-input-metadata,
+                                              <{MBO['mbo_TODO_LICENSE_1-input-metadata#csv']}>,
+                                              <{MBO['mbo_TODO_LICENSE_1-input-metadata#jsonld']}>.
+        """,
+        )
+
+
+def test_para_metadata_framed_like_jsonld_frame():
+    """
+    The para-metadata document should be the same as the one the build used to get by running
+    `jsonld frame --frame remote/para-metadata.frame.json` (jsonld.js) over the para-metadata graph and compacting the
+    result like any other document.
+    """
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        _build_json_ld_documents(
+            BULK_TTL_FILE,
+            tmp_dir,
+            SCHEMA_ORG_CONTEXT_FILE,
+            date(2024, 12, 13),
+            "https://github.com/marco-bolo/csv-to-json-ld/tree/some-hash",
+        )
+
+        assert json.loads(
+            (tmp_dir / "mbo_TODO_LICENSE_1-input-metadata.json").read_text()
+        ) == json.loads(
+            (
+                TEST_CASES_DIR
+                / "buildjsonld"
+                / "mbo_TODO_LICENSE_1-input-metadata-jsonld-frame-compact.json"
+            ).read_text()
+        )
+
+
+def test_parallel_build_identical_to_serial():
+    with TemporaryDirectory() as serial_dir, TemporaryDirectory() as parallel_dir:
+        serial_dir = Path(serial_dir)
+        parallel_dir = Path(parallel_dir)
+        _build_json_ld_documents(
+            BULK_TTL_FILE, serial_dir, SCHEMA_ORG_CONTEXT_FILE, date(2024, 12, 13)
+        )
+        _build_json_ld_documents(
+            BULK_TTL_FILE,
+            parallel_dir,
+            SCHEMA_ORG_CONTEXT_FILE,
+            date(2024, 12, 13),
+            workers=2,
+        )
+
+        serial_files = sorted(f.name for f in serial_dir.iterdir())
+        assert serial_files == sorted(f.name for f in parallel_dir.iterdir())
+        for file_name in serial_files:
+            assert (serial_dir / file_name).read_text() == (
+                parallel_dir / file_name
+            ).read_text()
+
+
+def test_unchanged_partitions_not_rebuilt():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        manifest_file = tmp_dir / "manifest.json"
+
+        assert (
+            _build_json_ld_documents(
+                BULK_TTL_FILE,
+                tmp_dir,
+                SCHEMA_ORG_CONTEXT_FILE,
+                date(2024, 12, 13),
+                manifest_file=manifest_file,
+            )
+            == 2
+        )
+        assert [
+            Path(p.file).name
+            for p in _read_partition_manifest(manifest_file).partitions
+        ] == ["mbo_TODO_LICENSE_1.json", "mbo_todo_monetary_grant_1.json"]
+
+        assert (
+            _build_json_ld_documents(
+                BULK_TTL_FILE,
+                tmp_dir,
+                SCHEMA_ORG_CONTEXT_FILE,
+                date(2024, 12, 14),
+                manifest_file=manifest_file,
+            )
+            == 0
+        )
+
+        # The partition is rebuilt, but its unchanged data document is left alone.
+        (tmp_dir / "mbo_TODO_LICENSE_1-input-metadata.json").unlink()
+        os.utime(tmp_dir / "mbo_TODO_LICENSE_1.json", ns=(1_000_000_000, 1_000_000_000))
+        assert (
+            _build_json_ld_documents(
+                BULK_TTL_FILE,
+                tmp_dir,
+                SCHEMA_ORG_CONTEXT_FILE,
+                date(2024, 12, 14),
+                manifest_file=manifest_file,
+            )
+            == 1
+        )
+        assert (tmp_dir / "mbo_TODO_LICENSE_1-input-metadata.json").exists()
+        assert (tmp_dir / "mbo_TODO_LICENSE_1.json").stat().st_mtime_ns == 1_000_000_000
+
+
+def test_all_partitions_rebuilt_when_the_context_changes():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        manifest_file = tmp_dir / "manifest.json"
+        context_file = tmp_dir / "schema-context.json"
+        context = json.loads(SCHEMA_ORG_CONTEXT_FILE.read_text())
+        context_file.write_text(json.dumps(context))
+
+        def _build() -> int:
+            return _build_json_ld_documents(
+                BULK_TTL_FILE,
+                tmp_dir,
+                context_file,
+                date(2024, 12, 13),
+                manifest_file=manifest_file,
+            )
+
+        assert _build() == 2
+        assert _build() == 0
+
+        context["@context"]["licence"] = "http://schema.org/license"
+        context_file.write_text(json.dumps(context))
+        assert _build() == 2
+
+
+def _parse_document(document_file: Path) -> rdflib.Graph:
+    """
+    Swaps the output context (which imports the remote schema.org context) for the local test context.
+    """
+    document = json.loads(document_file.read_text())
+    document["@context"] = _get_local_output_context()
+    graph = rdflib.Graph()
+    graph.parse(data=json.dumps(document), format="json-ld")
+    return graph
+
+
+def _write_expanded_document(document_file: Path, tmp_dir: Path) -> Path:
+    expanded_file = tmp_dir / f"{document_file.stem}.ttl"
+    _parse_document(document_file).serialize(expanded_file, format="ttl")
+    return expanded_file
+
+
+def _get_local_output_context() -> dict:
+    context = json.loads(SCHEMA_ORG_CONTEXT_FILE.read_text())["@context"]
+    context["schema"] = str(SCHEMA)
+    return context
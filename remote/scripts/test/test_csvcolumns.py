@@ -0,0 +1,40 @@
+import subprocess
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from mbocsvwscripts.csvcolumns import iter_column_values, read_csv_header
+
+
+def test_column_values_read_as_strings():
+    with TemporaryDirectory() as tmp_dir:
+        csv_file = Path(tmp_dir) / "table.csv"
+        csv_file.write_text("Identifier,Name\n0012,NA\n,Unidentified\n1e3,null\n")
+
+        assert read_csv_header(csv_file) == ["Identifier", "Name"]
+        assert list(iter_column_values(csv_file, "Identifier")) == ["0012", "1e3"]
+        assert list(iter_column_values(csv_file, "Name")) == [
+            "NA",
+            "Unidentified",
+            "null",
+        ]
+
+
+def test_streaming_columns_does_not_import_pandas():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, mbocsvwscripts.unionuniqueidentifiers; "
+            "sys.exit('pandas' in sys.modules)",
+        ],
+        cwd=Path(__file__).parent.parent,
+    )
+
+    assert result.returncode == 0
+
+
+if __name__ == "__main__":
+    pytest.main()
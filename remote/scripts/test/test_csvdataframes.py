@@ -0,0 +1,36 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from mbocsvwscripts.csvdataframes import (
+    get_unique_list_values,
+    get_unique_values,
+    read_csv_columns,
+)
+
+
+def test_identifiers_read_as_strings():
+    with TemporaryDirectory() as tmp_dir:
+        csv_file = Path(tmp_dir) / "table.csv"
+        csv_file.write_text(
+            "Identifier,Name,Related Identifiers\n"
+            "0012,NA,0013|0014\n"
+            ",Unidentified,\n"
+            "1e3,null,0012|1e3\n"
+        )
+
+        table = read_csv_columns(csv_file, ["Identifier", "Related Identifiers"])
+
+        assert list(table.columns) == ["Identifier", "Related Identifiers"]
+        assert get_unique_values(table["Identifier"]) == {"0012", "1e3"}
+        assert get_unique_list_values(table["Related Identifiers"], "|") == {
+            "0012",
+            "0013",
+            "0014",
+            "1e3",
+        }
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,95 @@
+from pathlib import Path
+from typing import Dict
+
+import pytest
+from linkml_runtime.utils.namespaces import Namespaces
+from linkml_runtime.utils.schemaview import (
+    ClassDefinition,
+    SlotDefinition,
+    TypeDefinition,
+)
+
+from mbocsvwscripts.generatecsvwdefinitions import _get_column_definition_for_slot
+from mbocsvwscripts.literalconverters import LiteralConverterDefinition
+
+IDENTIFIER_SLOT = SlotDefinition(name="id", identifier=True, range="string")
+STRING_TYPE = TypeDefinition(name="string", base="str", uri="xsd:string")
+
+
+def test_implicit_prefix_list_column_converted_with_its_facets():
+    literal_converter_definitions: Dict[str, LiteralConverterDefinition] = {}
+    slot = SlotDefinition(
+        name="orcids",
+        slot_uri="schema:identifier",
+        range="string",
+        multivalued=True,
+        implicit_prefix="orcid",
+        pattern=r"^\d{4}-\d{4}-\d{4}-\d{3}[\dX]$",
+    )
+
+    column_definition = _get_column_definition(slot, literal_converter_definitions)
+
+    assert column_definition["separator"] == "|"
+    assert column_definition["datatype"] == {
+        "@id": "https://w3id.org/marco-bolo/ConvertOrcidIdToNode",
+        "base": "string",
+        "format": r"^\d{4}-\d{4}-\d{4}-\d{3}[\dX]$",
+    }
+    assert literal_converter_definitions == {
+        "https://w3id.org/marco-bolo/ConvertOrcidIdToNode": LiteralConverterDefinition(
+            data_type_uri="https://w3id.org/marco-bolo/ConvertOrcidIdToNode",
+            prefix="https://orcid.org/",
+        )
+    }
+
+
+def test_implicit_prefixes_differing_in_case_share_a_converter():
+    literal_converter_definitions: Dict[str, LiteralConverterDefinition] = {}
+    for implicit_prefix in ["orcid", "ORCID"]:
+        _get_column_definition(
+            SlotDefinition(
+                name=f"{implicit_prefix}s",
+                slot_uri="schema:identifier",
+                range="string",
+                multivalued=True,
+                implicit_prefix=implicit_prefix,
+            ),
+            literal_converter_definitions,
+        )
+
+    assert list(literal_converter_definitions.values()) == [
+        LiteralConverterDefinition(
+            data_type_uri="https://w3id.org/marco-bolo/ConvertOrcidIdToNode",
+            prefix="https://orcid.org/",
+        )
+    ]
+
+
+def _get_column_definition(
+    slot: SlotDefinition,
+    literal_converter_definitions: Dict[str, LiteralConverterDefinition],
+) -> dict:
+    namespaces = Namespaces()
+    namespaces["orcid"] = "https://orcid.org/"
+    namespaces["schema"] = "https://schema.org/"
+    namespaces["xsd"] = "http://www.w3.org/2001/XMLSchema#"
+
+    return _get_column_definition_for_slot(
+        ClassDefinition(name="Person"),
+        IDENTIFIER_SLOT,
+        slot,
+        {},
+        {IDENTIFIER_SLOT.name: IDENTIFIER_SLOT, slot.name: slot},
+        {STRING_TYPE.name: STRING_TYPE},
+        [],
+        [],
+        namespaces,
+        [],
+        Path("."),
+        set(),
+        literal_converter_definitions,
+    )
+
+
+if __name__ == "__main__":
+    pytest.main()
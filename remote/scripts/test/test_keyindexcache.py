@@ -0,0 +1,103 @@
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from mbocsvwscripts.foreignkeychecks import ListColumnForeignKeyCheck
+from mbocsvwscripts.keyindexcache import get_column_keys
+from mbocsvwscripts.listcolumnforeignkeycheck import _check_list_column_foreign_keys
+from .utils import TEST_CASES_DIR
+
+
+def test_unchanged_csv_keys_read_from_cache():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        cache_dir = tmp_dir / "cache"
+        parent_table = tmp_dir / "parent_table.csv"
+        shutil.copy(TEST_CASES_DIR / "parent_table.csv", parent_table)
+
+        check = ListColumnForeignKeyCheck(
+            str(TEST_CASES_DIR / "child_table_invalid.csv"),
+            "Associated Organizations",
+            str(parent_table),
+            "Known Organizations",
+        )
+        [(_, invalid_values)] = _check_list_column_foreign_keys([check], cache_dir)
+        assert invalid_values.keys() == {
+            "Upperington Youth Orchestra",
+            "Henry's Chocolate Club",
+        }
+
+        def _fail_to_read_column_keys():
+            raise Exception("The keys should have been read from the cache.")
+
+        assert get_column_keys(
+            cache_dir, parent_table, "Known Organizations", _fail_to_read_column_keys
+        ) == {
+            "Chortlehampton Athletic Football Club",
+            "Wittleburgh Biscuit Tasting Society",
+            "Wittleburgh Drinkers Association",
+        }
+
+
+def test_changed_csv_keys_replace_stale_index():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        cache_dir = tmp_dir / "cache"
+        csv_file = tmp_dir / "table.csv"
+
+        csv_file.write_text("Identifier\na\nb\n")
+        assert get_column_keys(
+            cache_dir, csv_file, "Identifier", lambda: {"a", "b"}
+        ) == {"a", "b"}
+
+        csv_file.write_text("Identifier\nc\n")
+        assert get_column_keys(cache_dir, csv_file, "Identifier", lambda: {"c"}) == {
+            "c"
+        }
+        assert get_column_keys(cache_dir, csv_file, "Identifier", lambda: set()) == {
+            "c"
+        }
+        assert len(list(cache_dir.glob("*/*.keys"))) == 1
+
+
+def test_index_dirs_of_renamed_csv_files_evicted():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        cache_dir = tmp_dir / "cache"
+        csv_file = tmp_dir / "table.csv"
+        other_csv_file = tmp_dir / "other.csv"
+
+        csv_file.write_text("Identifier\na\n")
+        get_column_keys(cache_dir, csv_file, "Identifier", lambda: {"a"})
+        [original_index_dir] = cache_dir.iterdir()
+
+        renamed_csv_file = csv_file.rename(tmp_dir / "renamed.csv")
+        get_column_keys(cache_dir, renamed_csv_file, "Identifier", lambda: {"a"})
+        other_csv_file.write_text("Identifier\nb\n")
+        get_column_keys(cache_dir, other_csv_file, "Identifier", lambda: {"b"})
+
+        assert not original_index_dir.exists()
+        assert len(list(cache_dir.glob("*/*.keys"))) == 2
+
+
+def test_index_dirs_from_other_format_versions_evicted():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        cache_dir = tmp_dir / "cache"
+        csv_file = tmp_dir / "table.csv"
+        csv_file.write_text("Identifier\na\n")
+
+        old_index_dir = cache_dir / "old"
+        old_index_dir.mkdir(parents=True)
+        (old_index_dir / "source").write_text(f"0\n{csv_file.resolve()}")
+
+        assert get_column_keys(cache_dir, csv_file, "Identifier", lambda: {"a"}) == {
+            "a"
+        }
+        assert not old_index_dir.exists()
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,44 +1,180 @@
+import json
+from dataclasses import asdict
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
 import pytest
+from click.testing import CliRunner
 
-from mbocsvwscripts.listcolumnforeignkeycheck import _get_invalid_list_column_values
+from mbocsvwscripts.foreignkeychecks import ListColumnForeignKeyCheck
+from mbocsvwscripts.listcolumnforeignkeycheck import (
+    _check_list_column_foreign_keys,
+    CellLocation,
+    main,
+)
 from .utils import TEST_CASES_DIR
 
 
 def test_list_column_foreign_key_failure():
-    invalid_values = _get_invalid_list_column_values(
-        TEST_CASES_DIR / "child_table_invalid.csv",
-        "Associated Organizations",
-        TEST_CASES_DIR / "parent_table.csv",
-        "Known Organizations",
-        separator="|",
+    [(_, invalid_values)] = _check_list_column_foreign_keys(
+        [
+            ListColumnForeignKeyCheck(
+                str(TEST_CASES_DIR / "child_table_invalid.csv"),
+                "Associated Organizations",
+                str(TEST_CASES_DIR / "parent_table.csv"),
+                "Known Organizations",
+                separator="|",
+            )
+        ]
     )
 
-    assert invalid_values == {"Upperington Youth Orchestra", "Henry's Chocolate Club"}
+    assert invalid_values.keys() == {
+        "Upperington Youth Orchestra",
+        "Henry's Chocolate Club",
+    }
 
 
 def test_list_column_foreign_key_success():
-    invalid_values = _get_invalid_list_column_values(
-        TEST_CASES_DIR / "child_table_valid.csv",
-        "Associated Organizations",
-        TEST_CASES_DIR / "parent_table.csv",
-        "Known Organizations",
-        separator="|",
+    [(_, invalid_values)] = _check_list_column_foreign_keys(
+        [
+            ListColumnForeignKeyCheck(
+                str(TEST_CASES_DIR / "child_table_valid.csv"),
+                "Associated Organizations",
+                str(TEST_CASES_DIR / "parent_table.csv"),
+                "Known Organizations",
+                separator="|",
+            )
+        ]
     )
 
     assert not any(invalid_values)
 
 
 def test_list_column_foreign_key_success_comma_separator():
-    invalid_values = _get_invalid_list_column_values(
-        TEST_CASES_DIR / "child_table_valid_comma.csv",
-        "Associated Organizations",
-        TEST_CASES_DIR / "parent_table.csv",
-        "Known Organizations",
-        separator=",",
+    [(_, invalid_values)] = _check_list_column_foreign_keys(
+        [
+            ListColumnForeignKeyCheck(
+                str(TEST_CASES_DIR / "child_table_valid_comma.csv"),
+                "Associated Organizations",
+                str(TEST_CASES_DIR / "parent_table.csv"),
+                "Known Organizations",
+                separator=",",
+            )
+        ]
     )
 
     assert not any(invalid_values)
 
 
+def test_list_column_foreign_key_spec():
+    checks = [
+        ListColumnForeignKeyCheck(
+            str(TEST_CASES_DIR / child_table_file_name),
+            "Associated Organizations",
+            str(TEST_CASES_DIR / "parent_table.csv"),
+            "Known Organizations",
+            separator,
+        )
+        for child_table_file_name, separator in [
+            ("child_table_valid.csv", None),
+            ("child_table_invalid.csv", "|"),
+            ("child_table_valid_comma.csv", ","),
+        ]
+    ]
+
+    with TemporaryDirectory() as tmp_dir:
+        spec_file = Path(tmp_dir) / "foreign-key-checks.json"
+        spec_file.write_text(json.dumps([asdict(check) for check in checks]))
+
+        result = CliRunner().invoke(main, ["--spec", str(spec_file)])
+
+    assert result.exit_code == 1
+    assert (
+        f"All values found in {TEST_CASES_DIR / 'child_table_valid.csv'}['Associated Organizations'] appear to be "
+        "valid." in result.output
+    )
+    assert (
+        f"Unexpected values found in {TEST_CASES_DIR / 'child_table_invalid.csv'}['Associated Organizations'] but "
+        f"not in {TEST_CASES_DIR / 'parent_table.csv'}['Known Organizations']:\n'Henry's Chocolate Club'\n"
+        "'Upperington Youth Orchestra'" in result.output
+    )
+    assert "Checked 3 list column(s): 1 with unexpected values." in result.output
+
+
+def test_list_column_foreign_key_report():
+    child_table = str(TEST_CASES_DIR / "child_table_invalid.csv")
+    parent_table = str(TEST_CASES_DIR / "parent_table.csv")
+
+    with TemporaryDirectory() as tmp_dir:
+        report_file = Path(tmp_dir) / "report.json"
+        result = CliRunner().invoke(
+            main,
+            [
+                child_table,
+                "Associated Organizations",
+                parent_table,
+                "Known Organizations",
+                "--report",
+                str(report_file),
+            ],
+        )
+        report = json.loads(report_file.read_text())
+
+    assert result.exit_code == 1
+    assert report == [
+        {
+            "child_table_path": child_table,
+            "child_table_column": "Associated Organizations",
+            "parent_table_path": parent_table,
+            "parent_table_column": "Known Organizations",
+            "separator": "|",
+            "invalid_values": {
+                "Henry's Chocolate Club": [
+                    {"row": 3, "column": "Associated Organizations"}
+                ],
+                "Upperington Youth Orchestra": [
+                    {"row": 2, "column": "Associated Organizations"}
+                ],
+            },
+        }
+    ]
+
+
+def test_list_column_foreign_key_report_rows_count_blank_lines():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        child_table = tmp_dir / "child.csv"
+        child_table.write_text("Associated Organizations\nknown\n\nunknown\n")
+        parent_table = tmp_dir / "parent.csv"
+        parent_table.write_text("Known Organizations\nknown\n")
+
+        [(_, invalid_values)] = _check_list_column_foreign_keys(
+            [
+                ListColumnForeignKeyCheck(
+                    str(child_table),
+                    "Associated Organizations",
+                    str(parent_table),
+                    "Known Organizations",
+                )
+            ]
+        )
+
+    assert invalid_values == {"unknown": [CellLocation(4, "Associated Organizations")]}
+
+
+def test_list_column_foreign_key_spec_rejects_arguments():
+    result = CliRunner().invoke(
+        main,
+        [
+            "--spec",
+            str(TEST_CASES_DIR / "parent_table.csv"),
+            str(TEST_CASES_DIR / "child_table_valid.csv"),
+        ],
+    )
+
+    assert result.exit_code == 2
+    assert "--spec cannot be used with CSV_CHILD_TABLE etc." in result.output
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -1,15 +1,23 @@
+import json
+import os
 import shutil
+import stat
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
 import pytest
 import rdflib
+from rdflib.compare import isomorphic
 
 from mbocsvwscripts.listcolumnsasnodes import (
     _convert_literals_to_nodes_in_file,
-    _get_number_to_be_converted_in_graph,
+    _get_literal_converters,
+    _read_literal_converter_definitions,
+    CONVERT_MBO_ID_TO_NODE_DATA_TYPE_URI,
+    CONVERT_IRI_TO_NODE_DATA_TYPE_URI,
+    LiteralConverterDefinition,
 )
-from .utils import TEST_CASES_DIR
+from .utils import TEST_CASES_DIR, assert_file_contains_only_these_triples
 
 
 def test_mbo_list_columns_values_converted_to_node_references():
@@ -51,13 +59,232 @@ def test_mbo_list_columns_values_converted_to_node_references():
         assert list(results) == [True]
 
 
-def test_number_literals_to_be_converted_in_graph():
-    graph = rdflib.Graph()
-    graph = graph.parse(TEST_CASES_DIR / "dataset.ttl", format="ttl")
+def test_number_literals_converted_in_file():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dataset_ttl = Path(tmp_dir) / "dataset.ttl"
+        shutil.copy(TEST_CASES_DIR / "dataset.ttl", tmp_dataset_ttl)
+
+        num_converted = _convert_literals_to_nodes_in_file(tmp_dataset_ttl)
+
+        assert num_converted == 10
+
+
+def test_other_triples_left_alone():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dataset_ttl = Path(tmp_dir) / "dataset.ttl"
+        shutil.copy(TEST_CASES_DIR / "dataset.ttl", tmp_dataset_ttl)
+
+        _convert_literals_to_nodes_in_file(tmp_dataset_ttl)
+
+        original_graph = rdflib.Graph().parse(
+            TEST_CASES_DIR / "dataset.ttl", format="ttl"
+        )
+        converted_graph = rdflib.Graph().parse(tmp_dataset_ttl, format="ttl")
+        to_be_converted = {
+            (s, p, o)
+            for (s, p, o) in original_graph
+            if isinstance(o, rdflib.Literal)
+            and o.datatype
+            in {CONVERT_MBO_ID_TO_NODE_DATA_TYPE_URI, CONVERT_IRI_TO_NODE_DATA_TYPE_URI}
+        }
+        assert not any(
+            isinstance(o, rdflib.Literal)
+            and o.datatype
+            in {CONVERT_MBO_ID_TO_NODE_DATA_TYPE_URI, CONVERT_IRI_TO_NODE_DATA_TYPE_URI}
+            for (_, _, o) in converted_graph
+        )
+        assert set(original_graph) - to_be_converted <= set(converted_graph)
+        assert len(converted_graph) == len(original_graph)
+
+
+def test_repeated_triples_passed_through():
+    """
+    Triples are streamed through one at a time, so repeats aren't weeded out. Everything reading the bulk files
+    de-duplicates them.
+    """
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        bulk_nt_file = tmp_dir / "bulk.nt"
+        repeated_line = f'<https://w3id.org/marco-bolo/mbo_1> <https://schema.org/about> "mbo_2"^^<{CONVERT_MBO_ID_TO_NODE_DATA_TYPE_URI}> .\n'
+        bulk_nt_file.write_text(repeated_line * 2)
+        out_file = tmp_dir / "out.nt"
+
+        assert _convert_literals_to_nodes_in_file(bulk_nt_file, out_file) == 2
+
+        assert (
+            out_file.read_text()
+            == "<https://w3id.org/marco-bolo/mbo_1> <https://schema.org/about> <https://w3id.org/marco-bolo/mbo_2> .\n"
+            * 2
+        )
+        assert len(rdflib.Graph().parse(out_file, format="nt")) == 1
+
 
-    num_to_be_converted = _get_number_to_be_converted_in_graph(graph)
+def test_file_untouched_when_nothing_to_convert():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_ttl = Path(tmp_dir) / "bulk-licenses.ttl"
+        shutil.copy(TEST_CASES_DIR / "bulk-licenses.ttl", tmp_ttl)
+        original_content = tmp_ttl.read_text()
+
+        assert _convert_literals_to_nodes_in_file(tmp_ttl) == 0
+
+        assert tmp_ttl.read_text() == original_content
+        assert [f.name for f in Path(tmp_dir).iterdir()] == ["bulk-licenses.ttl"]
+
+
+def test_converted_triples_written_to_out_file():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        tmp_ttl = tmp_dir / "bulk-licenses.ttl"
+        shutil.copy(TEST_CASES_DIR / "bulk-licenses.ttl", tmp_ttl)
+        original_content = tmp_ttl.read_text()
+        out_file = tmp_dir / "bulk-licenses.nt"
+
+        assert _convert_literals_to_nodes_in_file(tmp_ttl, out_file) == 0
+
+        assert tmp_ttl.read_text() == original_content
+        assert isomorphic(
+            rdflib.Graph().parse(out_file, format="nt"),
+            rdflib.Graph().parse(tmp_ttl, format="ttl"),
+        )
+        assert sorted(f.name for f in tmp_dir.iterdir()) == [
+            "bulk-licenses.nt",
+            "bulk-licenses.ttl",
+        ]
+
+
+def test_file_not_parsed_when_nothing_to_convert():
+    with TemporaryDirectory() as tmp_dir:
+        # Parsing this would fail, so it can only succeed if the file is skipped.
+        tmp_ttl = Path(tmp_dir) / "not-really.ttl"
+        tmp_ttl.write_text("This isn't turtle.")
+        os.utime(tmp_ttl, ns=(1_000_000_000, 1_000_000_000))
+
+        assert _convert_literals_to_nodes_in_file(tmp_ttl) == 0
+
+        assert tmp_ttl.read_text() == "This isn't turtle."
+        assert tmp_ttl.stat().st_mtime_ns == 1_000_000_000
+
+
+def test_n_triples_copied_to_out_file_when_nothing_to_convert():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        bulk_nt_file = tmp_dir / "bulk-licenses.nt"
+        rdflib.Graph().parse(TEST_CASES_DIR / "bulk-licenses.ttl").serialize(
+            bulk_nt_file, format="nt"
+        )
+        out_file = tmp_dir / "out.nt"
 
-    assert num_to_be_converted == 10
+        assert _convert_literals_to_nodes_in_file(bulk_nt_file, out_file) == 0
+
+        assert out_file.read_bytes() == bulk_nt_file.read_bytes()
+        assert sorted(f.name for f in tmp_dir.iterdir()) == [
+            "bulk-licenses.nt",
+            "out.nt",
+        ]
+
+
+def test_converted_file_replaced_with_new_modification_time():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dataset_ttl = Path(tmp_dir) / "dataset.ttl"
+        shutil.copy(TEST_CASES_DIR / "dataset.ttl", tmp_dataset_ttl)
+        tmp_dataset_ttl.chmod(0o640)
+        os.utime(tmp_dataset_ttl, ns=(1_000_000_000, 1_000_000_000))
+
+        assert _convert_literals_to_nodes_in_file(tmp_dataset_ttl) == 10
+
+        assert tmp_dataset_ttl.stat().st_mtime_ns > 1_000_000_000
+        assert stat.S_IMODE(tmp_dataset_ttl.stat().st_mode) == 0o640
+        assert [f.name for f in Path(tmp_dir).iterdir()] == ["dataset.ttl"]
+
+
+def test_invalid_iri_not_converted():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_ttl = Path(tmp_dir) / "invalid.ttl"
+        tmp_ttl.write_text(
+            f"""
+            <https://w3id.org/marco-bolo/mbo_1> <https://schema.org/url> "not an iri"^^<{CONVERT_IRI_TO_NODE_DATA_TYPE_URI}>.
+        """
+        )
+        original_content = tmp_ttl.read_text()
+
+        with pytest.raises(Exception, match="Unable to convert 'not an iri'"):
+            _convert_literals_to_nodes_in_file(tmp_ttl)
+
+        assert tmp_ttl.read_text() == original_content
+        assert [f.name for f in Path(tmp_dir).iterdir()] == ["invalid.ttl"]
+
+
+def test_declared_converters_applied_in_the_same_pass():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        converters_file = tmp_dir / "literal-converters.json"
+        converters_file.write_text(
+            json.dumps(
+                [
+                    {
+                        "data_type_uri": "https://w3id.org/marco-bolo/ConvertSchemaIdToNode",
+                        "prefix": "https://schema.org/",
+                    }
+                ]
+            )
+        )
+        tmp_ttl = tmp_dir / "bulk.ttl"
+        tmp_ttl.write_text(
+            """
+            @prefix mbo: <https://w3id.org/marco-bolo/>.
+            @prefix schema: <https://schema.org/>.
+
+            mbo:mbo_1 schema:additionalType "Dataset"^^mbo:ConvertSchemaIdToNode, "Thing"^^mbo:ConvertSchemaIdToNode;
+                schema:isBasedOn "mbo_2"^^mbo:ConvertMboIdToNode.
+        """
+        )
+
+        assert (
+            _convert_literals_to_nodes_in_file(
+                tmp_ttl,
+                converters=_get_literal_converters(
+                    _read_literal_converter_definitions(converters_file)
+                ),
+            )
+            == 3
+        )
+
+        assert_file_contains_only_these_triples(
+            tmp_ttl,
+            """
+            @prefix mbo: <https://w3id.org/marco-bolo/>.
+            @prefix schema: <https://schema.org/>.
+
+            mbo:mbo_1 schema:additionalType schema:Dataset, schema:Thing;
+                schema:isBasedOn mbo:mbo_2.
+        """,
+        )
+
+
+def test_undeclared_converters_not_applied():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_ttl = Path(tmp_dir) / "bulk.ttl"
+        tmp_ttl.write_text(
+            """
+            @prefix mbo: <https://w3id.org/marco-bolo/>.
+            @prefix schema: <https://schema.org/>.
+
+            mbo:mbo_1 schema:additionalType "Dataset"^^mbo:ConvertSchemaIdToNode.
+        """
+        )
+
+        assert _convert_literals_to_nodes_in_file(tmp_ttl) == 0
+
+
+def test_built_in_converters_cannot_be_redefined():
+    with pytest.raises(Exception, match="Unable to redefine the built-in"):
+        _get_literal_converters(
+            [
+                LiteralConverterDefinition(
+                    str(CONVERT_MBO_ID_TO_NODE_DATA_TYPE_URI), "https://example.com/"
+                )
+            ]
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+import rdflib
+from rdflib.compare import isomorphic
+
+from mbocsvwscripts.ntriples import (
+    get_n_triples_line,
+    iter_n_triples,
+    iter_n_triples_file,
+)
+from .utils import TEST_CASES_DIR
+
+
+@pytest.mark.parametrize(
+    "ttl_file",
+    sorted(TEST_CASES_DIR.rglob("*.ttl")),
+    ids=lambda f: f.name,
+)
+def test_parses_same_triples_as_rdflib(ttl_file: Path):
+    with TemporaryDirectory() as tmp_dir:
+        n_triples_file = Path(tmp_dir) / "bulk.nt"
+        rdflib.Graph().parse(ttl_file, format="ttl").serialize(
+            n_triples_file, format="nt"
+        )
+
+        expected_graph = rdflib.Graph().parse(n_triples_file, format="nt")
+        actual_graph = rdflib.Graph()
+        for triple in iter_n_triples_file(n_triples_file):
+            actual_graph.add(triple)
+
+        assert isomorphic(actual_graph, expected_graph)
+
+
+def test_literals_unescaped():
+    [(_, _, escaped), (_, _, language), (_, _, typed)] = iter_n_triples(
+        [
+            '<https://example.com/s> <https://example.com/p> "Line \\"one\\"\\nt\\u00E9l\\u00E9phone" .\n',
+            '<https://example.com/s> <https://example.com/p> "chat"@fr-BE .\n',
+            '<https://example.com/s> <https://example.com/p> "01"^^<http://www.w3.org/2001/XMLSchema#integer> .\n',
+        ]
+    )
+
+    assert escaped == rdflib.Literal('Line "one"\ntéléphone')
+    assert language == rdflib.Literal("chat", lang="fr-BE")
+    assert typed == rdflib.Literal("01", datatype=rdflib.XSD.integer)
+
+
+def test_written_lines_parsed_back_to_the_same_triples():
+    s = rdflib.URIRef("https://example.com/s")
+    p = rdflib.URIRef("https://example.com/p")
+    triples = [
+        (s, p, rdflib.Literal('Line "one"\r\nback\\slash')),
+        (s, p, rdflib.Literal("chat", lang="fr-BE")),
+        (s, p, rdflib.Literal("01", datatype=rdflib.XSD.integer)),
+        (s, p, rdflib.URIRef("https://example.com/o")),
+    ]
+
+    n_triples = "".join(get_n_triples_line(triple) for triple in triples)
+
+    assert list(iter_n_triples(n_triples.splitlines(keepends=True))) == triples
+    assert set(rdflib.Graph().parse(data=n_triples, format="nt")) == set(triples)
+
+
+def test_blank_node_labels_shared_within_document():
+    [(s1, _, o1), (s2, _, o2)] = iter_n_triples(
+        [
+            "_:a <https://example.com/p> _:b .\n",
+            "_:b <https://example.com/p> _:a .\n",
+        ]
+    )
+
+    assert isinstance(s1, rdflib.BNode)
+    assert s1 == o2
+    assert o1 == s2
+    assert s1 != o1
+
+
+def test_comments_and_blank_lines_skipped():
+    triples = list(
+        iter_n_triples(
+            [
+                "# A comment\n",
+                "\n",
+                "   \n",
+                "<https://example.com/s> <https://example.com/p> <https://example.com/o> . # trailing comment\n",
+                "<https://example.com/s>\t<https://example.com/p>\t<https://example.com/o2>.",
+            ]
+        )
+    )
+
+    assert triples == [
+        (
+            rdflib.URIRef("https://example.com/s"),
+            rdflib.URIRef("https://example.com/p"),
+            rdflib.URIRef("https://example.com/o"),
+        ),
+        (
+            rdflib.URIRef("https://example.com/s"),
+            rdflib.URIRef("https://example.com/p"),
+            rdflib.URIRef("https://example.com/o2"),
+        ),
+    ]
+
+
+def test_invalid_line_raises():
+    with pytest.raises(Exception):
+        list(iter_n_triples(["<https://example.com/s> <https://example.com/p> .\n"]))
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,14 +1,45 @@
+import json
+import os
+import shutil
+import tracemalloc
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
 import pytest
+import rdflib
+from click.testing import CliRunner
 
+from mbocsvwscripts.expandedjsonld import get_expanded_json_ld
 from mbocsvwscripts.partition import (
+    main,
     _partition_to_individual_files,
+    _partition_to_individual_files_out_of_core,
+    _iter_partitions_out_of_core,
     _list_partition_files_out,
+    index_triples_by_partition,
+    _read_partition_manifest,
+    _generate_partitions_makefile,
+    get_partition_content_hash,
+    _list_partition_uris,
+    _get_subject_index_file_path,
 )
 from .utils import TEST_CASES_DIR, assert_file_contains_only_these_triples
 
+EDGE_CASE_PARTITION_TTL = """
+    @prefix schema: <https://schema.org/>.
+    @prefix mbo: <https://w3id.org/marco-bolo/>.
+    @prefix xsd: <http://www.w3.org/2001/XMLSchema#>.
+
+    mbo:mbo_edge_case a schema:CreativeWork, schema:Thing;
+        schema:name "Plain", "Sprachlich"@de, "Typed"^^xsd:string, "1"^^xsd:integer, "0.5"^^xsd:double;
+        schema:description "Multi-line\\n\\"quoted\\" \\\\ text with ünïcödé";
+        schema:url <https://example.com/some%20path?a=1#b>;
+        schema:author [ schema:name "Anonymous" ].
+
+    <https://w3id.org/marco-bolo/mbo_edge_case#hash> a schema:Thing;
+        schema:isPartOf mbo:mbo_edge_case.
+"""
+
 
 def test_expected_partitions_listed():
     with TemporaryDirectory() as tmp_dir:
@@ -39,6 +70,65 @@ def test_expected_partitions_listed_hash():
         assert partitioned_files == {tmp_dir / "mbo_todo_monetary_grant_1.json"}
 
 
+@pytest.mark.parametrize(
+    "bulk_ttl_file_name", ["bulk-licenses.ttl", "bulk-blank-nodes.ttl", "dataset.ttl"]
+)
+def test_partitions_listed_from_n_triples_same_as_parsed(bulk_ttl_file_name: str):
+    with TemporaryDirectory() as tmp_dir:
+        n_triples_file = Path(tmp_dir) / "bulk.nt"
+        rdflib.Graph().parse(TEST_CASES_DIR / bulk_ttl_file_name).serialize(
+            n_triples_file, format="nt"
+        )
+
+        assert _list_partition_uris(n_triples_file) == _list_partition_uris(
+            TEST_CASES_DIR / bulk_ttl_file_name
+        )
+
+
+def test_partitions_listed_from_n_triples_with_escaped_iris():
+    with TemporaryDirectory() as tmp_dir:
+        n_triples_file = Path(tmp_dir) / "bulk.nt"
+        n_triples_file.write_text(
+            "# A comment\n"
+            "\n"
+            '<https://w3id.org/marco-bolo/mbo_\\u00FCber> <https://schema.org/name> "<not a subject>" .\n'
+            '  <https://w3id.org/marco-bolo/mbo_1#hash> <https://schema.org/name> "a" .\n'
+            '_:b0 <https://schema.org/name> "b" .\n',
+            encoding="utf-8",
+        )
+
+        assert _list_partition_uris(n_triples_file) == {
+            rdflib.URIRef("https://w3id.org/marco-bolo/mbo_über"),
+            rdflib.URIRef("https://w3id.org/marco-bolo/mbo_1"),
+        }
+
+
+def test_partitions_listed_from_subject_index():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        bulk_ttl_file = tmp_dir / "bulk-licenses.ttl"
+        bulk_ttl_file.write_text((TEST_CASES_DIR / "bulk-licenses.ttl").read_text())
+        expected_partition_uris = _list_partition_uris(bulk_ttl_file)
+
+        _partition_to_individual_files(bulk_ttl_file, tmp_dir, write_subject_index=True)
+        subject_index_file = _get_subject_index_file_path(bulk_ttl_file)
+        assert subject_index_file.exists()
+
+        # Make the bulk file unparseable to prove the index is used instead.
+        bulk_ttl_file.write_text("Not turtle")
+        os.utime(bulk_ttl_file, (0, 0))
+        assert _list_partition_uris(bulk_ttl_file) == expected_partition_uris
+
+        # An index older than the bulk file is ignored.
+        os.utime(subject_index_file, (0, 0))
+        bulk_ttl_file.write_text(
+            "<https://w3id.org/marco-bolo/mbo_new> <https://schema.org/name> 'New'."
+        )
+        assert _list_partition_uris(bulk_ttl_file) == {
+            rdflib.URIRef("https://w3id.org/marco-bolo/mbo_new")
+        }
+
+
 def test_partitions_contain_expected_triples():
     with TemporaryDirectory() as tmp_dir:
         tmp_dir = Path(tmp_dir)
@@ -176,5 +266,506 @@ def test_partitions_contains_expected_hash_urls():
         )
 
 
+@pytest.mark.parametrize(
+    "bulk_ttl_file",
+    sorted(TEST_CASES_DIR.rglob("*.ttl")),
+    ids=lambda f: f.name,
+)
+def test_expanded_json_ld_isomorphic_to_rdflib_serializer(bulk_ttl_file: Path):
+    bulk_graph = rdflib.Graph()
+    bulk_graph.parse(bulk_ttl_file, format="ttl")
+
+    for partitioned_triples in index_triples_by_partition(bulk_graph).values():
+        _assert_expanded_json_ld_isomorphic_to_rdflib_serializer(partitioned_triples)
+
+
+def test_expanded_json_ld_isomorphic_to_rdflib_serializer_for_edge_cases():
+    graph = rdflib.Graph()
+    graph.parse(data=EDGE_CASE_PARTITION_TTL, format="ttl")
+
+    _assert_expanded_json_ld_isomorphic_to_rdflib_serializer(list(graph))
+
+
+def test_triples_indexed_by_partition():
+    graph = rdflib.Graph()
+    graph.parse(TEST_CASES_DIR / "bulk-monetary-grant.ttl", format="ttl")
+
+    partitioned_triples = index_triples_by_partition(graph)
+
+    assert set(partitioned_triples) == {
+        rdflib.URIRef("https://w3id.org/marco-bolo/mbo_todo_monetary_grant_1")
+    }
+    assert sorted(
+        partitioned_triples[
+            rdflib.URIRef("https://w3id.org/marco-bolo/mbo_todo_monetary_grant_1")
+        ]
+    ) == sorted(graph)
+
+
+def test_blank_nodes_partitioned_with_the_entities_referring_to_them():
+    graph = rdflib.Graph()
+    graph.parse(TEST_CASES_DIR / "bulk-blank-nodes.ttl", format="ttl")
+
+    partitioned_triples = index_triples_by_partition(graph)
+
+    assert set(partitioned_triples) == {
+        rdflib.URIRef("https://w3id.org/marco-bolo/mbo_place_1"),
+        rdflib.URIRef("https://w3id.org/marco-bolo/mbo_place_2"),
+    }
+
+    place_1_graph = rdflib.Graph()
+    for triple in partitioned_triples[
+        rdflib.URIRef("https://w3id.org/marco-bolo/mbo_place_1")
+    ]:
+        place_1_graph.add(triple)
+    assert rdflib.compare.isomorphic(
+        place_1_graph,
+        rdflib.Graph().parse(
+            data="""
+            @prefix schema: <https://schema.org/> .
+            @prefix mbo: <https://w3id.org/marco-bolo/> .
+
+            mbo:mbo_place_1 a schema:Place;
+                schema:name "Place 1";
+                schema:geo [ a schema:GeoShape; schema:box "1 2 3 4" ];
+                schema:additionalProperty [ a schema:PropertyValue; schema:name "Shared"; schema:value "shared" ].
+
+            <https://w3id.org/marco-bolo/mbo_place_1#extra> schema:additionalProperty [
+                a schema:PropertyValue;
+                schema:valueReference [ a schema:QuantitativeValue; schema:value "5" ]
+            ].
+        """,
+            format="ttl",
+        ),
+    )
+
+    place_2_graph = rdflib.Graph()
+    for triple in partitioned_triples[
+        rdflib.URIRef("https://w3id.org/marco-bolo/mbo_place_2")
+    ]:
+        place_2_graph.add(triple)
+    assert rdflib.compare.isomorphic(
+        place_2_graph,
+        rdflib.Graph().parse(
+            data="""
+            @prefix schema: <https://schema.org/> .
+            @prefix mbo: <https://w3id.org/marco-bolo/> .
+
+            mbo:mbo_place_2 a schema:Place;
+                schema:name "Place 2";
+                schema:additionalProperty [ a schema:PropertyValue; schema:name "Shared"; schema:value "shared" ].
+        """,
+            format="ttl",
+        ),
+    )
+
+
+def test_blank_nodes_sharing_a_child_kept_in_their_own_partitions():
+    graph = rdflib.Graph().parse(
+        data="""
+        @prefix schema: <https://schema.org/> .
+        @prefix mbo: <https://w3id.org/marco-bolo/> .
+
+        mbo:mbo_place_1 schema:additionalProperty _:place_1_property .
+        mbo:mbo_place_2 schema:additionalProperty _:place_2_property .
+
+        _:place_1_property schema:name "Place 1's property";
+            schema:valueReference _:shared_value .
+        _:place_2_property schema:name "Place 2's property";
+            schema:valueReference _:shared_value .
+
+        _:shared_value schema:value "shared" .
+    """,
+        format="ttl",
+    )
+
+    partitioned_triples = index_triples_by_partition(graph)
+
+    for place_number in [1, 2]:
+        place_graph = rdflib.Graph()
+        for triple in partitioned_triples[
+            rdflib.URIRef(f"https://w3id.org/marco-bolo/mbo_place_{place_number}")
+        ]:
+            place_graph.add(triple)
+        assert rdflib.compare.isomorphic(
+            place_graph,
+            rdflib.Graph().parse(
+                data=f"""
+                @prefix schema: <https://schema.org/> .
+                @prefix mbo: <https://w3id.org/marco-bolo/> .
+
+                mbo:mbo_place_{place_number} schema:additionalProperty [
+                    schema:name "Place {place_number}'s property";
+                    schema:valueReference [ schema:value "shared" ]
+                ].
+            """,
+                format="ttl",
+            ),
+        )
+
+
+def test_partition_content_hash_stable_with_blank_nodes():
+    first_parse = index_triples_by_partition(
+        rdflib.Graph().parse(TEST_CASES_DIR / "bulk-blank-nodes.ttl", format="ttl")
+    )
+    second_parse = index_triples_by_partition(
+        rdflib.Graph().parse(TEST_CASES_DIR / "bulk-blank-nodes.ttl", format="ttl")
+    )
+
+    for part, partitioned_triples in first_parse.items():
+        assert get_partition_content_hash(
+            partitioned_triples
+        ) == get_partition_content_hash(second_parse[part])
+
+
+def test_partition_manifest_written():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        manifest_file = tmp_dir / "bulk-licenses.json"
+        _partition_to_individual_files(
+            TEST_CASES_DIR / "bulk-licenses.ttl", tmp_dir, manifest_file
+        )
+
+        manifest = _read_partition_manifest(manifest_file)
+
+        assert manifest.bulk_ttl_file == str(TEST_CASES_DIR / "bulk-licenses.ttl")
+        assert {p.file for p in manifest.partitions} == {
+            str(f)
+            for f in _list_partition_files_out(
+                TEST_CASES_DIR / "bulk-licenses.ttl", tmp_dir
+            )
+        }
+        assert all(Path(p.file).exists() for p in manifest.partitions)
+        # Each partition has different triples so each should have a different hash.
+        assert len({p.hash for p in manifest.partitions}) == 8
+
+
+def test_partitions_makefile_generated_from_manifests():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        manifest_file = tmp_dir / "bulk-monetary-grant.json"
+        _partition_to_individual_files(
+            TEST_CASES_DIR / "bulk-monetary-grant.ttl", tmp_dir, manifest_file
+        )
+
+        makefile = _generate_partitions_makefile(
+            [_read_partition_manifest(manifest_file)]
+        )
+
+        assert (
+            f"PARTITIONED_FILES_{TEST_CASES_DIR / 'bulk-monetary-grant.ttl'} := "
+            f"{tmp_dir / 'mbo_todo_monetary_grant_1.json'}\n"
+        ) in makefile
+
+
+def test_unchanged_partitions_not_rewritten():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        bulk_ttl_file = tmp_dir / "bulk-licenses.ttl"
+        manifest_file = tmp_dir / "bulk-licenses.manifest.json"
+        bulk_ttl_file.write_text((TEST_CASES_DIR / "bulk-licenses.ttl").read_text())
+
+        assert (
+            _partition_to_individual_files(bulk_ttl_file, tmp_dir, manifest_file) == 8
+        )
+
+        # Mark the files so we can tell whether they've been overwritten.
+        for partition_file in tmp_dir.glob("mbo_TODO_LICENSE_*.json"):
+            partition_file.write_text("untouched")
+
+        bulk_ttl_file.write_text(
+            bulk_ttl_file.read_text().replace(
+                "European Union Public License 1.2",
+                "European Union Public License 1.2 (updated)",
+            )
+        )
+        (tmp_dir / "mbo_TODO_LICENSE_1.json").unlink()
+
+        assert (
+            _partition_to_individual_files(bulk_ttl_file, tmp_dir, manifest_file) == 2
+        )
+
+        rewritten_files = {
+            f.name
+            for f in tmp_dir.glob("mbo_TODO_LICENSE_*.json")
+            if f.read_text() != "untouched"
+        }
+        assert rewritten_files == {"mbo_TODO_LICENSE_1.json", "mbo_TODO_LICENSE_4.json"}
+
+
+def test_parallel_partitions_identical_to_serial():
+    with TemporaryDirectory() as serial_dir, TemporaryDirectory() as parallel_dir:
+        serial_dir = Path(serial_dir)
+        parallel_dir = Path(parallel_dir)
+        _partition_to_individual_files(
+            TEST_CASES_DIR / "bulk-licenses.ttl", serial_dir, workers=1
+        )
+        _partition_to_individual_files(
+            TEST_CASES_DIR / "bulk-licenses.ttl", parallel_dir, workers=2
+        )
+
+        serial_files = sorted(f.name for f in serial_dir.iterdir())
+        assert serial_files == sorted(f.name for f in parallel_dir.iterdir())
+        for file_name in serial_files:
+            assert (serial_dir / file_name).read_bytes() == (
+                parallel_dir / file_name
+            ).read_bytes()
+
+
+@pytest.mark.parametrize("bulk_format", ["ttl", "nt"])
+def test_out_of_core_partitions_identical_to_in_memory(bulk_format: str):
+    with TemporaryDirectory() as in_memory_dir, TemporaryDirectory() as out_of_core_dir:
+        in_memory_dir = Path(in_memory_dir)
+        out_of_core_dir = Path(out_of_core_dir)
+        bulk_file = out_of_core_dir / f"bulk-licenses.{bulk_format}"
+        rdflib.Graph().parse(TEST_CASES_DIR / "bulk-licenses.ttl").serialize(
+            bulk_file, format=bulk_format
+        )
+
+        _partition_to_individual_files(
+            TEST_CASES_DIR / "bulk-licenses.ttl", in_memory_dir
+        )
+        # Force the triples to be spilled over many temporary files.
+        _partition_to_individual_files_out_of_core(
+            bulk_file, out_of_core_dir, max_triples_in_memory=3
+        )
+
+        in_memory_files = sorted(f.name for f in in_memory_dir.iterdir())
+        assert len(in_memory_files) == 8
+        for file_name in in_memory_files:
+            in_memory_graph = rdflib.Graph().parse(in_memory_dir / file_name)
+            out_of_core_graph = rdflib.Graph().parse(out_of_core_dir / file_name)
+            assert rdflib.compare.isomorphic(in_memory_graph, out_of_core_graph)
+
+
+def test_n_triples_partitions_identical_to_turtle():
+    with TemporaryDirectory() as ttl_dir, TemporaryDirectory() as nt_dir:
+        ttl_dir = Path(ttl_dir)
+        nt_dir = Path(nt_dir)
+        bulk_nt_file = nt_dir / "bulk-licenses.nt"
+        rdflib.Graph().parse(TEST_CASES_DIR / "bulk-licenses.ttl").serialize(
+            bulk_nt_file, format="nt"
+        )
+
+        _partition_to_individual_files(TEST_CASES_DIR / "bulk-licenses.ttl", ttl_dir)
+        _partition_to_individual_files(bulk_nt_file, nt_dir)
+
+        ttl_files = sorted(f.name for f in ttl_dir.iterdir())
+        assert len(ttl_files) == 8
+        for file_name in ttl_files:
+            assert (ttl_dir / file_name).read_bytes() == (
+                nt_dir / file_name
+            ).read_bytes()
+
+
+@pytest.mark.parametrize("bulk_format", ["ttl", "nt"])
+def test_out_of_core_blank_nodes_identical_to_in_memory(bulk_format: str):
+    with TemporaryDirectory() as in_memory_dir, TemporaryDirectory() as out_of_core_dir:
+        in_memory_dir = Path(in_memory_dir)
+        out_of_core_dir = Path(out_of_core_dir)
+        bulk_file = out_of_core_dir / f"bulk-blank-nodes.{bulk_format}"
+        rdflib.Graph().parse(TEST_CASES_DIR / "bulk-blank-nodes.ttl").serialize(
+            bulk_file, format=bulk_format
+        )
+
+        _partition_to_individual_files(
+            TEST_CASES_DIR / "bulk-blank-nodes.ttl", in_memory_dir
+        )
+        _partition_to_individual_files_out_of_core(
+            bulk_file, out_of_core_dir, max_triples_in_memory=3
+        )
+
+        in_memory_files = sorted(f.name for f in in_memory_dir.iterdir())
+        assert in_memory_files == ["mbo_place_1.json", "mbo_place_2.json"]
+        for file_name in in_memory_files:
+            in_memory_graph = rdflib.Graph().parse(in_memory_dir / file_name)
+            out_of_core_graph = rdflib.Graph().parse(out_of_core_dir / file_name)
+            assert rdflib.compare.isomorphic(in_memory_graph, out_of_core_graph)
+
+
+def test_out_of_core_literals_containing_unicode_line_separators():
+    with TemporaryDirectory() as in_memory_dir, TemporaryDirectory() as out_of_core_dir:
+        in_memory_dir = Path(in_memory_dir)
+        out_of_core_dir = Path(out_of_core_dir)
+        bulk_file = out_of_core_dir / "bulk.nt"
+        bulk_file.write_text(
+            "".join(
+                f'<https://w3id.org/marco-bolo/mbo_{i}> <https://schema.org/name> "before{separator}after" .\n'
+                for i, separator in enumerate(["\u2028", "\x0c", "\x1d", "\x85"])
+            ),
+            encoding="utf-8",
+        )
+
+        _partition_to_individual_files(bulk_file, in_memory_dir)
+        # Spilling one triple at a time means every partition is sorted and merged from the run files.
+        _partition_to_individual_files_out_of_core(
+            bulk_file, out_of_core_dir, max_triples_in_memory=1
+        )
+
+        in_memory_files = sorted(f.name for f in in_memory_dir.iterdir())
+        assert len(in_memory_files) == 4
+        for file_name in in_memory_files:
+            out_of_core_graph = rdflib.Graph().parse(out_of_core_dir / file_name)
+            assert rdflib.compare.isomorphic(
+                rdflib.Graph().parse(in_memory_dir / file_name), out_of_core_graph
+            )
+            [name] = out_of_core_graph.objects()
+            assert str(name).startswith("before") and str(name).endswith("after")
+
+
+def test_out_of_core_partitioning_memory_is_bounded():
+    def _get_peak_memory_partitioning(num_entities: int) -> int:
+        with TemporaryDirectory() as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+            bulk_file = tmp_dir / "bulk.nt"
+            with open(bulk_file, "w") as f:
+                for i in range(num_entities):
+                    f.write(
+                        f'<https://w3id.org/marco-bolo/mbo_{i}> <https://schema.org/name> "Entity {i}" .\n'
+                        f'<https://w3id.org/marco-bolo/mbo_{i}#amount> <https://schema.org/value> "{i}" .\n'
+                    )
+
+            tracemalloc.start()
+            try:
+                num_partitions = sum(
+                    1 for _ in _iter_partitions_out_of_core(bulk_file, tmp_dir, 2_000)
+                )
+                _, peak_memory = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            assert num_partitions == num_entities
+            return peak_memory
+
+    # Ten times as many triples (and spilled runs) shouldn't need much more memory.
+    assert _get_peak_memory_partitioning(10_000) < 1.5 * _get_peak_memory_partitioning(
+        1_000
+    )
+
+
+def test_execute_reports_peak_rss():
+    with TemporaryDirectory() as tmp_dir:
+        result = CliRunner().invoke(
+            main,
+            [
+                "execute",
+                "--out-of-core",
+                "--out",
+                tmp_dir,
+                str(TEST_CASES_DIR / "bulk-monetary-grant.ttl"),
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "Peak RSS: " in result.output
+
+
+def test_execute_partitions_multiple_bulk_files():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        bulk_dir = tmp_dir / "bulk"
+        bulk_dir.mkdir()
+        for bulk_file_name in ["bulk-licenses.ttl", "bulk-monetary-grant.ttl"]:
+            (bulk_dir / bulk_file_name).write_text(
+                (TEST_CASES_DIR / bulk_file_name).read_text()
+            )
+
+        result = CliRunner().invoke(
+            main,
+            [
+                "execute",
+                "--out",
+                str(tmp_dir),
+                "--manifests-dir",
+                str(tmp_dir / "manifests"),
+                "--workers",
+                "2",
+                str(bulk_dir / "*.ttl"),
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert (
+            f"{bulk_dir / 'bulk-licenses.ttl'}: wrote 8 changed partition file(s) in "
+            in result.output
+        )
+        assert (
+            f"{bulk_dir / 'bulk-monetary-grant.ttl'}: wrote 1 changed partition file(s) in "
+            in result.output
+        )
+        assert "Wrote 9 changed partition file(s) from 2 bulk files." in result.output
+
+        assert sorted(f.name for f in (tmp_dir / "manifests").iterdir()) == [
+            "bulk-licenses.json",
+            "bulk-monetary-grant.json",
+        ]
+        assert (tmp_dir / "mbo_todo_monetary_grant_1.json").exists()
+        assert (tmp_dir / "mbo_TODO_LICENSE_4-data.json").exists()
+
+
+def test_execute_rejects_manifests_dir_for_bulk_files_with_the_same_name():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        for bulk_dir_name in ["a", "b"]:
+            (tmp_dir / bulk_dir_name).mkdir()
+            shutil.copy(
+                TEST_CASES_DIR / "bulk-licenses.ttl",
+                tmp_dir / bulk_dir_name / "bulk-licenses.ttl",
+            )
+
+        result = CliRunner().invoke(
+            main,
+            [
+                "execute",
+                "--out",
+                str(tmp_dir),
+                "--manifests-dir",
+                str(tmp_dir / "manifests"),
+                str(tmp_dir / "a" / "bulk-licenses.ttl"),
+                str(tmp_dir / "b" / "bulk-licenses.ttl"),
+            ],
+        )
+
+        assert result.exit_code == 2
+        assert "more than one is named 'bulk-licenses'" in result.output
+        assert not (tmp_dir / "manifests").exists()
+
+
+def test_execute_rejects_single_manifest_for_multiple_bulk_files():
+    with TemporaryDirectory() as tmp_dir:
+        result = CliRunner().invoke(
+            main,
+            [
+                "execute",
+                "--out",
+                tmp_dir,
+                "--manifest",
+                str(Path(tmp_dir) / "manifest.json"),
+                str(TEST_CASES_DIR / "bulk-licenses.ttl"),
+                str(TEST_CASES_DIR / "bulk-monetary-grant.ttl"),
+            ],
+        )
+
+        assert result.exit_code != 0
+        assert (
+            "--manifest can only be used with a single BULK_TTL_FILE" in result.output
+        )
+
+
+def _assert_expanded_json_ld_isomorphic_to_rdflib_serializer(partitioned_triples):
+    expected_graph = rdflib.Graph()
+    for triple in partitioned_triples:
+        expected_graph.add(triple)
+    expected_graph = rdflib.Graph().parse(
+        data=expected_graph.serialize(format="json-ld"), format="json-ld"
+    )
+
+    actual_graph = rdflib.Graph().parse(
+        data=json.dumps(get_expanded_json_ld(partitioned_triples)), format="json-ld"
+    )
+
+    assert rdflib.compare.isomorphic(actual_graph, expected_graph)
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -1,3 +1,4 @@
+import json
 import shutil
 from datetime import date
 from pathlib import Path
@@ -6,8 +7,12 @@ from typing import Tuple, Optional
 
 import pytest
 import rdflib
+from click.testing import CliRunner
 
 from mbocsvwscripts.processparametadata import (
+    main,
+    process_para_metadata_files,
+    BuildContext,
     _process_para_metadata,
     INPUT_METADATA_DATA_TYPE_URI,
     MBO_ORGANIZATION_URI,
@@ -83,8 +88,8 @@ def test_expected_output_triples_present():
                                                                 schema:contentUrl "https://w3id.org/marco-bolo/mbo_TODO_LICENSE_1"^^schema:URL;
                                                                 schema:encodingFormat "application/ld+json".
                                                                 
-            mbo:mbo_some_action a schema:CreateAction;
-                                schema:result mbo:mbo_TODO_LICENSE_1-input-metadata,
+            # The framed para-metadata only refers to the action, so its type isn't present.
+            mbo:mbo_some_action schema:result mbo:mbo_TODO_LICENSE_1-input-metadata,
                                               <{MBO['mbo_TODO_LICENSE_1-input-metadata#csv']}>, 
                                               <{MBO['mbo_TODO_LICENSE_1-input-metadata#jsonld']}>.
         """,
@@ -112,6 +117,225 @@ def test_github_output_triples_present():
         )
 
 
+def test_json_ld_para_metadata_framed_like_jsonld_frame():
+    """
+    Without a schema.org context to compact against, the para-metadata document should be the same as the one
+    `jsonld frame --frame remote/para-metadata.frame.json` (jsonld.js) gives for the para-metadata graph.
+    """
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        _, output_file = _augment_input_metadata_tmp_dir(
+            TEST_CASES_DIR / "parametadata" / "mbo_TODO_LICENSE_1.json",
+            "mbo_TODO_LICENSE_1-input-metadata.json",
+            tmp_dir,
+            date_created=date.fromisoformat("2024-12-13"),
+            git_repo_commit_file_url="https://github.com/marco-bolo/csv-to-json-ld/tree/some-hash",
+        )
+
+        assert json.loads(output_file.read_text()) == json.loads(
+            (
+                TEST_CASES_DIR / "parametadata" / "mbo_TODO_LICENSE_1-jsonld-frame.json"
+            ).read_text()
+        )
+
+
+def test_unchanged_files_not_rewritten():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        input_file = tmp_dir / "mbo_TODO_LICENSE_1.json"
+        output_file = tmp_dir / "mbo_TODO_LICENSE_1-input-metadata.json"
+        shutil.copy(
+            TEST_CASES_DIR / "parametadata" / "mbo_TODO_LICENSE_1.json", input_file
+        )
+        assert (
+            _process_para_metadata(
+                input_file, output_file, BuildContext(date(2024, 12, 13))
+            )
+            == 2
+        )
+
+        # The input metadata has already been split out.
+        assert (
+            _process_para_metadata(
+                input_file, output_file, BuildContext(date(2024, 12, 13))
+            )
+            == 0
+        )
+
+        # The metadata file is rebuilt with the same content.
+        stripped_input = input_file.read_text()
+        output_mtime_ns = output_file.stat().st_mtime_ns
+        shutil.copy(
+            TEST_CASES_DIR / "parametadata" / "mbo_TODO_LICENSE_1.json", input_file
+        )
+        assert (
+            _process_para_metadata(
+                input_file, output_file, BuildContext(date(2024, 12, 13))
+            )
+            == 1
+        )
+        assert output_file.stat().st_mtime_ns == output_mtime_ns
+        assert input_file.read_text() == stripped_input
+
+        shutil.copy(
+            TEST_CASES_DIR / "parametadata" / "mbo_TODO_LICENSE_1.json", input_file
+        )
+        assert (
+            _process_para_metadata(
+                input_file, output_file, BuildContext(date(2024, 12, 14))
+            )
+            == 2
+        )
+
+
+def test_file_missing_input_metadata_not_skipped():
+    """
+    Only a file which we have already split the input metadata out of is skipped, not any file which happens to be
+    missing input metadata.
+    """
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        input_file = tmp_dir / "mbo_TODO_LICENSE_1.json"
+        output_file = tmp_dir / "mbo_TODO_LICENSE_1-input-metadata.json"
+        shutil.copy(
+            TEST_CASES_DIR / "parametadata" / "mbo_TODO_LICENSE_1.json", input_file
+        )
+        _process_para_metadata(
+            input_file, output_file, BuildContext(date(2024, 12, 13))
+        )
+
+        # Someone else has rewritten the stripped file.
+        input_file.write_text(json.dumps(json.loads(input_file.read_text())))
+
+        with pytest.raises(Exception, match="Expected only one"):
+            _process_para_metadata(
+                input_file, output_file, BuildContext(date(2024, 12, 13))
+            )
+
+
+def test_build_context_applied_to_every_file():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        metadata = (
+            TEST_CASES_DIR / "parametadata" / "mbo_TODO_LICENSE_1.json"
+        ).read_text()
+        for i in [1, 2]:
+            (tmp_dir / f"mbo_TODO_LICENSE_{i}.json").write_text(
+                metadata.replace("mbo_TODO_LICENSE_1", f"mbo_TODO_LICENSE_{i}")
+            )
+
+        build_context = BuildContext(
+            date(2024, 12, 13),
+            "https://github.com/marco-bolo/csv-to-json-ld/tree/some-hash",
+            MBO.mbo_some_other_organization,
+        )
+        results = process_para_metadata_files([tmp_dir], build_context)
+
+        assert [(r.para_metadata_file.name, r.error) for r in results] == [
+            ("mbo_TODO_LICENSE_1-input-metadata.json", None),
+            ("mbo_TODO_LICENSE_2-input-metadata.json", None),
+        ]
+        for result in results:
+            assert_file_contains_these_triples(
+                result.para_metadata_file,
+                """
+                    prefix schema: <https://schema.org/>
+                    prefix mbo: <https://w3id.org/marco-bolo/>
+                """,
+                f"""
+                    ?dataset schema:archivedAt <{build_context.git_repo_commit_file_url}>;
+                             schema:distribution ?jsonLdDownload.
+                    ?jsonLdDownload schema:dateModified "2024-12-13"^^schema:Date;
+                                    schema:creator mbo:mbo_some_other_organization.
+                """,
+            )
+
+
+def test_directory_processed_in_parallel_despite_failures():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        raw_json_ld_dir = tmp_dir / "raw"
+        raw_json_ld_dir.mkdir()
+        metadata = (
+            TEST_CASES_DIR / "parametadata" / "mbo_TODO_LICENSE_1.json"
+        ).read_text()
+        (raw_json_ld_dir / "mbo_TODO_LICENSE_1.json").write_text(metadata)
+        (raw_json_ld_dir / "mbo_TODO_LICENSE_2.json").write_text(
+            metadata.replace("mbo_TODO_LICENSE_1", "mbo_TODO_LICENSE_2")
+        )
+        (raw_json_ld_dir / "mbo_broken.json").write_text("{ not JSON-LD")
+        # Para-metadata which has already been split out isn't processed again.
+        (raw_json_ld_dir / "mbo_TODO_LICENSE_3-input-metadata.json").write_text("{}")
+
+        result = CliRunner().invoke(
+            main,
+            [
+                "--out-dir",
+                str(tmp_dir / "out"),
+                "--workers",
+                "2",
+                str(raw_json_ld_dir),
+            ],
+        )
+
+        assert result.exit_code == 1, result.output
+        assert "Processed 3 metadata file(s): 2 succeeded, 1 failed." in result.output
+        assert "Wrote 4 changed file(s)." in result.output
+        assert sorted(f.name for f in (tmp_dir / "out").iterdir()) == [
+            "mbo_TODO_LICENSE_1-input-metadata.json",
+            "mbo_TODO_LICENSE_2-input-metadata.json",
+        ]
+
+
+def test_out_rejected_for_multiple_metadata_files():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        for file_name in ["mbo_TODO_LICENSE_1.json", "mbo_TODO_LICENSE_2.json"]:
+            shutil.copy(
+                TEST_CASES_DIR / "parametadata" / "mbo_TODO_LICENSE_1.json",
+                tmp_dir / file_name,
+            )
+
+        result = CliRunner().invoke(
+            main, ["--out", str(tmp_dir / "out.json"), str(tmp_dir)]
+        )
+
+        assert result.exit_code != 0
+        assert "--out can only be used with a single metadata file" in result.output
+        assert not (tmp_dir / "out.json").exists()
+
+
+def test_positional_para_metadata_file_out_still_accepted():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        metadata_file = tmp_dir / "mbo_TODO_LICENSE_1.json"
+        shutil.copy(
+            TEST_CASES_DIR / "parametadata" / "mbo_TODO_LICENSE_1.json", metadata_file
+        )
+        para_metadata_file_out = tmp_dir / "out" / "para-metadata.json"
+        para_metadata_file_out.parent.mkdir()
+
+        result = CliRunner().invoke(
+            main, [str(metadata_file), str(para_metadata_file_out)]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "Wrote 2 changed file(s)." in result.output
+        assert para_metadata_file_out.exists()
+
+
+def test_missing_metadata_file_suggests_out():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        result = CliRunner().invoke(
+            main,
+            [str(tmp_dir / "missing.json"), str(tmp_dir), str(tmp_dir / "out.json")],
+        )
+
+        assert result.exit_code == 2
+        assert "missing.json' does not exist. Use --out" in result.output
+
+
 def _augment_input_metadata_tmp_dir(
     input_file: Path,
     output_file_name: str,
@@ -129,8 +353,7 @@ def _augment_input_metadata_tmp_dir(
     _process_para_metadata(
         tmp_input_file,
         output_file,
-        date_created,
-        git_repo_commit_file_url=git_repo_commit_file_url,
+        BuildContext(date_created, git_repo_commit_file_url),
     )
 
     return tmp_input_file, output_file
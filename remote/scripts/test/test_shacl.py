@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+import rdflib
+from pyshacl import validate
+
+SHACL_SHAPES_FILE = Path(__file__).parent.parent.parent / "shacl.ttl"
+
+ALL_TRIG = """
+@prefix mbo: <https://w3id.org/marco-bolo/>.
+@prefix schema: <https://schema.org/>.
+
+<file:///work/out/bulk/Person.nt> {
+    mbo:mbo_shared a schema:Person;
+        schema:affiliation mbo:mbo_organization.
+}
+
+<file:///work/out/bulk/Organization.nt> {
+    mbo:mbo_shared a schema:Organization.
+    mbo:mbo_organization a schema:Organization.
+}
+"""
+
+
+def test_shacl_shapes_report_csv_files_from_bulk_graph_names():
+    data_graph = rdflib.Dataset()
+    data_graph.parse(data=ALL_TRIG, format="trig")
+
+    conforms, _, results_text = validate(
+        data_graph,
+        shacl_graph=rdflib.Graph().parse(SHACL_SHAPES_FILE),
+        allow_warnings=True,
+    )
+
+    assert not conforms
+    assert (
+        "MBO Identifier 'mbo_shared' has been used to identify multiple entities in: "
+        in results_text
+    )
+    assert "Person.csv" in results_text
+    assert "Organization.csv" in results_text
+    assert (
+        "MBO Identifier 'mbo_shared' in Person.csv doesn't appear to be referenced anywhere else."
+        in results_text
+    )
+    assert " in .csv " not in results_text
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -37,5 +37,96 @@ def test_mbo_list_columns_values_converted_to_node_references():
         pd.testing.assert_frame_equal(expected_df, actual_df)
 
 
+def test_identifiers_used_in_multiple_files_reported():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+
+        c_csv = tmp_dir / "c.csv"
+        c_csv.write_text(
+            "Something else,MBO PID\nBoat,mbo_00000003\nTrain,mbo_00000007\n"
+        )
+        unioned_file_out = tmp_dir / "a-and-b-and-c.csv"
+
+        duplicate_identifiers = _union_identifiers(
+            [TEST_CASES_DIR / "a.csv", TEST_CASES_DIR / "b.csv", c_csv],
+            unioned_file_out,
+            pid_column_name="MBO PID",
+            identifier_column_title="MBO PID",
+        )
+
+        assert duplicate_identifiers == {
+            "mbo_00000003": [TEST_CASES_DIR / "a.csv", c_csv]
+        }
+        assert list(pd.read_csv(unioned_file_out)["MBO PID"]) == [
+            "mbo_00000001",
+            "mbo_00000002",
+            "mbo_00000003",
+            "mbo_00000004",
+            "mbo_00000005",
+            "mbo_00000006",
+            "mbo_00000007",
+        ]
+
+
+def test_identifiers_repeated_within_a_file_reported():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+
+        c_csv = tmp_dir / "c.csv"
+        c_csv.write_text(
+            "MBO PID\nmbo_00000009\nmbo_00000007\nmbo_00000009\nmbo_00000008\n"
+        )
+        key_index_cache_dir = tmp_dir / "key-indexes"
+
+        # The second pass reads the identifiers from the key index cache.
+        for _ in range(2):
+            unioned_file_out = tmp_dir / "c-unioned.csv"
+            duplicate_identifiers = _union_identifiers(
+                [c_csv],
+                unioned_file_out,
+                pid_column_name="MBO PID",
+                key_index_cache_dir=key_index_cache_dir,
+            )
+
+            assert duplicate_identifiers == {"mbo_00000009": [c_csv, c_csv]}
+            assert list(pd.read_csv(unioned_file_out)["MBO PID"]) == [
+                "mbo_00000007",
+                "mbo_00000008",
+                "mbo_00000009",
+            ]
+
+
+def test_identifiers_spilled_to_disk_while_sorting():
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+
+        c_csv = tmp_dir / "c.csv"
+        c_csv.write_text(
+            'MBO PID\nmbo_00000006\n"mbo_line\nbreak"\nmbo_00000003\nmbo_00000006\nmbo_00000001\n'
+        )
+        unioned_file_out = tmp_dir / "a-and-c.csv"
+
+        duplicate_identifiers = _union_identifiers(
+            [TEST_CASES_DIR / "a.csv", c_csv],
+            unioned_file_out,
+            pid_column_name="MBO PID",
+            identifier_column_title="MBO PID",
+            max_identifiers_in_memory=2,
+        )
+
+        assert duplicate_identifiers == {
+            "mbo_00000001": [TEST_CASES_DIR / "a.csv", c_csv],
+            "mbo_00000003": [TEST_CASES_DIR / "a.csv", c_csv],
+            "mbo_00000006": [c_csv, c_csv],
+        }
+        assert list(pd.read_csv(unioned_file_out)["MBO PID"]) == [
+            "mbo_00000001",
+            "mbo_00000002",
+            "mbo_00000003",
+            "mbo_00000006",
+            "mbo_line\nbreak",
+        ]
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -14,19 +14,19 @@ RIOT					:= docker run --rm -v "$(WORKING_DIR)":/work -u "$(UID)":"$(GID)" -w /w
 SPARQL					:= docker run --rm -v "$(WORKING_DIR)":/work -u "$(UID)":"$(GID)" -w /work $(JENA_CLI_DOCKER) sparql
 MBO_TOOLS_DOCKER_RUN	:= docker run -i --rm -v "$(WORKING_DIR)":/work -u "$(UID)":"$(GID)" -w /work "$(MBO_TOOLS_DOCKER)"
 JQ						:= $(MBO_TOOLS_DOCKER_RUN) jq
-JSONLD_CLI				:= $(MBO_TOOLS_DOCKER_RUN) jsonld
-PARTITON_CLI			:= $(MBO_TOOLS_DOCKER_RUN) partition execute
-PARTITON_LIST_CLI		:= $(MBO_TOOLS_DOCKER_RUN) partition list
-PROCESS_PARA_METADATA	:= $(MBO_TOOLS_DOCKER_RUN) processparametadata
+BUILD_JSONLD_CLI		:= $(MBO_TOOLS_DOCKER_RUN) build-jsonld
+BUILD_JSONLD_WORKERS	?= 1
+PARTITON_MAKEFILE_CLI	:= $(MBO_TOOLS_DOCKER_RUN) partition makefile
 
 
 SCHEMA_ORG_CONTEXT_URL 	:= https://schema.org/docs/jsonldcontext.json
 SCHEMA_ORG_FILE			:= out/resources/schema-context.json
 
-BULK_TTL_FILES 			:= $(wildcard out/bulk/*.ttl)
+BULK_NT_FILES 			:= $(wildcard out/bulk/*.nt)
+PARTITION_MANIFEST_FILES	:= $(BULK_NT_FILES:out/bulk/%.nt=out/partition-manifests/%.json)
+PARTITIONS_MAKEFILE		:= out/partition-manifests/partitions.mk
 	
 output-directories:
-	@mkdir -p out/raw-jsonld
 	@mkdir -p out/resources
 
 $(SCHEMA_ORG_FILE):
@@ -40,55 +40,44 @@ $(SCHEMA_ORG_FILE):
 
 init: output-directories $(SCHEMA_ORG_FILE)
 
-out/%.json: out/raw-jsonld/%.json
-	@echo "=============================== Converting $< to schema.org JSON-LD $@ ===============================" ;
-
-	@# 1. We do a raw conversion of the raw JSON-LD into tidier schema.org JSON-LD
-	@# 2. We change all https://schema.org/ URIs to http://schema.org/ in preparation for compaction 
-	@# 		against the schema.org JSON-LD context (which uses exclusively http://schema.org URIs).
-	@# 3. We now compact against the schema.org JSON-LD context so we can have things like `"@type": "Dataset"` 
-	@# 		instead of `"@type": "https://schema.org/Dataset"`
-	@# 4. Then we set the context to make use of the schema.org context, but tell it to use https URIs instead 
-	@# 		of http.
-
-	@cat "$<" \
-		| sed 's/https:\/\/schema.org\//http:\/\/schema.org\//g' \
-		| $(JSONLD_CLI) compact --context "$(SCHEMA_ORG_FILE)" --allow all \
-		| $(JQ) '.["@context"] = { "@import": "https://schema.org/", "schema": "https://schema.org/" }' > "$@";
+# `build-jsonld` splits the bulk N-Triples file into one document per entity (plus its `-input-metadata.json` para-metadata)
+# in a single process. It frames the para-metadata and compacts everything against the schema.org JSON-LD context, 
+# then sets each document's context to make use of the schema.org context, but tell it to use https URIs instead of 
+# http. Entities whose content and context haven't changed since the manifest was last written are left untouched.
+out/partition-manifests/%.json: out/bulk/%.nt $(SCHEMA_ORG_FILE)
+	@mkdir -p out/partition-manifests
+	@echo "=============================== Building JSON-LD from $< ==============================="
+	@$(BUILD_JSONLD_CLI) --out out --context "$(SCHEMA_ORG_FILE)" --manifest "$@" --workers "$(BUILD_JSONLD_WORKERS)" \
+		--git_repo_commit_file_url "$(GIT_HASH_REPO_URL)" "$<"
+	@echo ""
 
-	@echo "";
+# Make remakes this include (and hence any out-of-date partition manifests) before reading the rest of this file.
+# This means make only has to read one small file to find out what each bulk N-Triples file is split into.
+$(PARTITIONS_MAKEFILE): $(PARTITION_MANIFEST_FILES)
+	@mkdir -p out/partition-manifests
+	@$(PARTITON_MAKEFILE_CLI) --out "$@" $^
+
+# Remaking the include builds all of the JSON-LD, so only do it for the goals which need to know what was built.
+# Otherwise e.g. `init` would build the JSON-LD from stale bulk files before anything has been validated.
+PARTITIONS_MAKEFILE_GOALS	:= jsonld remove-orphaned
+ifneq ($(filter $(PARTITIONS_MAKEFILE_GOALS),$(or $(MAKECMDGOALS),jsonld)),)
+include $(PARTITIONS_MAKEFILE)
+endif
 
 define SPLIT_TTL =
-# The following line is a bit of a beast.
-# 	It creates a variable called `INDIVIDUAL_RAW_JSON_LD_FILE_NAMES_$(1)` which is unique to each bulk TTL file.
+# 	`INDIVIDUAL_JSON_LD_FILE_NAMES_$(1)` is unique to each bulk N-Triples file.
 # 	This is necessary so we don't get conflicting variables in the same scope.
 #
-#   Overall it queries the bulk TTL file for the unique subjects defined therein, pulls out the slug
-#	from each of them and then converts that into an `out/raw-jsonld/file-name.json` which is where that subject's 
-#	data will be placed. 
-$(eval INDIVIDUAL_RAW_JSON_LD_FILE_NAMES_$(1) = \
-  $(shell $(PARTITON_LIST_CLI) --out out/raw-jsonld "$(1)" ))
-$(eval SPLIT_RAW_JSON_LD_FILES += $(INDIVIDUAL_RAW_JSON_LD_FILE_NAMES_$(1)) $(INDIVIDUAL_RAW_JSON_LD_FILE_NAMES_$(1):%.json=%-input-metadata.json))
-
-$(INDIVIDUAL_RAW_JSON_LD_FILE_NAMES_$(1)) $(INDIVIDUAL_RAW_JSON_LD_FILE_NAMES_$(1):%.json=%-input-metadata.json)  &: $(1)
-	@echo "=============================== Splitting $(1) ==============================="
-	@$(PARTITON_CLI) --out out/raw-jsonld "$(1)"
-	@for file in $(INDIVIDUAL_RAW_JSON_LD_FILE_NAMES_$(1)); do \
-		tmp_file="$$$${file%.json}-input-metadata-tmp.json"; \
-		out_file="$$$${file%.json}-input-metadata.json"; \
-		$(PROCESS_PARA_METADATA) --git_repo_commit_file_url "$(GIT_HASH_REPO_URL)" "$$$$file" "$$$$tmp_file"; \
-		$(JSONLD_CLI) frame --frame remote/para-metadata.frame.json "$$$$tmp_file" > "$$$$out_file"; \
-		rm -f "$$$$tmp_file"; \
-	done
-	@echo "Done."
-	@echo ""
+#   It lists the `out/file-name.json` documents which `build-jsonld` split the bulk N-Triples file into. These are read 
+#	from the `PARTITIONED_FILES_$(1)` variable which is defined in $(PARTITIONS_MAKEFILE).
+$(eval INDIVIDUAL_JSON_LD_FILE_NAMES_$(1) = $(PARTITIONED_FILES_$(1)))
+$(eval TIDY_JSON_LD_FILES += $(INDIVIDUAL_JSON_LD_FILE_NAMES_$(1)) $(INDIVIDUAL_JSON_LD_FILE_NAMES_$(1):%.json=%-input-metadata.json))
 
 endef
 
-$(foreach file,$(BULK_TTL_FILES),$(eval $(call SPLIT_TTL,$(file))))
+$(foreach file,$(BULK_NT_FILES),$(eval $(call SPLIT_TTL,$(file))))
 
-TIDY_JSON_LD_FILES				:= $(SPLIT_RAW_JSON_LD_FILES:out/raw-jsonld/%=out/%)
-EXPECTED_INDIVIDUAL_OUT_FILES 	:= $(TIDY_JSON_LD_FILES) $(SPLIT_RAW_JSON_LD_FILES)
+EXPECTED_INDIVIDUAL_OUT_FILES 	:= $(TIDY_JSON_LD_FILES)
 
 define DELETE_UNEXPECTED_INDIVIDUAL_FILES
 ifeq ($$(filter $$(file),$(EXPECTED_INDIVIDUAL_OUT_FILES)),) 
@@ -97,15 +86,16 @@ endif
 endef
 
 # Remove orphaned outputs which should no longer be present.
-remove-orphaned: $(wildcard out/*.json) $(wildcard out/raw-jsonld/*.json) $(wildcard out/ttl/*.ttl) $(wildcard out/**/*-tmp.json)
+remove-orphaned: $(wildcard out/*.json) $(wildcard out/ttl/*.ttl) $(wildcard out/**/*-tmp.json)
 	$(foreach file,$^, $(eval $(DELETE_UNEXPECTED_INDIVIDUAL_FILES)))
 
-jsonld: $(TIDY_JSON_LD_FILES) remove-orphaned
+jsonld: $(PARTITION_MANIFEST_FILES) remove-orphaned
 
 clean:
 	@rm -f $(SCHEMA_ORG_FILE)
 	@rm -rf out/resources
-	@rm -rf out/raw-jsonld
-	@rm -f $(TIDY_JSON_LD_FILES)
+	@rm -rf out/partition-manifests
+	@# The partitions makefile isn't included for `clean`, so we can't use `TIDY_JSON_LD_FILES` here.
+	@rm -f $(wildcard out/*.json)
 
 .DEFAULT_GOAL := jsonld
\ No newline at end of file